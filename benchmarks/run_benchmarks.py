@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable
+
+from spec_merger import html_renderer
+from spec_merger.aligner import Aligner
+from spec_merger.aligner_utils import Content
+from spec_merger.html_renderer import HTMLRenderer
+
+from .tree_generator import MutationRates, TreeShape, generate_pair
+
+SCALES: dict[str, TreeShape] = {
+    "small": TreeShape(sections=50, depth=4, fan_out=5),
+    "medium": TreeShape(sections=500, depth=5, fan_out=5),
+    "large": TreeShape(sections=2000, depth=5, fan_out=6),
+}
+
+TEMPLATE_PATH = os.path.dirname(html_renderer.__file__)
+
+
+def scenarios(left: Content, right: Content) -> dict[str, tuple[Callable[[], object], Callable[[object], object]]]:
+    """
+    Returns, for each scenario, a setup function and the timed function taking the result of the setup.
+    Every run gets its own alignment result, since the error counts it computes are cached on its nodes.
+    """
+    def align():
+        return Aligner().align(left, right)
+
+    return {
+        "align": (lambda: None, lambda _: align()),
+        "count_errors": (align, lambda result: result.count_errors()),
+        "to_text": (align, lambda result: result.to_text()),
+        "render": (align, lambda result: HTMLRenderer(result).render(path_to_template=TEMPLATE_PATH)),
+    }
+
+
+def run(scales: list[str], repeat: int, seed: int, rates: MutationRates) -> dict[str, dict[str, float]]:
+    results = {}
+    for scale in scales:
+        left, right = generate_pair(SCALES[scale], rates, seed)
+        for name, (setup, timed) in scenarios(left, right).items():
+            timings = []
+            for _ in range(repeat):
+                argument = setup()
+                start = time.perf_counter()
+                timed(argument)
+                timings.append(time.perf_counter() - start)
+            results[f"{scale}/{name}"] = {"min": min(timings), "median": statistics.median(timings)}
+            print(f"{scale + '/' + name:<24} min {min(timings) * 1000:10.2f} ms"
+                  f"   median {statistics.median(timings) * 1000:10.2f} ms", flush=True)
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+            tolerance: float) -> list[str]:
+    """
+    Prints how each scenario compares to the baseline and returns the ones that got slower than the tolerance allows.
+    Medians are compared, as they are less sensitive than minimums to a single lucky run.
+    """
+    slowdowns = []
+    print(f"\n{'scenario':<24} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, timings in results.items():
+        if name not in baseline:
+            print(f"{name:<24} {'-':>12} {timings['median'] * 1000:10.2f}ms {'new':>8}")
+            continue
+        ratio = timings["median"] / baseline[name]["median"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  SLOWER"
+            slowdowns.append(name)
+        print(f"{name:<24} {baseline[name]['median'] * 1000:10.2f}ms {timings['median'] * 1000:10.2f}ms "
+              f"{ratio:8.2f}{flag}")
+    return slowdowns
+
+
+def main(arguments: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Times the aligner and the renderers on generated trees.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES.keys()), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs of each scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--typo", type=float, default=MutationRates.typo)
+    parser.add_argument("--reorder", type=float, default=MutationRates.reorder)
+    parser.add_argument("--insertion", type=float, default=MutationRates.insertion)
+    parser.add_argument("--deletion", type=float, default=MutationRates.deletion)
+    parser.add_argument("--wildcard", type=float, default=MutationRates.wildcard)
+    parser.add_argument("--save", help="Saves the timings as a baseline in this JSON file")
+    parser.add_argument("--compare", help="Compares the timings to the baseline saved in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative slowdown above which a scenario is flagged when comparing")
+    options = parser.parse_args(arguments)
+    rates = MutationRates(options.typo, options.reorder, options.insertion, options.deletion, options.wildcard)
+    results = run(options.scales, options.repeat, options.seed, rates)
+    slowdowns = []
+    if options.compare is not None:
+        with open(options.compare, "r") as f:
+            slowdowns = compare(results, json.load(f)["results"], options.tolerance)
+    if options.save is not None:
+        with open(options.save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "seed": options.seed,
+                       "results": results}, f, indent=2)
+    if slowdowns:
+        print(f"\n{len(slowdowns)} scenario(s) slower than the baseline: {', '.join(slowdowns)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
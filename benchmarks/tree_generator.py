@@ -0,0 +1,164 @@
+import random
+from dataclasses import dataclass, field
+from typing import Optional
+
+from spec_merger.aligner_utils import Content, Position
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.ordered_dictionary import OrderedDictionnary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.content_classes.wildcard import WildCard
+
+WORDS = ["the", "value", "let", "be", "return", "if", "then", "else", "is", "of", "result", "input", "string",
+         "number", "list", "each", "element", "perform", "assert", "step", "set", "to", "and", "not", "a"]
+
+
+@dataclass(frozen=True, slots=True)
+class GeneratedPosition(Position):
+    side: str
+    node_id: int
+
+    def html_str(self) -> str:
+        return f"{self.side}#{self.node_id}"
+
+
+@dataclass
+class TreeShape:
+    """
+    Shape of a generated tree: the top-level dictionary holds `sections` entries, and every container below it has
+    between 1 and `fan_out` children, down to `depth` levels.
+    """
+    sections: int = 50
+    depth: int = 4
+    fan_out: int = 5
+    # Relative weights of the node types of inner nodes, leaves always being strings
+    type_weights: dict[str, float] = field(default_factory=lambda: {
+        "string": 4, "dictionary": 2, "ordered_dictionary": 1, "ordered_seq": 2, "bag": 1})
+    words_per_string: int = 8
+
+
+@dataclass
+class MutationRates:
+    """
+    Probabilities, for each node of a tree, of each mutation applied when deriving the other side of a comparison.
+    """
+    typo: float = 0.02
+    reorder: float = 0.01
+    insertion: float = 0.01
+    deletion: float = 0.01
+    wildcard: float = 0.005
+
+
+class TreeGenerator:
+    """
+    Seeded generator of Content trees and of mutated copies of them, to benchmark the aligner on documents of any size.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.__random = random.Random(seed)
+        self.__next_id = 0
+
+    def __position(self, side: str) -> GeneratedPosition:
+        self.__next_id += 1
+        return GeneratedPosition(side, self.__next_id)
+
+    def __sentence(self, shape: TreeShape) -> str:
+        return " ".join(self.__random.choice(WORDS) for _ in range(self.__random.randint(1, shape.words_per_string)))
+
+    def __key(self, index: int) -> str:
+        return f"{index}. {self.__random.choice(WORDS)} {self.__random.choice(WORDS)}"
+
+    def generate(self, shape: TreeShape, side: str = "left") -> Dictionary:
+        """
+        Generates a tree with the given shape, rooted in a dictionary of sections like ParsedPage.entries.
+        """
+        return Dictionary(self.__position(side), {f"{i}. Section {self.__random.choice(WORDS)}":
+                                                  self.__node(shape, shape.depth, side)
+                                                  for i in range(shape.sections)})
+
+    def __node(self, shape: TreeShape, depth: int, side: str) -> Content:
+        kinds = list(shape.type_weights.keys())
+        kind = "string" if depth <= 1 else self.__random.choices(kinds, [shape.type_weights[k] for k in kinds])[0]
+        if kind == "string":
+            return String(self.__position(side), self.__sentence(shape))
+        children = [self.__node(shape, depth - 1, side) for _ in range(self.__random.randint(1, shape.fan_out))]
+        match kind:
+            case "dictionary":
+                return Dictionary(self.__position(side), {self.__key(i): child for i, child in enumerate(children)})
+            case "ordered_dictionary":
+                keys = [self.__key(i) for i in range(len(children))]
+                return OrderedDictionnary(self.__position(side), dict(zip(keys, children)), keys)
+            case "ordered_seq":
+                return OrderedSeq(self.__position(side), children)
+            case "bag":
+                return Bag(self.__position(side), children)
+        raise ValueError(f"Unknown node type {kind}")
+
+    def mutate(self, tree: Content, rates: MutationRates, shape: TreeShape, side: str = "right") -> Content:
+        """
+        Returns a copy of the tree with new positions, some nodes being mutated according to the given rates. The root
+        itself is never replaced by a wildcard, which would make the alignment trivial.
+        """
+        match tree:
+            case String():
+                value = tree.value
+                if value and self.__random.random() < rates.typo:
+                    index = self.__random.randrange(len(value))
+                    value = value[:index] + self.__random.choice("abcdefghijklmnopqrstuvwxyz") + value[index + 1:]
+                return String(self.__position(side), value)
+            case OrderedDictionnary():
+                keys = self.__mutate_list(list(tree.entries_list), rates, lambda: None)
+                keys = [key for key in keys if key is not None]
+                return OrderedDictionnary(self.__position(side),
+                                          {key: self.__mutate_child(tree.entries[key], rates, shape, side)
+                                           for key in keys},
+                                          keys)
+            case Dictionary():
+                entries = {}
+                for key, value in tree.entries.items():
+                    if self.__random.random() < rates.deletion:
+                        continue
+                    if self.__random.random() < rates.typo:
+                        key = key + self.__random.choice("abcdefghijklmnopqrstuvwxyz")
+                    entries[key] = self.__mutate_child(value, rates, shape, side)
+                if self.__random.random() < rates.insertion:
+                    entries[self.__key(len(entries))] = self.__node(shape, 2, side)
+                return Dictionary(self.__position(side), entries)
+            case OrderedSeq():
+                elements = [self.__mutate_child(element, rates, shape, side) for element in tree.sequence]
+                return OrderedSeq(self.__position(side),
+                                  self.__mutate_list(elements, rates, lambda: self.__node(shape, 2, side)))
+            case Bag():
+                elements = [self.__mutate_child(element, rates, shape, side) for element in tree.bag]
+                return Bag(self.__position(side),
+                           self.__mutate_list(elements, rates, lambda: self.__node(shape, 2, side)))
+            case WildCard():
+                return WildCard(self.__position(side))
+        return tree
+
+    def __mutate_child(self, tree: Content, rates: MutationRates, shape: TreeShape, side: str) -> Content:
+        if self.__random.random() < rates.wildcard:
+            return WildCard(self.__position(side))
+        return self.mutate(tree, rates, shape, side)
+
+    def __mutate_list(self, elements: list, rates: MutationRates, new_element) -> list:
+        elements = [element for element in elements if self.__random.random() >= rates.deletion]
+        if self.__random.random() < rates.insertion:
+            element = new_element()
+            if element is not None:
+                elements.insert(self.__random.randint(0, len(elements)), element)
+        if len(elements) > 1 and self.__random.random() < rates.reorder:
+            i, j = self.__random.sample(range(len(elements)), 2)
+            elements[i], elements[j] = elements[j], elements[i]
+        return elements
+
+
+def generate_pair(shape: TreeShape, rates: MutationRates, seed: int = 0,
+                  generator: Optional[TreeGenerator] = None) -> tuple[Dictionary, Content]:
+    """
+    Generates a tree and a mutated copy of it, to be aligned against each other.
+    """
+    generator = generator or TreeGenerator(seed)
+    left = generator.generate(shape, "left")
+    return left, generator.mutate(left, rates, shape, "right")
@@ -1,18 +1,41 @@
 from .aligner_utils import Content, ReportErrorType
+from .error_warning_count import ErrorWarningCount
+from .alignment_cache import AlignmentCache, SubtreeReferences, function_fingerprint, functions_fingerprint
+from .alignment_profiler import AlignmentObserver
+from .alignment_rules import AlignmentRule, AlignmentRules, RuleState
+from .assignment import solve_assignment
+from .fuzzy_key_index import FuzzyKeyIndex
+from .json_lines import iter_findings
+from .sequence_diff import diff_opcodes
 from .content_classes.alignment_issue import AlignmentIssue
 from .content_classes.bag import Bag
 from .content_classes.dictionary import Dictionary
 from .content_classes.misalignment import Misalignment
+from .content_classes.ok_summary import OKSummary
 from .content_classes.ordered_dictionary import OrderedDictionnary
 from .content_classes.ordered_seq import OrderedSeq
+from .content_classes.skipped_subtree import SkippedSubtree
 from .content_classes.string import String
 from .special_comparator import SpecialComparator
-from typing import Optional, Callable, TypeVar
-from difflib import get_close_matches
+from .tree_utils import children, node_count
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from types import GeneratorType
+from typing import Iterable, Optional, Callable, Generator, TypeVar, Union
+from difflib import SequenceMatcher
+from heapq import nsmallest
 
 T = TypeVar('T', covariant=True)
 U = TypeVar('U', covariant=True)
 
+# The alignment of a pair of nodes with children runs as a generator, which yields (left, right, equal, key) requests
+# for the alignments of its children and is sent back their results, so that the recursion runs on an explicit stack
+# instead of the call stack. equal requests pairs of subtrees known to be equal, and key is the dictionary key of the
+# children, which the alignment rules match, or None for the elements of sequences and bags.
+AlignmentRequest = tuple[Content, Content, bool, Optional[str]]
+AlignmentSteps = Generator[AlignmentRequest, Content, Content]
+
 
 def group_by(to_be_grouped: list[T] | set[T], key_function: Callable[[T], U]) -> tuple[dict[U, list[T]], list[U]]:
     result = {}
@@ -26,13 +49,188 @@ def group_by(to_be_grouped: list[T] | set[T], key_function: Callable[[T], U]) ->
     return result, keys
 
 
+def jaccard_similarity(left: list, right: list) -> float:
+    left_set = set(left)
+    right_set = set(right)
+    if not left_set and not right_set:
+        return 1.0
+    return len(left_set & right_set) / len(left_set | right_set)
+
+
+def similarity(left: Content, right: Content, threshold: float) -> Optional[float]:
+    """
+    Cheaply estimates how similar two nodes of the same type are, without aligning them.
+    :param threshold: Similarities below it may be reported as 0, which allows skipping the exact computation
+    :return: A similarity between 0 and 1, or None if the type of the nodes has no cheap similarity
+    """
+    match left, right:
+        case String(), String():
+            matcher = SequenceMatcher(None, left.real_string(), right.real_string(), autojunk=False)
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                return 0.0
+            return matcher.ratio()
+        case (Dictionary(), Dictionary()) | (OrderedDictionnary(), OrderedDictionnary()):
+            return jaccard_similarity(list(left.entries.keys()), list(right.entries.keys()))
+        case OrderedSeq(), OrderedSeq():
+            return jaccard_similarity([elem.digest() for elem in left.sequence],
+                                      [elem.digest() for elem in right.sequence])
+        case Bag(), Bag():
+            return jaccard_similarity([elem.digest() for elem in left.bag], [elem.digest() for elem in right.bag])
+        case _:
+            return None
+
+
+@dataclass(frozen=True, slots=True)
+class CheckResult:
+    """
+    Result of Aligner.check.
+    count: The errors and warnings found in the aligned sections, which are all of them when complete
+    exceeded: Whether the count is over the budget of the check
+    complete: Whether every section was aligned, in which case count is the one of the whole alignment
+    paths: Paths of the first findings, as in json_lines.iter_findings
+    failing_sections: Keys of the aligned sections with errors or warnings, to be given as hints to the next check.
+    They are only top-level keys, the paths within the sections being in paths.
+    """
+    count: ErrorWarningCount
+    exceeded: bool
+    complete: bool
+    paths: list[list[Union[str, int]]]
+    failing_sections: list[str]
+
+
+# Number of token hashes kept in the signature of a subtree
+SKETCH_SIZE = 32
+
+
+@dataclass(frozen=True, slots=True)
+class Signature:
+    """
+    Bottom-k MinHash sketch of the tokens of a subtree: the number of distinct tokens, and the hashes of the
+    SKETCH_SIZE smallest ones. It is exact for subtrees with at most SKETCH_SIZE distinct tokens.
+    """
+    size: int
+    hashes: frozenset[int]
+
+    def shared_tokens(self, other: "Signature") -> float:
+        """
+        Estimates the number of tokens the two subtrees have in common. The share of the smallest hashes of the union
+        found in both sketches estimates the Jaccard similarity J, and the intersection is J * (|A| + |B|) / (1 + J).
+        """
+        union_smallest = nsmallest(SKETCH_SIZE, self.hashes | other.hashes)
+        shared = sum(1 for token_hash in union_smallest if token_hash in self.hashes and token_hash in other.hashes)
+        # Written without J, so that the exact case is computed without rounding
+        return shared * (self.size + other.size) / (len(union_smallest) + shared) if shared else 0
+
+
+def signature(node: Content, limit: int = 32) -> Signature:
+    """
+    Returns a small signature of a subtree, the sketch of its tokens: the keys of the dictionaries and the normalized
+    strings among its first nodes in breadth first order. Subtrees that have some content in common share part of
+    their sketches, whatever their size, while computing them only costs the limit, and comparing them the size of the
+    sketch. Keys of a large dictionary are all taken, so that the sketch only estimates the tokens they share.
+    """
+    tokens = set()
+    nodes = [node]
+    # The list grows while it is iterated, so the nodes are visited breadth first
+    for current in nodes:
+        match current:
+            case String():
+                tokens.add(current.normalized)
+            case Dictionary() | OrderedDictionnary():
+                tokens.update(current.entries)
+        if len(nodes) < limit:
+            nodes.extend(current.child_nodes())
+        elif len(nodes) > limit:
+            del nodes[limit:]
+    return Signature(len(tokens), frozenset(nsmallest(SKETCH_SIZE, set(map(hash, tokens)))))
+
+
+# Aligner of the current worker process when aligning in parallel
+worker_aligner: Optional["Aligner"] = None
+
+
+def init_worker(alignment_functions: Optional[dict[tuple[type, type], Callable[[Content, Content], Content]]],
+                match_threshold: float, match_limit: int, errors_only: bool, prefilter_threshold: float,
+                rules: list[AlignmentRule]):
+    global worker_aligner
+    worker_aligner = Aligner(alignment_functions, match_threshold, match_limit, errors_only=errors_only,
+                             prefilter_threshold=prefilter_threshold, rules=rules)
+
+
+def align_in_worker(pair: tuple[Content, Content, tuple[str, ...]]) -> Content:
+    return worker_aligner.align(*pair)
+
+
 class Aligner:
-    def __init__(self, alignment_functions: dict[tuple[type, type], Callable[[Content, Content], Content]] = None):
+    def __init__(self, alignment_functions: dict[tuple[type, type], Callable[[Content, Content], Content]] = None,
+                 match_threshold: float = 0.6, match_limit: int = 10_000, jobs: int = 1,
+                 cache_dir: Optional[str] = None, cache_size_limit: int = 1 << 30,
+                 observer: Optional[AlignmentObserver] = None, errors_only: bool = False,
+                 prefilter_threshold: float = 0, rules: Iterable[AlignmentRule] = ()):
+        """
+        :param alignment_functions: Functions to use to align pairs of types, instead of the default ones
+        :param match_threshold: Minimal similarity for two unmatched elements of bags or sequences to be aligned
+        together
+        :param match_limit: Maximal number of pairs of unmatched elements to score in a bag or in a differing block of
+        a sequence, above which all of them are reported as missing
+        :param jobs: Number of processes used to align the entries of the top-level dictionaries. With more than one,
+        the alignment functions must be picklable, unless processes are started with fork.
+        :param cache_dir: Directory where the alignments of the entries of the top-level dictionaries are cached
+        between runs, if any. Entries whose content did not change are then loaded instead of aligned again.
+        :param cache_size_limit: Maximal size of the cache directory in bytes, the least recently used alignments being
+        evicted first
+        :param observer: Observer notified around each recursive alignment, such as an AlignmentProfiler. Alignments
+        done by worker processes are not observed.
+        :param errors_only: Whether the equal subtrees of the result that hold no error or warning are built as a mere
+        OKSummary of their size, which makes the result as small as the differences instead of as the trees. The result
+        is then the one of tree_utils.prune_ok on the full result.
+        :param prefilter_threshold: Minimal share of the signature of the smaller of the entries of a misspelled key
+        found in the other one for them to be tried as a misspelling. Below it, the entries are reported as missing
+        without aligning them, which changes the result, as any alignment of them would have been reported as a
+        misspelled entry. 0, the default, always tries them.
+        :param rules: Rules applied to the subtrees found at some paths of dictionary keys, which skip them, align them
+        with a comparator of their own, or limit the depth to which they are aligned. With more than one job, their
+        comparators must be picklable.
+        """
+        assert 0 <= match_threshold <= 1
+        assert 0 <= prefilter_threshold <= 1
+        assert jobs >= 1
+        self.__alignment_functions = alignment_functions
+        self.__match_threshold = match_threshold
+        self.__match_limit = match_limit
+        self.__errors_only = errors_only
+        self.__prefilter_threshold = prefilter_threshold
+        self.__rules = AlignmentRules(rules) if rules else None
+        self.__jobs = jobs
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__cache: Optional[AlignmentCache] = None
+        if cache_dir is not None:
+            self.__cache = AlignmentCache(cache_dir,
+                                          functions_fingerprint(alignment_functions, match_threshold, match_limit,
+                                                                errors_only, prefilter_threshold,
+                                                                self.__rules_fingerprint()),
+                                          cache_size_limit)
+        self.__aligning_sections = False
+        self.__observer = observer
         self.__report_error_dict = {}
+        self.__equal_alignment_dict = {}
         self.__populate_report_error_dict()
+        self.__populate_equal_alignment_dict()
         if alignment_functions is not None:
             for key in alignment_functions.keys():
                 self.__report_error_dict[key] = alignment_functions[key]
+                # Equal trees of an overridden pair of types must still go through the user function
+                self.__equal_alignment_dict.pop(key, None)
+        # Built-in equal alignments of leaves, which align does without going through __start
+        self.__equal_leaf_dict = {types: function for types, function in self.__equal_alignment_dict.items()
+                                  if types == (String, String)}
+
+    def __rules_fingerprint(self) -> tuple:
+        if self.__rules is None:
+            return ()
+        return tuple((rule.key_patterns(), rule.skip, rule.max_depth, rule.regex,
+                      function_fingerprint(rule.comparator) if rule.comparator is not None else None)
+                     for rule in self.__rules.rules)
 
     def __populate_report_error_dict(self):
         self.__report_error_dict[(Dictionary, Dictionary)] = self.__align_dict
@@ -41,31 +239,371 @@ class Aligner:
         self.__report_error_dict[(Bag, Bag)] = self.__align_set
         self.__report_error_dict[(String, String)] = self.__align_string
 
-    def align(self, left: Content, right: Content) -> Content:
+    def __populate_equal_alignment_dict(self):
+        self.__equal_alignment_dict[(Dictionary, Dictionary)] = self.__align_equal_dict
+        self.__equal_alignment_dict[(OrderedSeq, OrderedSeq)] = self.__align_equal_sequence
+        self.__equal_alignment_dict[(OrderedDictionnary, OrderedDictionnary)] = self.__align_equal_ordered_dict
+        self.__equal_alignment_dict[(Bag, Bag)] = self.__align_equal_set
+        self.__equal_alignment_dict[(String, String)] = self.__align_equal_string
+
+    def align(self, left: Content, right: Content, path: Iterable[str] = ()) -> Content:
         """
         This method is used to align two Content trees by comparing them recursively. This method then returns a tree
         of Content with two more Content types: Misalignment and AlignmentIssue.
         Misalignment is used to represent a point where the two trees could not be unified, whereas AlignmentIssue
         warns about some difference but can still continue to compare deeper.
+        Subtrees with the same digest are known to be equal and are only paired up, without being compared again.
+        The recursion runs on an explicit stack, so trees deeper than the interpreter recursion limit can be aligned,
+        except through user supplied alignment functions, which call align themselves.
+        :param path: Keys of the dictionaries leading to the trees, which the alignment rules are matched against. User
+        supplied functions aligning the children of a node should pass the path of their children.
         """
-        comparison_function = self.__report_error_dict.get((type(left), type(right)))
-        if comparison_function is None:
-            comparison_function = self.__report_error_dict.get((type(left), type(right)))
+        observer = self.__observer
+        equal_leaves = self.__equal_leaf_dict
+        state = self.__rules.state(path) if self.__rules is not None else None
+        if observer is not None:
+            result = self.__start_observed(left, right, False, state)
+        else:
+            result = self.__start(left, right, False, state)
+        if type(result) is not GeneratorType:
+            if observer is not None:
+                observer.exit(left, right)
+            return result
+        # Each frame holds the steps of an alignment, its nodes, whether it is observed, and the state of the rules at
+        # its path
+        stack: list[tuple[AlignmentSteps, Content, Content, bool, Optional[RuleState]]] = [
+            (result, left, right, True, state)]
+        result = None
+        try:
+            while stack:
+                try:
+                    child_left, child_right, equal, key = stack[-1][0].send(result)
+                except StopIteration as stop:
+                    _, frame_left, frame_right, observed, _ = stack.pop()
+                    if observed and observer is not None:
+                        observer.exit(frame_left, frame_right)
+                    result = stop.value
+                    continue
+                state = stack[-1][4]
+                if state is not None and key is not None:
+                    state = state.step(key)
+                if equal and state is None:
+                    # Equal leaves, which make up most of the trees, are built right away instead of dispatched
+                    leaf_function = equal_leaves.get((type(child_left), type(child_right)))
+                    if leaf_function is not None:
+                        result = leaf_function(child_left, child_right)
+                        continue
+                if not equal and observer is not None:
+                    result = self.__start_observed(child_left, child_right, equal, state)
+                else:
+                    result = self.__start(child_left, child_right, equal, state)
+                if type(result) is GeneratorType:
+                    stack.append((result, child_left, child_right, not equal, state))
+                    result = None
+                elif not equal and observer is not None:
+                    observer.exit(child_left, child_right)
+        finally:
+            # Only left on an exception: the pending alignments are closed, which runs their cleanups
+            while stack:
+                steps, frame_left, frame_right, observed, _ = stack.pop()
+                steps.close()
+                if observed and observer is not None:
+                    observer.exit(frame_left, frame_right)
+        return result
+
+    def __start_observed(self, left: Content, right: Content, equal: bool,
+                         state: Optional[RuleState]) -> Union[AlignmentSteps, Content]:
+        # Enters the observer before starting the alignment, and exits it if starting raised, as the alignment is then
+        # never pushed on the stack whose frames are exited by align
+        self.__observer.enter(left, right)
+        try:
+            return self.__start(left, right, equal, state)
+        except BaseException:
+            self.__observer.exit(left, right)
+            raise
+
+    def __start(self, left: Content, right: Content, equal: bool,
+                state: Optional[RuleState]) -> Union[AlignmentSteps, Content]:
+        # Returns the steps of the alignment of two nodes, or directly its result for the alignment functions that do
+        # not align children through the stack: the ones of leaves, the user supplied ones, the comparators of the
+        # rules and the special comparator
+        if state is not None:
+            if state.skip:
+                if self.__observer is not None:
+                    self.__observer.count("skipped_subtree")
+                return SkippedSubtree((left.position, right.position))
+            if state.comparator is not None:
+                return state.comparator(left, right)
+        types = (type(left), type(right))
+        comparison_function = None
+        if equal or left.digest() == right.digest():
+            if self.__errors_only:
+                summary = self.__summarize_equal(left, right)
+                if summary is not None:
+                    return summary
+            # Equal trees are built without any comparison. Wildcards and types with a user supplied function are
+            # still dispatched as usual.
+            comparison_function = self.__equal_alignment_dict.get(types)
+        elif ((self.__jobs > 1 or self.__cache is not None) and not self.__aligning_sections and
+                self.__report_error_dict.get(types) == self.__align_dict and
+                # Where no rule can match any more, no path given to the workers would lead them to the same rules
+                (state is not None or self.__rules is None)):
+            return self.__align_sections(left, right, state)
         if comparison_function is None:
-            return SpecialComparator.compare_special(left, right, self)
+            comparison_function = self.__report_error_dict.get(types)
+            if comparison_function is None:
+                return SpecialComparator.compare_special(left, right, self)
         return comparison_function(left, right)
 
+    def __equal_node_count(self, node: Content) -> Optional[int]:
+        # Aligning equal trees gives no error or warning, as long as they hold none already, no wildcard, and every
+        # node of them has a built-in equal alignment. Returns their number of nodes in that case.
+        if node.count_errors() != ErrorWarningCount(0, 0):
+            return None
+        count = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if (type(current), type(current)) not in self.__equal_alignment_dict:
+                return None
+            count += 1
+            stack.extend(current.child_nodes())
+        return count
+
+    def __summarize_equal(self, left: Content, right: Content) -> Optional[Content]:
+        # Leaves are cheaper built than summarized
+        if not left.child_nodes():
+            return None
+        count = self.__equal_node_count(left)
+        if count is None:
+            return None
+        return OKSummary((left.position, right.position), count)
+
+    def check(self, left: Content, right: Content, max_errors: int = 0, max_warnings: Optional[int] = None,
+              hints: Iterable[str] = (), max_paths: int = 10) -> CheckResult:
+        """
+        Checks whether aligning two trees gives more errors or warnings than a budget, stopping as soon as it is
+        exceeded instead of building the whole alignment. The entries of top-level dictionaries are aligned one at a
+        time as independent sections: the ones named in hints first, such as the failing sections of a previous check,
+        then the smallest ones. Sections with equal content are not aligned at all, unless a rule may match within them,
+        and the entries found on one side only are aligned together as one more section. Other trees are aligned at
+        once.
+        :param max_errors: Maximal number of errors within the budget
+        :param max_warnings: Maximal number of warnings within the budget, if warnings count
+        :param hints: Keys of the sections to align first, in that order
+        :param max_paths: Maximal number of finding paths reported
+        """
+        def is_exceeded(count: ErrorWarningCount) -> bool:
+            return count.error_count > max_errors or (max_warnings is not None and count.warning_count > max_warnings)
+
+        if not self.has_sections(left, right):
+            result = self.align(left, right)
+            paths = [finding["path"] for _, finding in zip(range(max_paths), iter_findings(result))]
+            failing = [key for key, child in children(result) if key is not None and
+                       child.count_errors() != ErrorWarningCount(0, 0)]
+            return CheckResult(result.count_errors(), is_exceeded(result.count_errors()), True, paths, failing)
+        hint_ranks = {key: rank for rank, key in enumerate(hints)}
+        root = self.__rules.root if self.__rules is not None else None
+        # Each section is its key, or None for the entries found on one side only, and its pair of subtrees
+        sections: list[tuple[tuple[int, int], Optional[str], Content, Content]] = []
+        for key, right_entry in right.entries.items():
+            left_entry = left.entries.get(key)
+            if left_entry is None:
+                continue
+            # Rules may skip, compare or cut equal sections in their own way, so only sections out of their reach are
+            # known to be fine from their digests
+            if ((root is None or root.step(key) is None) and left_entry.digest() == right_entry.digest() and
+                    self.__equal_node_count(left_entry) is not None):
+                continue
+            sections.append(((hint_ranks.get(key, len(hint_ranks)), node_count(left_entry) + node_count(right_entry)),
+                             key, left_entry, right_entry))
+        remaining_left = {key: entry for key, entry in left.entries.items() if key not in right.entries}
+        remaining_right = {key: entry for key, entry in right.entries.items() if key not in left.entries}
+        if remaining_left or remaining_right:
+            remaining = (Dictionary(left.position, remaining_left), Dictionary(right.position, remaining_right))
+            rank = min((hint_ranks[key] for key in remaining_left.keys() | remaining_right.keys()
+                        if key in hint_ranks), default=len(hint_ranks))
+            sections.append(((rank, node_count(remaining[0]) + node_count(remaining[1])), None, *remaining))
+        sections.sort(key=lambda section: section[0])
+        count = ErrorWarningCount(0, 0)
+        paths = []
+        failing = []
+        for index, (_, key, left_entry, right_entry) in enumerate(sections):
+            result = self.align_section(left_entry, right_entry, key)
+            if result.count_errors() == ErrorWarningCount(0, 0):
+                continue
+            count += result.count_errors()
+            prefix = [key] if key is not None else []
+            for _, finding in zip(range(max_paths - len(paths)), iter_findings(result)):
+                paths.append(prefix + finding["path"])
+            if key is not None:
+                failing.append(key)
+            else:
+                failing += [child_key for child_key, child in children(result)
+                            if child.count_errors() != ErrorWarningCount(0, 0)]
+            if is_exceeded(count):
+                return CheckResult(count, True, index == len(sections) - 1, paths, failing)
+        return CheckResult(count, False, True, paths, failing)
+
+    def has_sections(self, left: Content, right: Content) -> bool:
+        """
+        Tells whether two trees are top-level dictionaries whose entries are aligned as independent sections, so that
+        they can be aligned one at a time with align_section.
+        """
+        root = self.__rules.root if self.__rules is not None else None
+        return (isinstance(left, Dictionary) and isinstance(right, Dictionary) and
+                self.__report_error_dict.get((Dictionary, Dictionary)) == self.__align_dict and
+                (root is None or not (root.skip or root.comparator is not None)))
+
+    def align_section(self, left: Content, right: Content, key: Optional[str]) -> Content:
+        """
+        Aligns a single pair of entries of the top-level dictionaries, as align does when aligning the dictionaries,
+        so that sections can be aligned one at a time. They are then never sent to the worker processes, but the
+        cache is still used.
+        :param key: The key of the entries, or None for dictionaries of the entries found on one side only, which are
+        aligned like top-level dictionaries
+        """
+        references = SubtreeReferences(left, right) if self.__cache is not None else None
+        path = (key,) if key is not None else ()
+        scope = self.__scope(self.__rules.root, key) if self.__rules is not None and key is not None else ()
+        if references is not None:
+            result = self.__cache.load(references, scope)
+            if result is not None:
+                return result
+        self.__aligning_sections = True
+        try:
+            result = self.align(left, right, path)
+        finally:
+            self.__aligning_sections = False
+        if references is not None:
+            self.__cache.store(references, result, scope)
+        return result
+
+    def __align_sections(self, left: Dictionary, right: Dictionary, state: Optional[RuleState]) -> AlignmentSteps:
+        # The entries of the top-level dictionaries are independent sections: they are looked up in the cache, and
+        # the ones that are not found are aligned by a pool of worker processes, each with its own copy of this
+        # aligner. Anything deeper is aligned as usual.
+        self.__aligning_sections = True
+        try:
+            if self.__jobs == 1:
+                return (yield from self.__align_dict(left, right, sections=True, state=state))
+            with ProcessPoolExecutor(self.__jobs, initializer=init_worker,
+                                     initargs=(self.__alignment_functions, self.__match_threshold,
+                                               self.__match_limit, self.__errors_only,
+                                               self.__prefilter_threshold,
+                                               self.__rules.rules if self.__rules is not None else [])) as pool:
+                self.__pool = pool
+                return (yield from self.__align_dict(left, right, sections=True, state=state))
+        finally:
+            self.__aligning_sections = False
+            self.__pool = None
+
+    def __align_common_entries(self, entries: list[tuple[str, Content, Content]], sections: bool,
+                               state: Optional[RuleState]) -> Generator[AlignmentRequest, Content, list[Content]]:
+        if not sections:
+            results = []
+            for key, left, right in entries:
+                results.append((yield left, right, False, key))
+            return results
+        # Equal entries are cheap to pair up, only the differing ones are worth looking up or sending to the workers
+        results: list[Optional[Content]] = [None] * len(entries)
+        differing = []
+        references: dict[int, SubtreeReferences] = {}
+        for index, (key, left, right) in enumerate(entries):
+            if left.digest() == right.digest():
+                results[index] = yield left, right, True, key
+                continue
+            if self.__cache is not None:
+                references[index] = SubtreeReferences(left, right)
+                results[index] = self.__cache.load(references[index], self.__scope(state, key))
+            if results[index] is None:
+                differing.append(index)
+        if self.__pool is not None and len(differing) > 1:
+            chunksize = max(1, len(differing) // (4 * self.__jobs))
+            # Workers find the rules of a section from a path leading to the same state as its own
+            aligned = self.__pool.map(align_in_worker, [(entries[index][1], entries[index][2],
+                                                         state.path + (entries[index][0],) if state is not None else ())
+                                                        for index in differing], chunksize=chunksize)
+        else:
+            aligned = None
+        for index in differing:
+            key, left, right = entries[index]
+            if aligned is not None:
+                results[index] = next(aligned)
+            else:
+                results[index] = yield left, right, False, key
+            if self.__cache is not None:
+                self.__cache.store(references[index], results[index], self.__scope(state, key))
+        return results
+
+    @staticmethod
+    def __scope(state: Optional[RuleState], key: str) -> tuple:
+        # The result of a section also depends on the rules matching it, which only depend on its state
+        if state is None:
+            return ()
+        child_state = state.step(key)
+        return child_state.numbers if child_state is not None else (None,)
+
+    @staticmethod
+    def __align_equal_dict(left: Dictionary, right: Dictionary) -> AlignmentSteps:
+        entries = {}
+        for key, value in right.entries.items():
+            entries[key] = yield left.entries[key], value, True, key
+        return Dictionary((left.position, right.position), entries)
+
+    @staticmethod
+    def __align_equal_ordered_dict(left: OrderedDictionnary, right: OrderedDictionnary) -> AlignmentSteps:
+        entries = {}
+        for key in left.entries_list:
+            entries[key] = yield left.entries[key], right.entries[key], True, key
+        return OrderedDictionnary((left.position, right.position), entries, list(left.entries_list))
+
+    @staticmethod
+    def __align_equal_sequence(left: OrderedSeq, right: OrderedSeq) -> AlignmentSteps:
+        sequence = []
+        for left_elem, right_elem in zip(left.sequence, right.sequence):
+            sequence.append((yield left_elem, right_elem, True, None))
+        return OrderedSeq((left.position, right.position), sequence)
+
+    @staticmethod
+    def __align_equal_set(left: Bag, right: Bag) -> AlignmentSteps:
+        pairs, _, _ = Aligner.__pair_equal_elements(left.bag, right.bag)
+        bag = []
+        for elem_left, elem_right in pairs:
+            bag.append((yield elem_left, elem_right, True, None))
+        return Bag((left.position, right.position), bag)
+
+    @staticmethod
+    def __align_equal_string(left: String, right: String) -> Content:
+        return left.moved((left.position, right.position))
+
     @staticmethod
     def find_closest_key(keys: set[str], key: str, allowed_errors: float = 0.88) -> Optional[str]:
         assert 0 <= allowed_errors < 1
         if key == "":
             return None
-        matches = get_close_matches(key,keys,cutoff=allowed_errors,n=1)
-        if matches:
-            return matches[0]
-        return None
+        return FuzzyKeyIndex(keys, allowed_errors).closest_key(key)
+
+    def __plausible(self, left: Content, right: Content) -> bool:
+        # Tells from their signatures whether two subtrees may be similar enough to be worth aligning. Only containers
+        # of the same built-in type are filtered, the other pairs being cheap to align or aligned by user functions.
+        types = (type(left), type(right))
+        if (self.__prefilter_threshold == 0 or types[0] is not types[1] or
+                types[0] not in (Dictionary, OrderedDictionnary, OrderedSeq, Bag) or
+                types in (self.__alignment_functions or {})):
+            return True
+        left_signature = signature(left)
+        right_signature = signature(right)
+        # Subtrees without keys or strings tell nothing about the other one
+        smaller_size = min(left_signature.size, right_signature.size)
+        if (smaller_size == 0 or
+                left_signature.shared_tokens(right_signature) >= self.__prefilter_threshold * smaller_size):
+            return True
+        if self.__observer is not None:
+            self.__observer.count("prefilter_rejection")
+        return False
 
-    def __align_ordered_dict(self, left: Content, right: Content) -> Content:
+    def __align_ordered_dict(self, left: Content, right: Content) -> AlignmentSteps:
         assert isinstance(left, OrderedDictionnary) and isinstance(right, OrderedDictionnary)
         left: OrderedDictionnary
         right: OrderedDictionnary
@@ -75,12 +613,13 @@ class Aligner:
             key_left = left.entries_list[i] if i < len(left.entries_list) else None
             key_right = right.entries_list[i] if i < len(right.entries_list) else None
             if key_left == key_right:
-                current_dic[key_left] = self.align(left.entries[key_left], right.entries[key_right])
+                current_dic[key_left] = yield left.entries[key_left], right.entries[key_right], False, key_left
                 ordered_keys.append(key_left)
             else:
                 if key_left is not None and key_left in right.entries.keys() and key_left not in ordered_keys:
-                    current_dic[key_left] = AlignmentIssue((None, None), self.align(left.entries[key_left],
-                                                                                    right.entries[key_left]),
+                    current_dic[key_left] = AlignmentIssue((None, None), (yield left.entries[key_left],
+                                                                                    right.entries[key_left], False,
+                                                                                    key_left),
                                                            ReportErrorType.REORDERED_ENTRIES)
                     ordered_keys.append(key_left)
                 elif key_left is not None and key_left not in ordered_keys:
@@ -88,8 +627,9 @@ class Aligner:
                                                          ReportErrorType.MISSING_ENTRIES)
                     ordered_keys.append(key_left)
                 if key_right is not None and key_right in left.entries.keys() and key_right not in ordered_keys:
-                    current_dic[key_right] = AlignmentIssue((None, None), self.align(left.entries[key_right],
-                                                                                     right.entries[key_right]),
+                    current_dic[key_right] = AlignmentIssue((None, None), (yield left.entries[key_right],
+                                                                                     right.entries[key_right], False,
+                                                                                     key_right),
                                                             ReportErrorType.REORDERED_ENTRIES)
                     ordered_keys.append(key_right)
                 elif key_right is not None and key_right not in ordered_keys:
@@ -98,164 +638,195 @@ class Aligner:
                     ordered_keys.append(key_right)
         return OrderedDictionnary((left.position, right.position), current_dic, ordered_keys)
 
-    def __align_dict(self, left: Content, right: Content) -> Content:
+    def __align_dict(self, left: Content, right: Content, sections: bool = False,
+                     state: Optional[RuleState] = None) -> AlignmentSteps:
         assert isinstance(left, Dictionary) and isinstance(right, Dictionary)
         current_dic = {}
         left: Dictionary
         right: Dictionary
-        keys_left = list(left.entries.keys())
-        keys_right = list(right.entries.keys())
-        common_keys = list(filter(lambda x: x in keys_left, keys_right))
-        for key in common_keys:
-            current_dic[key] = self.align(left.entries[key], right.entries[key])
-        remaining_left = list(filter(lambda x: x not in common_keys, keys_left))
-        remaining_right = list(filter(lambda x: x not in common_keys, keys_right))
-        remaining_keys = remaining_left + list(filter(lambda x: x not in remaining_left, remaining_right))
+        common_keys = [key for key in right.entries.keys() if key in left.entries]
+        aligned_entries = yield from self.__align_common_entries([(key, left.entries[key], right.entries[key])
+                                                                  for key in common_keys], sections, state)
+        for key, aligned_entry in zip(common_keys, aligned_entries):
+            current_dic[key] = aligned_entry
+        remaining_left = [key for key in left.entries.keys() if key not in right.entries]
+        remaining_right = [key for key in right.entries.keys() if key not in left.entries]
+        # Misspelled keys of the left dictionary are looked up among the remaining keys of the right one,
+        # through an index built once for the whole dictionary
+        right_index = FuzzyKeyIndex(remaining_right)
         used = set()
-        for key in remaining_keys:
-            if key in used:
-                continue
-            used.add(key)
-            if key in remaining_left:
-                keys = filter(lambda x: x not in used and x not in remaining_left, remaining_right)
-                match Aligner.find_closest_key(keys, key):
-                    case None:
-                        current_dic[key] = Misalignment((None, None), left.entries[key], None,
-                                                        ReportErrorType.MISSING_ENTRIES)
-                    case closest_key:
-                        alignment_try = self.align(left.entries[key], right.entries[closest_key])
-                        match alignment_try:
-                            case Misalignment(_, _, _):
-                                current_dic[key] = Misalignment((None, None),
-                                                                left.entries[key], None,
-                                                                ReportErrorType.MISSING_ENTRIES)
-                            case _:
-                                used.add(closest_key)
-                                current_dic[key] = AlignmentIssue((None, None), alignment_try,
-                                                                  ReportErrorType.MISSPELLED_ENTRY)
-
-            elif key in remaining_right:
-                keys = filter(lambda x: x not in used and x not in remaining_right, remaining_left)
-                match Aligner.find_closest_key(keys, key):
-                    case None:
-                        current_dic[key] = Misalignment((None, None), None, right.entries[key],
-                                                        ReportErrorType.MISSING_ENTRIES)
-                    case closest_key:
-                        alignment_try = self.align(left.entries[closest_key], right.entries[key])
-                        match alignment_try:
-                            case Misalignment(_, _, _):
-                                current_dic[key] = Misalignment((None, None), None, right.entries[key],
-                                                                ReportErrorType.MISSING_ENTRIES)
-                            case _:
-                                used.add(closest_key)
-                                current_dic[key] = AlignmentIssue((None, None), alignment_try,
-                                                                  ReportErrorType.MISSPELLED_ENTRY)
+        for key in remaining_left:
+            if self.__observer is not None:
+                self.__observer.count("fuzzy_key_lookup")
+            match right_index.closest_key(key) if key != "" else None:
+                case None:
+                    current_dic[key] = Misalignment((None, None), left.entries[key], None,
+                                                    ReportErrorType.MISSING_ENTRIES)
+                case closest_key if not self.__plausible(left.entries[key], right.entries[closest_key]):
+                    current_dic[key] = Misalignment((None, None), left.entries[key], None,
+                                                    ReportErrorType.MISSING_ENTRIES)
+                case closest_key:
+                    alignment_try = yield left.entries[key], right.entries[closest_key], False, key
+                    match alignment_try:
+                        case Misalignment(_, _, _):
+                            current_dic[key] = Misalignment((None, None),
+                                                            left.entries[key], None,
+                                                            ReportErrorType.MISSING_ENTRIES)
+                        case _:
+                            used.add(closest_key)
+                            right_index.remove(closest_key)
+                            current_dic[key] = AlignmentIssue((None, None), alignment_try,
+                                                              ReportErrorType.MISSPELLED_ENTRY)
+        for key in remaining_right:
+            if key not in used:
+                current_dic[key] = Misalignment((None, None), None, right.entries[key],
+                                                ReportErrorType.MISSING_ENTRIES)
         return Dictionary((left.position, right.position), current_dic)
 
-    def __align_sequence(self, left: Content, right: Content) -> Content:
+    def __align_sequence(self, left: Content, right: Content) -> AlignmentSteps:
         left: OrderedSeq
         right: OrderedSeq
-        if len(left.sequence) == len(right.sequence):
-            return OrderedSeq((None, None), list(self.align(left_elem, right_elem)
-                                                 for left_elem, right_elem in zip(left.sequence, right.sequence)))
-        # How to align elements if some are missing
-        # Basically, we assume that there is no reordering, only missing elements
-        # This is because there is already a special comparator for unordered sequences
-        # We will try to align the smallest sequence with the biggest one
-        # Go through every element of the smallest sequence and assume that it is a subset of the bigger list
-        smallest = left if len(left.sequence) < len(right.sequence) else right
-        biggest = left if smallest is right else right
-        i = 0
-        unmatched_from_small = []
+        # Elements are matched through a diff of their digests, which finds insertions and deletions on both sides.
+        # Matched elements are equal, so only the elements of the differing blocks are aligned recursively.
         result = []
-        for smallest_index, element in enumerate(smallest.sequence):
-            supposed_to_match = biggest.sequence[i]
-            alignment_result = self.align(element, supposed_to_match) if smallest is left else (
-                self.align(supposed_to_match, element))
-            i += 1
-            while isinstance(alignment_result, Misalignment) and i < len(biggest.sequence):
-                if smallest is left:
-                    result.append(Misalignment((None, None), None, biggest.sequence[i - 1],
-                                               ReportErrorType.NOT_SAME_ELEM_IN_SEQ))
-                else:
-                    result.append(Misalignment((None, None), biggest.sequence[i - 1], None,
-                                               ReportErrorType.NOT_SAME_ELEM_IN_SEQ))
-                supposed_to_match = biggest.sequence[i]
-                alignment_result = self.align(element, supposed_to_match) if smallest is left else (
-                    self.align(supposed_to_match, element))
-                i += 1
-            if isinstance(alignment_result, Misalignment):
-                if smallest is left:
-                    result.append(Misalignment((None, None), None, biggest.sequence[i - 1],
-                                               ReportErrorType.NOT_SAME_ELEM_IN_SEQ))
+        for tag, i1, i2, j1, j2 in diff_opcodes([elem.digest() for elem in left.sequence],
+                                                [elem.digest() for elem in right.sequence]):
+            if tag == "equal":
+                for left_elem, right_elem in zip(left.sequence[i1:i2], right.sequence[j1:j2]):
+                    result.append((yield left_elem, right_elem, True, None))
+            else:
+                result += yield from self.__align_replaced_in_sequence(left.sequence[i1:i2], right.sequence[j1:j2])
+        return OrderedSeq((left.position, right.position), result)
+
+    def __align_replaced_in_sequence(self, left_elems: list[Content], right_elems: list[Content]) \
+            -> Generator[AlignmentRequest, Content, list[Content]]:
+        if len(left_elems) == len(right_elems):
+            # Substituted elements, aligned one to one
+            result = []
+            for left_elem, right_elem in zip(left_elems, right_elems):
+                result.append((yield left_elem, right_elem, False, None))
+            return result
+        # Otherwise the elements are paired without crossing, maximizing the total similarity of the pairs
+        if self.__observer is not None:
+            self.__observer.count("sequence_fallback")
+        pairs = []
+        if 0 < len(left_elems) * len(right_elems) <= self.__match_limit:
+            best = [[0.0] * (len(right_elems) + 1) for _ in range(len(left_elems) + 1)]
+            scores = [[similarity(left_elem, right_elem, self.__match_threshold) for right_elem in right_elems]
+                      for left_elem in left_elems]
+            for i in range(1, len(left_elems) + 1):
+                for j in range(1, len(right_elems) + 1):
+                    best[i][j] = max(best[i - 1][j], best[i][j - 1])
+                    score = scores[i - 1][j - 1]
+                    if score is not None and score >= self.__match_threshold:
+                        best[i][j] = max(best[i][j], best[i - 1][j - 1] + score)
+            i, j = len(left_elems), len(right_elems)
+            while i > 0 and j > 0:
+                if best[i][j] == best[i - 1][j]:
+                    i -= 1
+                elif best[i][j] == best[i][j - 1]:
+                    j -= 1
                 else:
-                    result.append(Misalignment((None, None), biggest.sequence[i - 1], None,
-                                               ReportErrorType.NOT_SAME_ELEM_IN_SEQ))
-                unmatched_from_small = [smallest.sequence[x] for x in range(smallest_index, len(smallest.sequence))]
-                break
-            result.append(alignment_result)
-        if smallest is left:
-            return OrderedSeq((left.position, right.position), result +
-                              [Misalignment((None, None), x, None, ReportErrorType.NOT_SAME_ELEM_IN_SEQ)
-                               for x in unmatched_from_small])
-        else:
-            return OrderedSeq((left.position, right.position), result +
-                              [Misalignment((None, None), None, x, ReportErrorType.NOT_SAME_ELEM_IN_SEQ)
-                               for x in unmatched_from_small])
+                    pairs.append((i - 1, j - 1))
+                    i -= 1
+                    j -= 1
+            pairs.reverse()
+        result = []
+        i = j = 0
+        for pair_i, pair_j in pairs + [(len(left_elems), len(right_elems))]:
+            result += [Misalignment((None, None), left_elem, None, ReportErrorType.NOT_SAME_ELEM_IN_SEQ)
+                       for left_elem in left_elems[i:pair_i]]
+            result += [Misalignment((None, None), None, right_elem, ReportErrorType.NOT_SAME_ELEM_IN_SEQ)
+                       for right_elem in right_elems[j:pair_j]]
+            if pair_i < len(left_elems):
+                result.append((yield left_elems[pair_i], right_elems[pair_j], False, None))
+            i, j = pair_i + 1, pair_j + 1
+        return result
 
-    def __align_set(self, left: Content, right: Content) -> Content:
+    @staticmethod
+    def __pair_equal_elements(elems_left: list[Content], elems_right: list[Content]) \
+            -> tuple[list[tuple[Content, Content]], list[Content], list[Content]]:
+        # Elements are matched as a multiset: right elements are bucketed by digest, and each left element takes the
+        # first unused right element of its bucket, so duplicates are only matched as many times as they appear.
+        buckets: dict[bytes, deque[int]] = {}
+        for index, elem_right in enumerate(elems_right):
+            buckets.setdefault(elem_right.digest(), deque()).append(index)
+        pairs = []
+        unmatched_left = []
+        matched_right = [False] * len(elems_right)
+        for elem_left in elems_left:
+            bucket = buckets.get(elem_left.digest())
+            if bucket:
+                index = bucket.popleft()
+                matched_right[index] = True
+                pairs.append((elem_left, elems_right[index]))
+            else:
+                unmatched_left.append(elem_left)
+        unmatched_right = [elem for elem, matched in zip(elems_right, matched_right) if not matched]
+        return pairs, unmatched_left, unmatched_right
+
+    def __align_set(self, left: Content, right: Content) -> AlignmentSteps:
         left: Bag
         right: Bag
-        # List is used to keep order but elements are still treated as if it were a set
+        # List is used to keep order but elements are still treated as if it were a multiset
+        pairs, unmatched_left, unmatched_right = Aligner.__pair_equal_elements(left.bag, right.bag)
         constructing_set: list[Content] = []
-        elems_left = left.bag
-        elems_right = right.bag
-
-        common_elems: list[Content] = []
-        for elem_left in elems_left:
-            for elem_right in elems_right:
-                if elem_left == elem_right:
-                    common_elems.append(self.align(elem_left, elem_right))
-                    break
-        constructing_set += common_elems
-        missing_left = list(filter(lambda x: x not in common_elems, elems_right))
-        missing_left_grouped_by_type, type_keys_left = group_by(missing_left, type)
-        missing_right = list(filter(lambda x: x not in common_elems, elems_left))
-        missing_right_grouped_by_type, type_keys_right = group_by(missing_right, type)
+        for elem_left, elem_right in pairs:
+            constructing_set.append((yield elem_left, elem_right, True, None))
+        unmatched_left_grouped_by_type, type_keys = group_by(unmatched_left, type)
+        unmatched_right_grouped_by_type, type_keys_right = group_by(unmatched_right, type)
         for type_key in type_keys_right:
-            if type_key not in type_keys_left:
-                type_keys_left.append(type_key)
-        for elem in type_keys_left:
-            left_elems = missing_left_grouped_by_type.get(elem, [])
-            right_elems = missing_right_grouped_by_type.get(elem, [])
-            if len(left_elems) == 0:
-                constructing_set += [
-                    Misalignment((None, None), None, elem, ReportErrorType.MISSING_IN_BAG) for elem in
-                    right_elems]
-            elif len(right_elems) == 0:
-                constructing_set += [
-                    Misalignment((None, None), elem, None, ReportErrorType.MISSING_IN_BAG) for elem in
-                    left_elems]
-            elif len(left_elems) == len(right_elems) == 1:
-                subtree = self.align(left_elems[0], right_elems[0])
-                match subtree:
-                    case Misalignment(_, _, _):
-                        constructing_set.append(Misalignment((None, None), left_elems[0], None,
-                                                             ReportErrorType.MISSING_IN_BAG))
-                        constructing_set.append(
-                            Misalignment((None, None), None, right_elems[0],
-                                         ReportErrorType.MISSING_IN_BAG))
-                    case _:
-                        constructing_set.append(AlignmentIssue(subtree, ReportErrorType.MISSPELLED_ENTRY))
-            else:
-                constructing_set += [
-                    Misalignment((None, None), left_elem, None, ReportErrorType.MISSING_IN_BAG)
-                    for left_elem in left_elems]
-                constructing_set += [
-                    Misalignment((None, None), None, right_elem, ReportErrorType.MISSING_IN_BAG)
-                    for right_elem in right_elems]
+            if type_key not in unmatched_left_grouped_by_type:
+                type_keys.append(type_key)
+        for type_key in type_keys:
+            left_elems = unmatched_left_grouped_by_type.get(type_key, [])
+            right_elems = unmatched_right_grouped_by_type.get(type_key, [])
+            constructing_set += yield from self.__align_unmatched_in_bag(left_elems, right_elems)
         return Bag((left.position, right.position), constructing_set)
 
+    def __align_unmatched_in_bag(self, left_elems: list[Content], right_elems: list[Content]) \
+            -> Generator[AlignmentRequest, Content, list[Content]]:
+        # Elements of the same type that have no equal counterpart are paired by solving an assignment problem on
+        # their similarities, and only the pairs similar enough are aligned recursively. A lone pair has no other
+        # choice, so it is always aligned, however dissimilar.
+        aligned: list[Content] = []
+        left_missing = [True] * len(left_elems)
+        right_missing = [True] * len(right_elems)
+        if self.__observer is not None:
+            self.__observer.count("bag_fallback" if 0 < len(left_elems) * len(right_elems) <= self.__match_limit
+                                  else "bag_fallback_over_limit")
+        if len(left_elems) == len(right_elems) == 1:
+            candidates = [(0, 0)]
+        elif 0 < len(left_elems) * len(right_elems) <= self.__match_limit:
+            similarities = [[similarity(left_elem, right_elem, self.__match_threshold)
+                             for right_elem in right_elems] for left_elem in left_elems]
+            if similarities[0][0] is None:
+                # No cheap similarity for this type, no pair can be chosen
+                candidates = []
+            else:
+                costs = [[1 - score if score >= self.__match_threshold else 1 for score in row]
+                         for row in similarities]
+                candidates = [(i, j) for i, j in solve_assignment(costs)
+                              if similarities[i][j] >= self.__match_threshold]
+        else:
+            candidates = []
+        for i, j in candidates:
+            subtree = yield left_elems[i], right_elems[j], False, None
+            match subtree:
+                case Misalignment(error=error) if error != ReportErrorType.NOT_SAME_STRING:
+                    continue
+                case Misalignment(_, _, _):
+                    aligned.append(subtree)
+                case _:
+                    aligned.append(AlignmentIssue((None, None), subtree, ReportErrorType.MISSPELLED_ENTRY))
+            left_missing[i] = False
+            right_missing[j] = False
+        aligned += [Misalignment((None, None), left_elem, None, ReportErrorType.MISSING_IN_BAG)
+                    for left_elem, missing in zip(left_elems, left_missing) if missing]
+        aligned += [Misalignment((None, None), None, right_elem, ReportErrorType.MISSING_IN_BAG)
+                    for right_elem, missing in zip(right_elems, right_missing) if missing]
+        return aligned
+
     def __align_string(self, left: Content, right: Content) -> Content:
         left: String
         right: String
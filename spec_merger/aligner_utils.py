@@ -1,13 +1,15 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 
-from dataclasses import dataclass
-from typing import Optional, Union
+from dataclasses import dataclass, fields
+from hashlib import blake2b
+from operator import methodcaller
+from typing import Callable, Iterable, Iterator, Optional, Union
 
 from .error_warning_count import ErrorWarningCount
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Position(ABC):
     """
     Simple class that represents the position in a document.
@@ -42,13 +44,63 @@ class ReportErrorType(Enum):
         return self == ReportErrorType.MATCHED_WILDCARDS
 
 
+def make_digest(tag: bytes, *parts: bytes) -> bytes:
+    """
+    Combines a node tag and the digests (or raw bytes) of its parts into a fixed-size digest.
+    """
+    hasher = blake2b(tag, digest_size=16)
+    for part in parts:
+        hasher.update(part)
+    return hasher.digest()
+
+
+def string_digest(value: str) -> bytes:
+    """
+    Returns the digest of a plain string, e.g. a dictionary key.
+    """
+    return make_digest(b"K", value.encode("utf-8", "surrogatepass"))
+
+
+def holds_content(value) -> bool:
+    """
+    Tells whether a field value of a node is a node or a collection of nodes, such as its children.
+    """
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple)):
+        return isinstance(value, Content)
+    return any(isinstance(element, Content) for element in value)
+
+
 @dataclass(frozen=True)
 class Content(ABC):
     """
     Abstract class representing the node of a tree in a parsed page.
+    Subclasses are expected to be slotted frozen dataclasses, the slots below holding the values cached on the node.
     """
+    __slots__ = ("position", "_error_count", "_digest")
     position: Union[Optional[Position], tuple[Optional[Position], Optional[Position]]]
 
+    def child_nodes(self) -> Iterable["Content"]:
+        """
+        Returns the direct children of the node. Nodes with children should override it, so that the values cached on
+        deep trees are computed from the bottom up instead of recursively.
+        """
+        return ()
+
+    def keyed_child_nodes(self) -> Iterable[tuple[Optional[str], "Content"]]:
+        """
+        Returns the direct children of the node with their key, or None for the children that have none, such as the
+        elements of sequences. By default, the children of child_nodes without any key.
+        """
+        return ((None, child) for child in self.child_nodes())
+
+    def counted_child_nodes(self) -> Iterable["Content"]:
+        """
+        Returns the children whose errors are counted in the errors of the node, by default all of them.
+        """
+        return self.child_nodes()
+
     @abstractmethod
     def to_text(self, indenting: int = 0) -> str:
         """
@@ -57,6 +109,48 @@ class Content(ABC):
         """
         pass
 
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple["Content", int, int]]]:
+        """
+        Yields the text representation of the node as strings, and (child, indenting, skipped) requests in place of
+        the text of its children, of which the first skipped characters are dropped. Nodes with children should
+        override it and implement to_text with text_chunks, so that deep trees are not rendered recursively.
+        """
+        yield self.to_text(indenting)
+
+    def text_chunks(self, indenting: int = 0) -> Iterator[str]:
+        """
+        Yields the text representation of the node in successive chunks, expanding the requests of text_parts with an
+        explicit stack, so that trees deeper than the recursion limit can be rendered.
+        """
+        stack = [self.text_parts(indenting)]
+        # Dropping the start of the text of a child drops the start of everything written after it, so the
+        # characters left to drop are shared by all the levels of the stack
+        skipped = 0
+        while stack:
+            for part in stack[-1]:
+                if isinstance(part, str):
+                    if skipped:
+                        dropped = min(skipped, len(part))
+                        part = part[dropped:]
+                        skipped -= dropped
+                    yield part
+                else:
+                    child, child_indenting, child_skipped = part
+                    skipped += child_skipped
+                    if type(child).text_parts is not Content.text_parts:
+                        stack.append(child.text_parts(child_indenting))
+                        break
+                    # Nodes without children of their own, most of the tree, are rendered right away instead of
+                    # through a generator of their own
+                    part = child.to_text(child_indenting)
+                    if skipped:
+                        dropped = min(skipped, len(part))
+                        part = part[dropped:]
+                        skipped -= dropped
+                    yield part
+            else:
+                stack.pop()
+
     @abstractmethod
     def to_html(self, is_in_error: bool) -> str:
         """
@@ -65,12 +159,131 @@ class Content(ABC):
         """
         pass
 
-    @abstractmethod
+    def html_header(self, is_in_error: bool) -> Optional[str]:
+        """
+        Returns the toggle shown in place of the node when its children are shown in a collapsible content, or None if
+        the node is shown as a whole. Nodes that return a toggle implement html_content_parts.
+        :param is_in_error: Whether one of the node parents was one of the two trees of a misalignment.
+        """
+        return None
+
+    def html_content_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple["Content", bool]]]:
+        """
+        Yields the collapsible content of the node shown under its toggle, in the same format as html_parts.
+        """
+        return iter(())
+
+    def html_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple["Content", bool]]]:
+        """
+        Yields the HTML representation of the node as strings, and (child, is_in_error) requests in place of the HTML
+        of its children. Nodes with children should either have a toggle, or override it, and implement to_html with
+        html_chunks.
+        :param is_in_error: Whether one of the node parents was one of the two trees of a misalignment.
+        """
+        header = self.html_header(is_in_error)
+        if header is None:
+            yield self.to_html(is_in_error)
+            return
+        yield from self.__toggle_parts(header, is_in_error)
+
+    def __toggle_parts(self, header: str, is_in_error: bool) -> Iterator[Union[str, tuple["Content", bool]]]:
+        yield header + '<div class="content">'
+        yield from self.html_content_parts(is_in_error)
+        yield '</div>'
+
+    def html_chunks(self, is_in_error: bool) -> Iterator[str]:
+        """
+        Yields the HTML representation of the node in successive chunks, so that it can be written out without ever
+        being held as one string. The children are expanded with an explicit stack rather than recursively.
+        :param is_in_error: Whether one of the node parents was one of the two trees of a misalignment.
+        """
+        stack = [self.html_parts(is_in_error)]
+        while stack:
+            for part in stack[-1]:
+                if isinstance(part, str):
+                    yield part
+                else:
+                    child, child_in_error = part
+                    if type(child).html_parts is not Content.html_parts:
+                        stack.append(child.html_parts(child_in_error))
+                        break
+                    # Nodes shown as a whole are rendered right away instead of through a generator of their own
+                    header = child.html_header(child_in_error)
+                    if header is not None:
+                        stack.append(child.__toggle_parts(header, child_in_error))
+                        break
+                    yield child.to_html(child_in_error)
+            else:
+                stack.pop()
+
+    def compute_errors(self) -> ErrorWarningCount:
+        """
+        Counts the number of errors and warnings in the node and its children, by default the sum of the ones of
+        counted_child_nodes.
+        Should not be called directly, use count_errors which caches the result.
+        """
+        error_count = warning_count = 0
+        for child in self.counted_child_nodes():
+            count = child.count_errors()
+            error_count += count.error_count
+            warning_count += count.warning_count
+        return ErrorWarningCount(error_count, warning_count)
+
     def count_errors(self) -> ErrorWarningCount:
         """
-        Counts the number of errors and warnings in the node and its children.
+        Returns the number of errors and warnings in the node and its children.
+        The count is computed on first access and then kept on the node, as trees are never modified after creation.
         """
-        pass
+        error_count = getattr(self, "_error_count", None)
+        if error_count is None:
+            self.__fill_bottom_up("_error_count", methodcaller("compute_errors"), methodcaller("counted_child_nodes"))
+            error_count = self._error_count
+        return error_count
+
+    def compute_digest(self) -> bytes:
+        """
+        Computes the structural digest of the node from the digests of its children.
+        By default, digests the type of the node, its children with their keys, and the repr of its other fields but
+        the position, so that nodes with other values never share a digest. Nodes equal to others with other values,
+        such as strings compared without some characters, should override it.
+        Should not be called directly, use digest which caches the result.
+        """
+        parts = [string_digest(f"{type(self).__module__}.{type(self).__qualname__}")]
+        for key, child in self.keyed_child_nodes():
+            parts.append(string_digest(key) if key is not None else make_digest(b"N"))
+            parts.append(child.digest())
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if field.name != "position" and not holds_content(value):
+                parts.append(string_digest(f"{field.name}={value!r}"))
+        return make_digest(b"C", *parts)
+
+    def digest(self) -> bytes:
+        """
+        Returns a structural digest of the node and its children that follows the equality of the node type: two
+        equal nodes always have the same digest, whatever their positions.
+        The digest is computed on first access and then kept on the node.
+        """
+        digest = getattr(self, "_digest", None)
+        if digest is None:
+            self.__fill_bottom_up("_digest", methodcaller("compute_digest"), methodcaller("child_nodes"))
+            digest = self._digest
+        return digest
+
+    def __fill_bottom_up(self, slot: str, compute: Callable[["Content"], object],
+                         dependencies: Callable[["Content"], Iterable["Content"]]):
+        # Caches the value on the descendants first, deepest first, so that computing it on a node only reads the
+        # cached values of its children instead of recursing down the whole tree
+        nodes = [self]
+        # The list grows while it is iterated, so the nodes are visited breadth first
+        for node in nodes:
+            for child in dependencies(node):
+                if getattr(child, slot, None) is None:
+                    nodes.append(child)
+        # Children come after their parent in that order. Nodes shared by several parents come once per parent, and
+        # are then computed more than once.
+        for node in reversed(nodes):
+            object.__setattr__(node, slot, compute(node))
 
     def render_positions_html(self) -> str:
         if self.position is None:
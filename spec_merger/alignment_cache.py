@@ -0,0 +1,149 @@
+import io
+import pickle
+from hashlib import blake2b
+from types import CodeType
+from typing import Callable, Optional
+
+from .aligner_utils import Content, string_digest
+from .content_classes.string import String
+from .disk_cache import DiskCache
+from .tree_utils import children, preorder
+
+# Must be increased whenever the alignment algorithms or the node classes change, so that older results are not reused
+CACHE_VERSION = 4
+
+
+def code_fingerprint(code: CodeType) -> bytes:
+    """
+    Fingerprints compiled code by its bytecode and its constants. The code of nested functions is fingerprinted in
+    turn, and sets are sorted, since their repr would change between runs.
+    """
+    hasher = blake2b(code.co_code, digest_size=16)
+    for constant in code.co_consts:
+        match constant:
+            case CodeType():
+                hasher.update(code_fingerprint(constant))
+            case frozenset():
+                hasher.update(repr(sorted(map(repr, constant))).encode())
+            case _:
+                hasher.update(repr(constant).encode())
+    return hasher.digest()
+
+
+def function_fingerprint(function: Callable) -> bytes:
+    """
+    Fingerprints a function by its qualified name and its bytecode, which unlike its repr do not change between runs.
+    """
+    function = getattr(function, "__func__", function)
+    hasher = blake2b(f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', '')}".encode(),
+                     digest_size=16)
+    code = getattr(function, "__code__", None)
+    if code is not None:
+        hasher.update(code_fingerprint(code))
+    return hasher.digest()
+
+
+def functions_fingerprint(alignment_functions: Optional[dict[tuple[type, type], Callable]], *options) -> bytes:
+    """
+    Fingerprints the user supplied alignment functions and the aligner options, so that results computed with other
+    ones are not reused. Functions are identified by their qualified name and their bytecode.
+    """
+    hasher = blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    hasher.update(repr(options).encode())
+    for (left_type, right_type), function in sorted((alignment_functions or {}).items(),
+                                                    key=lambda item: (item[0][0].__qualname__,
+                                                                      item[0][1].__qualname__)):
+        hasher.update(f"{left_type.__module__}.{left_type.__qualname__},"
+                      f"{right_type.__module__}.{right_type.__qualname__}:".encode())
+        hasher.update(function_fingerprint(function))
+    return hasher.digest()
+
+
+class SubtreeReferences:
+    """
+    Numbers the nodes of the two aligned subtrees, so that a result can be stored with references to them and their
+    positions instead of copies, and rebuilt on other subtrees with the same content but other positions.
+    """
+
+    def __init__(self, left: Content, right: Content):
+        self.nodes = (preorder(left), preorder(right))
+        self.node_ids: dict[int, tuple[str, int, int]] = {}
+        self.position_ids: dict[int, tuple[str, int, int]] = {}
+        for side, nodes in enumerate(self.nodes):
+            for index, node in enumerate(nodes):
+                self.node_ids.setdefault(id(node), ("N", side, index))
+                if node.position is not None:
+                    self.position_ids.setdefault(id(node.position), ("P", side, index))
+
+    def layout_digest(self) -> bytes:
+        # Unlike the digests of the nodes, follows the order of the children and the keys, since the references are
+        # indices in the nodes in that order. Strings equal but for the characters their digest ignores are shown
+        # as they are in the results, so their raw values are part of the layout too.
+        hasher = blake2b(b"layout", digest_size=16)
+        for nodes in self.nodes:
+            hasher.update(b"|")
+            for node in nodes:
+                hasher.update(node.digest())
+                if isinstance(node, String):
+                    hasher.update(string_digest(node.value))
+                for key, _ in children(node):
+                    if key is not None:
+                        hasher.update(string_digest(key))
+        return hasher.digest()
+
+    def persistent_id(self, obj) -> Optional[tuple[str, int, int]]:
+        return self.node_ids.get(id(obj)) or self.position_ids.get(id(obj))
+
+    def persistent_load(self, reference: tuple[str, int, int]):
+        kind, side, index = reference
+        node = self.nodes[side][index]
+        return node if kind == "N" else node.position
+
+
+class AlignmentCache:
+    """
+    On-disk cache of the results of aligning pairs of subtrees, keyed by the content of both subtrees and a
+    fingerprint of the aligner. The least recently used results are evicted once the cache exceeds its size limit.
+    """
+
+    def __init__(self, directory: str, fingerprint: bytes, size_limit: int = 1 << 30):
+        """
+        :param directory: The directory where the results are stored, created if needed
+        :param fingerprint: Fingerprint of the aligner, see functions_fingerprint
+        :param size_limit: Maximal size of the cache directory, in bytes
+        """
+        self.__files = DiskCache(directory, size_limit)
+        self.__fingerprint = fingerprint
+
+    def __key(self, references: SubtreeReferences, scope: tuple) -> str:
+        hasher = blake2b(self.__fingerprint + references.layout_digest(), digest_size=20)
+        if scope:
+            hasher.update(repr(scope).encode())
+        return hasher.hexdigest()
+
+    def load(self, references: SubtreeReferences, scope: tuple = ()) -> Optional[Content]:
+        """
+        Returns the cached result of aligning the referenced subtrees, with its nodes and positions taken from them, or
+        None if there is none.
+        :param scope: What the result depends on besides the subtrees and the aligner, such as the rules matching them
+        """
+        data = self.__files.read(self.__key(references, scope))
+        if data is None:
+            return None
+        unpickler = pickle.Unpickler(io.BytesIO(data))
+        unpickler.persistent_load = references.persistent_load
+        try:
+            return unpickler.load()
+        except (pickle.UnpicklingError, EOFError, IndexError, AttributeError, ImportError):
+            # Results of node classes that were renamed or removed since are missing too
+            return None
+
+    def store(self, references: SubtreeReferences, result: Content, scope: tuple = ()):
+        """
+        Stores the result of aligning the referenced subtrees, see load for the scope.
+        """
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = references.persistent_id
+        pickler.dump(result)
+        self.__files.write(self.__key(references, scope), buffer.getvalue())
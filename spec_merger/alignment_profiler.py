@@ -0,0 +1,172 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, TextIO
+
+from .aligner_utils import Content
+from .tree_utils import children
+
+
+class AlignmentObserver(ABC):
+    """
+    Observer notified by the Aligner around each recursive alignment and on its fallback paths.
+    """
+
+    @abstractmethod
+    def enter(self, left: Content, right: Content):
+        """
+        Called before aligning left and right.
+        """
+        pass
+
+    @abstractmethod
+    def exit(self, left: Content, right: Content):
+        """
+        Called after aligning left and right, even if the alignment raised.
+        """
+        pass
+
+    @abstractmethod
+    def count(self, event: str):
+        """
+        Called when the aligner goes through one of its costly fallbacks, such as a fuzzy key lookup.
+        """
+        pass
+
+
+class PairStatistics:
+    def __init__(self):
+        self.calls = 0
+        self.cumulative_ns = 0
+        self.self_ns = 0
+        self.max_depth = 0
+        self.max_subtree_size = 0
+        self.total_subtree_size = 0
+        # Number of frames of this pair currently running, so that recursive frames are only counted once in the
+        # cumulative time
+        self.active = 0
+
+    def to_json(self) -> dict:
+        return {"calls": self.calls,
+                "cumulative_s": self.cumulative_ns / 1e9,
+                "self_s": self.self_ns / 1e9,
+                "max_depth": self.max_depth,
+                "max_subtree_size": self.max_subtree_size,
+                "mean_subtree_size": self.total_subtree_size / self.calls if self.calls else 0}
+
+
+class Frame:
+    __slots__ = ("nodes", "pair", "label", "path", "start_ns", "children_ns", "child_labels")
+
+    def __init__(self, nodes: tuple[Content, Content], pair: str, label: str, path: tuple[str, ...], start_ns: int):
+        self.nodes = nodes
+        self.pair = pair
+        self.label = label
+        self.path = path
+        self.start_ns = start_ns
+        self.children_ns = 0
+        # Maps the ids of the children of the left and right nodes to their key or index, to name the path of the
+        # frames below this one
+        self.child_labels: Optional[dict[int, str]] = None
+
+
+class AlignmentProfiler(AlignmentObserver):
+    """
+    Profiles an alignment: for each pair of aligned types, the number of calls, cumulative and self time, maximal
+    recursion depth and sizes of the aligned subtrees; the time spent on each path down to path_depth; and how often
+    each fallback was taken.
+    """
+
+    def __init__(self, path_depth: int = 2, slowest_paths: int = 20):
+        """
+        :param path_depth: Depth down to which the time spent on each dictionary key path is recorded
+        :param slowest_paths: Number of slowest paths kept in the exports
+        """
+        self.__path_depth = path_depth
+        self.__slowest_paths = slowest_paths
+        self.pairs: dict[str, PairStatistics] = {}
+        self.paths: dict[tuple[str, ...], int] = {}
+        self.events: dict[str, int] = {}
+        # Self time of each stack of pairs, in the collapsed format of flame graphs
+        self.stacks: dict[str, int] = {}
+        self.__frames: list[Frame] = []
+        # Subtree sizes by node id, with the node to keep it alive and its id unique
+        self.__sizes: dict[int, tuple[Content, int]] = {}
+
+    def __size(self, node: Content) -> int:
+        # Sizes are computed from the bottom up with an explicit stack, as the aligned trees may be very deep
+        stack = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if children_done:
+                self.__sizes[id(current)] = (current, 1 + sum(self.__sizes[id(child)][1]
+                                                              for _, child in children(current)))
+            elif id(current) not in self.__sizes:
+                stack.append((current, True))
+                stack.extend((child, False) for _, child in children(current) if id(child) not in self.__sizes)
+        return self.__sizes[id(node)][1]
+
+    def enter(self, left: Content, right: Content):
+        pair = f"{type(left).__name__}/{type(right).__name__}"
+        statistics = self.pairs.get(pair)
+        if statistics is None:
+            statistics = self.pairs[pair] = PairStatistics()
+        statistics.calls += 1
+        statistics.active += 1
+        statistics.max_depth = max(statistics.max_depth, len(self.__frames))
+        size = self.__size(left) + self.__size(right)
+        statistics.max_subtree_size = max(statistics.max_subtree_size, size)
+        statistics.total_subtree_size += size
+        path = ()
+        label = pair
+        if self.__frames:
+            parent = self.__frames[-1]
+            if parent.child_labels is None:
+                parent.child_labels = {}
+                for node in parent.nodes:
+                    for index, (key, child) in enumerate(children(node)):
+                        parent.child_labels.setdefault(id(child), key if key is not None else f"[{index}]")
+            key = parent.child_labels.get(id(left), parent.child_labels.get(id(right), "?"))
+            path = parent.path + (key,)
+            label = f"{parent.label};{pair}"
+        self.__frames.append(Frame((left, right), pair, label, path, time.perf_counter_ns()))
+
+    def exit(self, left: Content, right: Content):
+        end_ns = time.perf_counter_ns()
+        frame = self.__frames.pop()
+        elapsed_ns = end_ns - frame.start_ns
+        statistics = self.pairs[frame.pair]
+        statistics.active -= 1
+        if statistics.active == 0:
+            statistics.cumulative_ns += elapsed_ns
+        statistics.self_ns += elapsed_ns - frame.children_ns
+        self.stacks[frame.label] = self.stacks.get(frame.label, 0) + elapsed_ns - frame.children_ns
+        if 0 < len(frame.path) <= self.__path_depth:
+            self.paths[frame.path] = self.paths.get(frame.path, 0) + elapsed_ns
+        if self.__frames:
+            self.__frames[-1].children_ns += elapsed_ns
+
+    def count(self, event: str):
+        self.events[event] = self.events.get(event, 0) + 1
+
+    def to_json(self) -> dict:
+        """
+        Returns the profile as a JSON-serializable dictionary.
+        """
+        slowest = sorted(self.paths.items(), key=lambda item: item[1], reverse=True)[:self.__slowest_paths]
+        return {"pairs": {pair: statistics.to_json() for pair, statistics in
+                          sorted(self.pairs.items(), key=lambda item: item[1].cumulative_ns, reverse=True)},
+                "slowest_paths": [{"path": list(path), "cumulative_s": elapsed_ns / 1e9}
+                                  for path, elapsed_ns in slowest],
+                "events": dict(sorted(self.events.items()))}
+
+    def write_json(self, fp: TextIO):
+        json.dump(self.to_json(), fp, indent=2)
+
+    def write_collapsed_stacks(self, fp: TextIO):
+        """
+        Writes the self time of each stack of aligned pairs, in microseconds, in the collapsed stack format read by
+        flame graph tools.
+        """
+        for stack, elapsed_ns in sorted(self.stacks.items()):
+            fp.write(f"{stack} {elapsed_ns // 1000}\n")
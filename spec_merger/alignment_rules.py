@@ -0,0 +1,167 @@
+import re
+from dataclasses import dataclass
+from fnmatch import translate
+from typing import Callable, Iterable, Optional, Union
+
+from .aligner_utils import Content
+
+GLOB_CHARACTERS = re.compile(r"[*?\[]")
+
+
+@dataclass(frozen=True, slots=True)
+class AlignmentRule:
+    """
+    Rule applied by the aligner to the subtrees whose path of dictionary keys matches a pattern. The indices of
+    sequences and bags are not part of the path, so the elements of a list share the path of the list.
+    pattern: The keys of the path separated by "/", each one a shell-style pattern such as "Annex *", or a regular
+    expression matched against the whole key if regex is set. "**" matches any number of keys, including none, and the
+    empty pattern matches the aligned trees themselves. A tuple of key patterns can be given instead, for keys
+    containing "/".
+    skip: Whether the matched subtrees are not aligned at all, and replaced by a SkippedSubtree in the result
+    comparator: Function aligning the matched subtrees instead of the aligner, as the alignment functions do
+    max_depth: Number of levels of dictionary keys aligned below the matched subtrees, the deeper entries being skipped
+    regex: Whether the key patterns are regular expressions instead of shell-style patterns
+    """
+    pattern: Union[str, tuple[str, ...]]
+    skip: bool = False
+    comparator: Optional[Callable[[Content, Content], Content]] = None
+    max_depth: Optional[int] = None
+    regex: bool = False
+
+    def key_patterns(self) -> tuple[str, ...]:
+        if isinstance(self.pattern, str):
+            return tuple(self.pattern.split("/")) if self.pattern else ()
+        return tuple(self.pattern)
+
+
+class RuleNode:
+    """
+    Node of the trie of the key patterns of the rules, reached after matching the patterns leading to it.
+    """
+    __slots__ = ("number", "literals", "patterns", "any_keys", "repeats", "rules")
+
+    def __init__(self, number: int, repeats: bool = False):
+        self.number = number
+        # Children reached by keys equal to a pattern without any special character
+        self.literals: dict[str, RuleNode] = {}
+        # Children reached by the keys matching a pattern, by (pattern, regex)
+        self.patterns: dict[tuple[str, bool], tuple[Callable[[str], object], RuleNode]] = {}
+        # Child reached through "**", which is active as soon as this node is, and stays active on every key
+        self.any_keys: Optional[RuleNode] = None
+        self.repeats = repeats
+        self.rules: list[tuple[int, AlignmentRule]] = []
+
+
+class RuleState:
+    """
+    Set of the nodes of the trie that are active after the keys of a path, with the rules they hold. States are shared
+    by all the paths leading to them and remember their transitions, so that following a path costs one dictionary
+    lookup per key once its states are known.
+    """
+    __slots__ = ("nodes", "numbers", "path", "skip", "comparator", "__rules", "__transitions")
+
+    def __init__(self, rules: "AlignmentRules", nodes: frozenset[RuleNode], path: tuple[str, ...]):
+        self.nodes = nodes
+        # Identifies the state from one run to another, as the nodes are numbered in the order of the rules
+        self.numbers = tuple(sorted(node.number for node in nodes))
+        # First path found to lead to the state, any path to it leading to the same rules below
+        self.path = path
+        matched = sorted((item for node in nodes for item in node.rules), key=lambda item: item[0])
+        self.skip = any(rule.skip for _, rule in matched)
+        self.comparator = next((rule.comparator for _, rule in matched if rule.comparator is not None), None)
+        self.__rules = rules
+        self.__transitions: dict[str, Optional[RuleState]] = {}
+
+    def step(self, key: str) -> Optional["RuleState"]:
+        """
+        Returns the state after one more key, or None if no rule can match below it.
+        """
+        try:
+            return self.__transitions[key]
+        except KeyError:
+            pass
+        reached = []
+        for node in self.nodes:
+            if node.repeats:
+                reached.append(node)
+            child = node.literals.get(key)
+            if child is not None:
+                reached.append(child)
+            for match, child in node.patterns.values():
+                if match(key):
+                    reached.append(child)
+        state = self.__rules.state_of(reached, self.path + (key,)) if reached else None
+        self.__transitions[key] = state
+        return state
+
+
+class AlignmentRules:
+    """
+    Rules of an aligner, compiled into a trie of their key patterns. The rules matching a path are found by following
+    its keys in the trie, as a non-deterministic automaton whose sets of active nodes are the states.
+    """
+
+    def __init__(self, rules: Iterable[AlignmentRule]):
+        self.rules = list(rules)
+        self.__node_count = 0
+        self.__states: dict[frozenset[RuleNode], RuleState] = {}
+        trie = self.__new_node()
+        for index, rule in enumerate(self.rules):
+            assert rule.max_depth is None or rule.max_depth >= 0
+            key_patterns = [(key_pattern, rule.regex) for key_pattern in rule.key_patterns()]
+            self.__add(trie, key_patterns, index, rule)
+            if rule.max_depth is not None:
+                # The entries deeper than the limit are matched by the same patterns followed by one key per level
+                self.__add(trie, key_patterns + [("*", False)] * (rule.max_depth + 1), index,
+                           AlignmentRule(rule.pattern, skip=True, regex=rule.regex))
+        self.root = self.state_of([trie], ())
+
+    def __new_node(self, repeats: bool = False) -> RuleNode:
+        self.__node_count += 1
+        return RuleNode(self.__node_count - 1, repeats)
+
+    def __add(self, node: RuleNode, key_patterns: list[tuple[str, bool]], index: int, rule: AlignmentRule):
+        for key_pattern, regex in key_patterns:
+            if key_pattern == "**":
+                if node.any_keys is None:
+                    node.any_keys = self.__new_node(repeats=True)
+                node = node.any_keys
+            elif not regex and not GLOB_CHARACTERS.search(key_pattern):
+                if key_pattern not in node.literals:
+                    node.literals[key_pattern] = self.__new_node()
+                node = node.literals[key_pattern]
+            else:
+                if (key_pattern, regex) not in node.patterns:
+                    expression = re.compile(key_pattern if regex else translate(key_pattern), re.DOTALL)
+                    node.patterns[key_pattern, regex] = (expression.fullmatch, self.__new_node())
+                node = node.patterns[key_pattern, regex][1]
+        node.rules.append((index, rule))
+
+    def state_of(self, nodes: Iterable[RuleNode], path: tuple[str, ...]) -> RuleState:
+        """
+        Returns the state of a set of reached nodes, with the nodes that "**" makes active along with them.
+        """
+        active = set()
+        pending = list(nodes)
+        while pending:
+            node = pending.pop()
+            if node not in active:
+                active.add(node)
+                if node.any_keys is not None:
+                    pending.append(node.any_keys)
+        active = frozenset(active)
+        state = self.__states.get(active)
+        if state is None:
+            state = self.__states[active] = RuleState(self, active, path)
+        return state
+
+    def state(self, path: Iterable[str]) -> Optional[RuleState]:
+        """
+        Returns the state after the keys of a path, or None if no rule can match below it.
+        """
+        state = self.root
+        for key in path:
+            if state is None:
+                break
+            state = state.step(key)
+        return state
@@ -0,0 +1,56 @@
+def solve_assignment(costs: list[list[float]]) -> list[tuple[int, int]]:
+    """
+    Solves the rectangular assignment problem with the Hungarian algorithm, in O(n^2 * m) for n <= m.
+    :param costs: The cost matrix, costs[row][column] being the cost of assigning the row to the column
+    :return: The (row, column) pairs of minimal total cost, such that every row or every column (whichever there are
+    fewer of) is assigned exactly once, sorted by row
+    """
+    row_count = len(costs)
+    if row_count == 0 or len(costs[0]) == 0:
+        return []
+    column_count = len(costs[0])
+    if row_count > column_count:
+        transposed = [list(column) for column in zip(*costs)]
+        return sorted((row, column) for column, row in solve_assignment(transposed))
+    infinity = float("inf")
+    # Potentials and matching are 1-indexed, index 0 being a virtual column used to start each augmenting path
+    row_potential = [0.0] * (row_count + 1)
+    column_potential = [0.0] * (column_count + 1)
+    column_match = [0] * (column_count + 1)
+    previous_column = [0] * (column_count + 1)
+    for row in range(1, row_count + 1):
+        column_match[0] = row
+        current_column = 0
+        min_reduced_cost = [infinity] * (column_count + 1)
+        visited = [False] * (column_count + 1)
+        while True:
+            visited[current_column] = True
+            current_row = costs[column_match[current_column] - 1]
+            current_row_potential = row_potential[column_match[current_column]]
+            delta = infinity
+            next_column = 0
+            for column in range(1, column_count + 1):
+                if visited[column]:
+                    continue
+                reduced_cost = current_row[column - 1] - current_row_potential - column_potential[column]
+                if reduced_cost < min_reduced_cost[column]:
+                    min_reduced_cost[column] = reduced_cost
+                    previous_column[column] = current_column
+                if min_reduced_cost[column] < delta:
+                    delta = min_reduced_cost[column]
+                    next_column = column
+            for column in range(column_count + 1):
+                if visited[column]:
+                    row_potential[column_match[column]] += delta
+                    column_potential[column] -= delta
+                else:
+                    min_reduced_cost[column] -= delta
+            current_column = next_column
+            if column_match[current_column] == 0:
+                break
+        while current_column != 0:
+            previous = previous_column[current_column]
+            column_match[current_column] = column_match[previous]
+            current_column = previous
+    return sorted((column_match[column] - 1, column - 1)
+                  for column in range(1, column_count + 1) if column_match[column] != 0)
@@ -0,0 +1,318 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import partial
+from itertools import chain
+from typing import ContextManager, Iterator, Optional, TextIO
+
+from . import html_renderer
+from .aligner import Aligner
+from .aligner_utils import Content
+from .error_warning_count import ErrorWarningCount
+from .html_renderer import HTMLRenderer, load_template
+from .json_lines import write_findings, write_tree
+from .multi_file_parser import MultiFileParser
+from .parse_cache import ParsedPageCache
+from .utils import ParsedPage, Parser, Path
+from .watch import SectionMemo, Watcher
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak memory is not reported
+    resource = None
+
+FORMATS = ["html", "lazy-html", "text", "findings", "tree"]
+TEMPLATE_PATH = os.path.dirname(html_renderer.__file__)
+
+# Exit codes, argparse exiting with 2 on invalid arguments
+WITHIN_BUDGET = 0
+OVER_BUDGET = 1
+
+
+def load_parser_class(import_path: str) -> type[Parser]:
+    """
+    Imports a parser class from its import path, such as "package.module:ParserClass" or "package.module.ParserClass".
+    """
+    module_name, separator, class_name = import_path.partition(":")
+    if not separator:
+        module_name, _, class_name = import_path.rpartition(".")
+    if not module_name or not class_name:
+        raise ValueError(f"{import_path} is not the import path of a class")
+    parser_class = importlib.import_module(module_name)
+    for name in class_name.split("."):
+        parser_class = getattr(parser_class, name)
+    return parser_class
+
+
+@dataclass(frozen=True)
+class ParserFactory:
+    """
+    Builds the parser of a file from the import path of the parser class, the file name being followed by the
+    arguments. Unlike a lambda, it can be sent to worker processes.
+    """
+    import_path: str
+    arguments: tuple[str, ...] = ()
+
+    def __call__(self, file_name: str) -> Parser:
+        return load_parser_class(self.import_path)(file_name, *self.arguments)
+
+
+def build_parser(factory: ParserFactory, path: str, pattern: str, jobs: int = 1) -> Parser:
+    """
+    Returns the parser of a document: the parser of its file, or a MultiFileParser of the files of its directory.
+    """
+    if os.path.isdir(path):
+        return MultiFileParser(Path(path, True), factory, pattern, jobs)
+    return factory(path)
+
+
+def parse_document(factory: ParserFactory, path: str, pattern: str, cache_dir: Optional[str],
+                   jobs: int = 1) -> tuple[ParsedPage, float, Optional[int]]:
+    """
+    Parses a document, taking its page from the cache directory, if any, when the document and the parser did not
+    change.
+    :param jobs: Number of processes parsing the files of a directory
+    :return: The parsed page, the time spent getting it in seconds, and the peak memory of the process that parsed it
+    """
+    start = time.perf_counter()
+    parser = build_parser(factory, path, pattern, jobs)
+    if cache_dir is not None:
+        page = ParsedPageCache(os.path.join(cache_dir, "pages")).get_parsed_page(parser)
+    else:
+        page = parser.get_parsed_page()
+    return page, time.perf_counter() - start, peak_memory()
+
+
+def peak_memory(children: bool = False) -> Optional[int]:
+    """
+    Returns the peak resident memory of this process, or of its largest finished child process, in bytes, or None if
+    it cannot be measured.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # The peak is given in kilobytes on Linux, and in bytes on macOS
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+class StageTimer:
+    """
+    Measures the wall-clock time of the stages of a run, and the peak memory of the processes by the end of each one.
+    The peak memory never decreases, so a stage only shows a higher peak than the previous one if it needed more.
+    """
+
+    def __init__(self):
+        self.stages: list[tuple[str, float, Optional[int]]] = []
+
+    def add(self, name: str, seconds: float, memory: Optional[int]):
+        self.stages.append((name, seconds, memory))
+
+    def time(self, name: str, start: float):
+        memory = peak_memory()
+        if memory is not None:
+            memory = max(memory, peak_memory(children=True))
+        self.add(name, time.perf_counter() - start, memory)
+
+    def write(self, fp: TextIO):
+        fp.write(f"{'stage':<16} {'wall-clock':>12} {'peak memory':>14}\n")
+        for name, seconds, memory in self.stages:
+            memory = f"{memory / (1 << 20):.1f} MiB" if memory is not None else "-"
+            fp.write(f"{name:<16} {seconds * 1000:9.1f} ms {memory:>14}\n")
+
+
+def write_result(result: Content, output_format: str, fp: TextIO, shard_directory: Optional[str],
+                 memo: Optional[SectionMemo] = None):
+    """
+    Writes the report of an alignment result in a format.
+    :param memo: Renderings of the sections of the previous results, which are only rendered again if they changed
+    """
+    if memo is not None and output_format in ("html", "text", "findings"):
+        match output_format:
+            case "html":
+                before, after = load_template(TEMPLATE_PATH)
+                chunks = chain([before], memo.html_chunks(result), [after])
+            case "text":
+                chunks = memo.text_chunks(result)
+            case _:
+                chunks = memo.findings_chunks(result)
+        for chunk in chunks:
+            fp.write(chunk)
+        return
+    match output_format:
+        case "html":
+            HTMLRenderer(result).render_to(fp, path_to_template=TEMPLATE_PATH)
+        case "lazy-html":
+            HTMLRenderer(result).render_lazy_to(fp, path_to_template=TEMPLATE_PATH, shard_directory=shard_directory)
+        case "text":
+            for chunk in result.text_chunks(0):
+                fp.write(chunk)
+        case "findings":
+            write_findings(result, fp)
+        case "tree":
+            write_tree(result, fp)
+
+
+def open_output(output: str) -> ContextManager[TextIO]:
+    """
+    Opens the file of the report, or the standard output for "-". A file is written under a temporary name and then
+    renamed, so that it is never seen half written, as when a browser reloads it while watching.
+    """
+    if output == "-":
+        return nullcontext(sys.stdout)
+    return atomic_open(output)
+
+
+@contextmanager
+def atomic_open(file_name: str) -> Iterator[TextIO]:
+    temporary_name = f"{file_name}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_name, "w") as fp:
+            yield fp
+        os.replace(temporary_name, file_name)
+    finally:
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
+
+
+def exit_code(count: ErrorWarningCount, max_errors: int, max_warnings: Optional[int]) -> int:
+    if count.error_count > max_errors or (max_warnings is not None and count.warning_count > max_warnings):
+        return OVER_BUDGET
+    return WITHIN_BUDGET
+
+
+def watch(options: argparse.Namespace, factories: tuple[ParserFactory, ParserFactory], aligner: Aligner) -> int:
+    """
+    Writes the report of the documents, and writes it again whenever their files change, until interrupted.
+    :return: The exit code of the last report
+    """
+    memo = SectionMemo()
+    timer = StageTimer()
+    count = None
+
+    def report():
+        nonlocal count, timer
+        start = time.perf_counter()
+        result = watcher.align()
+        count = result.count_errors()
+        timer.time("align", start)
+        start = time.perf_counter()
+        with open_output(options.output) as fp:
+            write_result(result, options.format, fp, options.shard_directory, memo)
+        timer.time("render", start)
+        if not options.quiet:
+            timer.write(sys.stderr)
+            sys.stderr.write(f"{watcher.realigned} sections aligned: {count.error_count} errors, "
+                             f"{count.warning_count} warnings\n")
+        timer = StageTimer()
+
+    start = time.perf_counter()
+    watcher = Watcher(*(partial(build_parser, factory, path, options.pattern, options.jobs)
+                        for factory, path in zip(factories, (options.left, options.right))), aligner)
+    timer.time("parse", start)
+    report()
+    try:
+        while True:
+            time.sleep(options.interval)
+            start = time.perf_counter()
+            if watcher.poll():
+                timer.time("parse", start)
+                report()
+    except KeyboardInterrupt:
+        pass
+    return exit_code(count, options.max_errors, options.max_warnings)
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="spec-merger",
+                                     description="Parses two documents, aligns them and writes the report of their "
+                                                 "differences. Exits with 1 if they have more errors or warnings "
+                                                 "than allowed.")
+    parser.add_argument("left", help="File of the left document, or directory of its files")
+    parser.add_argument("right", help="File of the right document, or directory of its files")
+    parser.add_argument("--left-parser", required=True,
+                        help="Import path of the parser class of the left document, such as package.module:Parser. "
+                             "Modules are also looked up in the current directory.")
+    parser.add_argument("--right-parser", help="Import path of the parser class of the right document, the one of the "
+                                               "left document by default")
+    parser.add_argument("--left-arg", action="append", default=[],
+                        help="Argument given to the left parser after the file name, can be repeated")
+    parser.add_argument("--right-arg", action="append", default=[],
+                        help="Argument given to the right parser after the file name, can be repeated")
+    parser.add_argument("--pattern", default="*",
+                        help="Shell-style pattern of the names of the files parsed in a directory, such as *.py")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of processes, 1 by default: with more than one, both documents are parsed at the "
+                             "same time, each one sharing the processes between the files of its directory, and the "
+                             "sections are aligned in parallel")
+    parser.add_argument("--format", choices=FORMATS, default="html",
+                        help="html and lazy-html reports, the text report, the findings as JSON Lines, or the whole "
+                             "alignment result as JSON Lines")
+    parser.add_argument("--output", "-o", default="-", help="File of the report, the standard output by default")
+    parser.add_argument("--shard-directory", help="Directory of the content of the lazy-html report, if kept apart")
+    parser.add_argument("--cache-dir", help="Directory where the parsed pages and the alignments of the sections are "
+                                            "cached between runs")
+    parser.add_argument("--errors-only", action="store_true",
+                        help="Summarizes the subtrees without errors or warnings in the report")
+    parser.add_argument("--max-errors", type=int, default=0, help="Number of errors above which the exit code is 1")
+    parser.add_argument("--max-warnings", type=int,
+                        help="Number of warnings above which the exit code is 1, warnings being ignored by default")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Does not print the stages breakdown")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keeps running, and writes the report again whenever a file of the documents changes, "
+                             "only aligning again the changed sections")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="Time between two checks of the files while watching, in seconds")
+    options = parser.parse_args(arguments)
+    if options.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    # Parsers are usually next to the documents rather than installed, as for "python -m"
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    factories = (ParserFactory(options.left_parser, tuple(options.left_arg)),
+                 ParserFactory(options.right_parser or options.left_parser, tuple(options.right_arg)))
+    aligner = Aligner(jobs=options.jobs, errors_only=options.errors_only,
+                      cache_dir=os.path.join(options.cache_dir, "alignments") if options.cache_dir else None)
+    if options.watch:
+        return watch(options, factories, aligner)
+
+    timer = StageTimer()
+    # The documents are parsed at the same time, so each one gets half of the processes for the files of its directory
+    side_jobs = max(options.jobs // 2, 1)
+    sides = [(factories[0], options.left, options.pattern, options.cache_dir, side_jobs),
+             (factories[1], options.right, options.pattern, options.cache_dir, side_jobs)]
+    start = time.perf_counter()
+    if options.jobs > 1:
+        with ProcessPoolExecutor(2) as pool:
+            parsed = list(pool.map(parse_document, *zip(*sides)))
+    else:
+        parsed = [parse_document(*side) for side in sides]
+    (left, *left_stage), (right, *right_stage) = parsed
+    timer.add("parse left", *left_stage)
+    timer.add("parse right", *right_stage)
+    timer.time("parse", start)
+
+    start = time.perf_counter()
+    result = aligner.align(left.entries, right.entries)
+    count = result.count_errors()
+    timer.time("align", start)
+
+    start = time.perf_counter()
+    with open_output(options.output) as fp:
+        write_result(result, options.format, fp, options.shard_directory)
+    timer.time("render", start)
+
+    if not options.quiet:
+        timer.write(sys.stderr)
+        sys.stderr.write(f"{left.name} vs {right.name}: {count.error_count} errors, {count.warning_count} warnings\n")
+    return exit_code(count, options.max_errors, options.max_warnings)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,41 @@
 from dataclasses import dataclass
+from typing import Iterable, Iterator, Union
 
-from spec_merger.aligner_utils import Content, ReportErrorType
+from spec_merger.aligner_utils import Content, ReportErrorType, make_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AlignmentIssue(Content):
     value: Content
     warning: ReportErrorType
 
+    def child_nodes(self) -> Iterable[Content]:
+        return self.value,
+
+    def counted_child_nodes(self) -> Iterable[Content]:
+        # The errors of the node are the issue itself, whatever its value holds
+        return ()
+
     def to_text(self, indenting: int = 0) -> str:
-        return f"{'  '*indenting}!WARNING! {str(self.warning)}\n{self.value.to_text(indenting)}"
+        return ''.join(self.text_chunks(indenting))
+
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple[Content, int, int]]]:
+        yield f"{'  '*indenting}!WARNING! {str(self.warning)}\n"
+        yield self.value, indenting, 0
 
     def to_html(self, is_in_error: bool) -> str:
+        return ''.join(self.html_chunks(is_in_error))
+
+    def html_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple[Content, bool]]]:
         error_class = "alignment-error > ERROR" if self.warning.is_error() else "alignment-warning > WARNING"
-        return (f'<div>'
-                f'<div class={error_class} {self.warning}</div>'
-                f'<div>{self.value.to_html(is_in_error)}</div>'
-                f'</div>')
+        yield f'<div><div class={error_class} {self.warning}</div><div>'
+        yield self.value, is_in_error
+        yield '</div></div>'
+
+    def compute_digest(self) -> bytes:
+        return make_digest(b"A", self.warning.name.encode(), self.value.digest())
 
-    def count_errors(self) -> ErrorWarningCount:
+    def compute_errors(self) -> ErrorWarningCount:
         return ErrorWarningCount(1, 0) if self.warning.is_error() \
             else ErrorWarningCount(0, 1)
@@ -1,36 +1,51 @@
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterable, Iterator, Optional, Union
 
 from dataclasses import dataclass
 
-from spec_merger.aligner_utils import Content
+from spec_merger.aligner_utils import Content, make_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 T = TypeVar('T', bound='Content', covariant=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Bag(Generic[T], Content):
-    # represents a set but stored as list to avoid non-determinism
+    # represents a multiset but stored as list to avoid non-determinism
     bag: list[T]
 
+    def child_nodes(self) -> Iterable[Content]:
+        return self.bag
+
     def to_text(self, indenting: int = 0) -> str:
-        if self.count_errors() == ErrorWarningCount(0,0):
-            return f"{'  '*indenting}ORDERED SEQ: OK\n"
-        return f"{'  '*indenting}ORDERED SEQ: OK\n{''.join(x.to_text(indenting+1) for x in self.bag)}"
+        return ''.join(self.text_chunks(indenting))
 
-    def count_errors(self) -> ErrorWarningCount:
-        return sum([element.count_errors() for element in self.bag],
-                   start=ErrorWarningCount(0, 0))
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple[Content, int, int]]]:
+        yield f"{'  '*indenting}ORDERED SEQ: OK\n"
+        if self.count_errors() != ErrorWarningCount(0,0):
+            for x in self.bag:
+                yield x, indenting+1, 0
 
     def to_html(self, is_in_error: bool) -> str:
+        return ''.join(self.html_chunks(is_in_error))
+
+    def html_header(self, is_in_error: bool) -> Optional[str]:
         error_count = self.count_errors()
-        items = ''.join(f'<li>{item.to_html(is_in_error)}</li>' for item in self.bag)
-        return (
-            f'<div class="toggle">Bag {error_count.to_html(is_in_error)}{self.render_positions_html()}</div>'
-            f'<div class="content"><ul>{items}</ul></div>')
+        return f'<div class="toggle">Bag {error_count.to_html(is_in_error)}{self.render_positions_html()}</div>'
+
+    def html_content_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple[Content, bool]]]:
+        yield '<ul>'
+        for item in self.bag:
+            yield '<li>'
+            yield item, is_in_error
+            yield '</li>'
+        yield '</ul>'
+
+    def compute_digest(self) -> bytes:
+        # Elements are compared as a multiset, so their order does not matter but their multiplicity does
+        return make_digest(b"B", *sorted(element.digest() for element in self.bag))
 
     def __eq__(self, other):
-        return isinstance(other, Bag) and set(self.bag) == set(other.bag)
+        return isinstance(other, Bag) and self.digest() == other.digest()
 
     def __hash__(self):
-        return hash(self.bag)
+        return hash(self.digest())
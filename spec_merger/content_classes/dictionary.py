@@ -1,39 +1,60 @@
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterable, Iterator, Optional, Union
 from html import escape
 from dataclasses import dataclass
 
-from spec_merger.aligner_utils import Content
+from spec_merger.aligner_utils import Content, make_digest, string_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 T = TypeVar('T', bound='Content', covariant=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Dictionary(Generic[T], Content):
     entries: dict[str, T]
 
+    def child_nodes(self) -> Iterable[Content]:
+        return self.entries.values()
+
+    def keyed_child_nodes(self) -> Iterable[tuple[Optional[str], Content]]:
+        return self.entries.items()
+
     def to_text(self, indenting: int = 0) -> str:
-        if self.count_errors() == ErrorWarningCount(0,0):
-            return "  "*indenting+"DICT: OK\n"
-        return f"{'  '*indenting}DICT: OK\n{''.join('  '*(indenting+1)+k +self.entries[k].to_text(indenting+1)[2*indenting:] for k in sorted(self.entries.keys()))}"
+        return ''.join(self.text_chunks(indenting))
+
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple[Content, int, int]]]:
+        yield "  "*indenting+"DICT: OK\n"
+        if self.count_errors() != ErrorWarningCount(0,0):
+            for k in sorted(self.entries.keys()):
+                yield '  '*(indenting+1)+k
+                yield self.entries[k], indenting+1, 2*indenting
 
     def to_html(self, is_in_error: bool) -> str:
+        return ''.join(self.html_chunks(is_in_error))
+
+    def html_header(self, is_in_error: bool) -> Optional[str]:
         error_count = self.count_errors()
-        items = ''.join(f'<li><h3>{escape(key)}:</h3> {value.to_html(is_in_error)}</li>' for key, value in
-                        sorted(self.entries.items(), key=lambda x: x[0]))
-        return (
-            f'<div class="toggle">Dictionary{error_count.to_html(is_in_error)}{self.render_positions_html()}</div>'
-            f'<div class="content"><ul>{items}</ul></div>')
+        return f'<div class="toggle">Dictionary{error_count.to_html(is_in_error)}{self.render_positions_html()}</div>'
 
-    def count_errors(self) -> ErrorWarningCount:
-        return sum([element.count_errors() for element in self.entries.values()],
-                   start=ErrorWarningCount(0, 0))
+    def html_content_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple[Content, bool]]]:
+        yield '<ul>'
+        for key, value in sorted(self.entries.items(), key=lambda x: x[0]):
+            yield f'<li><h3>{escape(key)}:</h3> '
+            yield value, is_in_error
+            yield '</li>'
+        yield '</ul>'
 
     def __getitem__(self, item):
         return self.entries.get(item)
 
+    def compute_digest(self) -> bytes:
+        parts = []
+        for key in sorted(self.entries.keys()):
+            parts.append(string_digest(key))
+            parts.append(self.entries[key].digest())
+        return make_digest(b"D", *parts)
+
     def __eq__(self, other):
-        return isinstance(other, Dictionary) and self.entries == other.entries
+        return isinstance(other, Dictionary) and self.digest() == other.digest()
 
     def __hash__(self):
-        return hash(self.entries)
+        return hash(self.digest())
@@ -1,31 +1,58 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Union
 
-from spec_merger.aligner_utils import Content, ReportErrorType
+from spec_merger.aligner_utils import Content, ReportErrorType, make_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Misalignment(Content):
     left: Optional[Content]
     right: Optional[Content]
     error: ReportErrorType
 
+    def child_nodes(self) -> Iterable[Content]:
+        return [side for side in (self.left, self.right) if side is not None]
+
+    def counted_child_nodes(self) -> Iterable[Content]:
+        # The errors of the node are the misalignment itself, whatever its sides hold
+        return ()
+
     def to_text(self, indenting: int = 0) -> str:
+        return ''.join(self.text_chunks(indenting))
+
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple[Content, int, int]]]:
         none_str = "  "*(indenting+1) + "NONE\n"
-        left = self.left.to_text(indenting+1) if self.left is not None else none_str
-        right = self.right.to_text(indenting+1) if self.right is not None else none_str
-        return f"{'  '*indenting}!MISALIGNMENT! {str(self.error)}\n{left}{right}"
+        yield f"{'  '*indenting}!MISALIGNMENT! {str(self.error)}\n"
+        for side in (self.left, self.right):
+            if side is not None:
+                yield side, indenting+1, 0
+            else:
+                yield none_str
 
     def to_html(self, is_in_error: bool) -> str:
+        return ''.join(self.html_chunks(is_in_error))
+
+    def html_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple[Content, bool]]]:
         error_class = "alignment-error > ERROR" if self.error.is_error() else "alignment-warning > WARNING"
-        return (f'<div>'
-                f'<div class={error_class} {self.error}</div>'
-                f'<div class="text-displayer">{self.left.to_html(True) if self.left is not None else "None"}</div>'
-                f'<div> VS </div>'
-                f'<div class="text-displayer">{self.right.to_html(True) if self.right is not None else "None"}</div>'
-                f'</div>')
-
-    def count_errors(self) -> ErrorWarningCount:
+        yield f'<div><div class={error_class} {self.error}</div><div class="text-displayer">'
+        if self.left is not None:
+            yield self.left, True
+        else:
+            yield "None"
+        yield '</div><div> VS </div><div class="text-displayer">'
+        if self.right is not None:
+            yield self.right, True
+        else:
+            yield "None"
+        yield '</div></div>'
+
+    def compute_digest(self) -> bytes:
+        none_digest = make_digest(b"N")
+        return make_digest(b"M", self.error.name.encode(),
+                           self.left.digest() if self.left is not None else none_digest,
+                           self.right.digest() if self.right is not None else none_digest)
+
+    def compute_errors(self) -> ErrorWarningCount:
         return ErrorWarningCount(1, 0) if self.error.is_error() \
             else ErrorWarningCount(0, 1)
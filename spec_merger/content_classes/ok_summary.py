@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+from spec_merger.aligner_utils import Content, make_digest
+from spec_merger.error_warning_count import ErrorWarningCount
+
+
+@dataclass(frozen=True, slots=True)
+class OKSummary(Content):
+    """
+    Stands for a subtree of an alignment result without any error or warning, of which only the size is kept.
+    """
+    node_count: int
+
+    def to_text(self, indenting: int = 0) -> str:
+        return f"{'  '*indenting}OK ({self.node_count} nodes)\n"
+
+    def to_html(self, is_in_error: bool) -> str:
+        return f'<div class="no-error">OK ({self.node_count} nodes){self.render_positions_html()}</div>'
+
+    def compute_errors(self) -> ErrorWarningCount:
+        return ErrorWarningCount(0, 0)
+
+    def compute_digest(self) -> bytes:
+        return make_digest(b"P", str(self.node_count).encode())
@@ -1,44 +1,64 @@
 from dataclasses import dataclass
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterable, Iterator, Optional, Union
 from html import escape
 
-from spec_merger.aligner_utils import Content
+from spec_merger.aligner_utils import Content, make_digest, string_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 T = TypeVar('T', bound='Content', covariant=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OrderedDictionnary(Generic[T], Content):
     entries: dict[str, T]
     entries_list: list[str]
 
+    def child_nodes(self) -> Iterable[Content]:
+        return self.entries.values()
+
+    def keyed_child_nodes(self) -> Iterable[tuple[Optional[str], Content]]:
+        return ((key, self.entries[key]) for key in self.entries_list)
+
     def to_text(self, indenting: int = 0) -> str:
-        if self.count_errors() == ErrorWarningCount(0,0):
-            return f"{'  '*indenting}ORDERED DICT: OK\n"
-        return (f"{'  '*indenting}ORDERED DICT: OK\n" +
-                ''.join('  '*(indenting+1)+k +
-                        self.entries[k].to_text(indenting+1)[2*indenting:] for k in self.entries_list))
+        return ''.join(self.text_chunks(indenting))
+
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple[Content, int, int]]]:
+        yield f"{'  '*indenting}ORDERED DICT: OK\n"
+        if self.count_errors() != ErrorWarningCount(0,0):
+            for k in self.entries_list:
+                yield '  '*(indenting+1)+k
+                yield self.entries[k], indenting+1, 2*indenting
 
     def to_html(self, is_in_error: bool) -> str:
+        return ''.join(self.html_chunks(is_in_error))
+
+    def html_header(self, is_in_error: bool) -> Optional[str]:
         error_count = self.count_errors()
-        items = ''.join(f'<li><h3>{escape(key)}:</h3> {self.entries[key].to_html(is_in_error)}</li>' for key in
-                        self.entries_list)
-        return (
-            f'<div class="toggle">Ordered Dictionary{error_count.to_html(is_in_error)}{self.render_positions_html()}</div>'
-            f'<div class="content"><ul>{items}</ul></div>')
+        return (f'<div class="toggle">Ordered Dictionary{error_count.to_html(is_in_error)}'
+                f'{self.render_positions_html()}</div>')
 
-    def count_errors(self) -> ErrorWarningCount:
-        return sum([element.count_errors() for element in self.entries.values()],
-                   start=ErrorWarningCount(0, 0))
+    def html_content_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple[Content, bool]]]:
+        yield '<ul>'
+        for key in self.entries_list:
+            yield f'<li><h3>{escape(key)}:</h3> '
+            yield self.entries[key], is_in_error
+            yield '</li>'
+        yield '</ul>'
 
     def __getitem__(self, item):
         return self.entries.get(item)
 
+    def compute_digest(self) -> bytes:
+        parts = []
+        for key in sorted(self.entries.keys()):
+            parts.append(string_digest(key))
+            parts.append(self.entries[key].digest())
+        # The order is digested apart from the entries, since entries_list may differ from the entries keys
+        parts.append(make_digest(b"L", *map(string_digest, self.entries_list)))
+        return make_digest(b"O", *parts)
+
     def __eq__(self, other):
-        return (isinstance(other, OrderedDictionnary) and
-                self.entries == other.entries and
-                self.entries_list == other.entries_list)
+        return isinstance(other, OrderedDictionnary) and self.digest() == other.digest()
 
     def __hash__(self):
-        return hash((self.entries, self.entries_list))
+        return hash(self.digest())
@@ -1,14 +1,14 @@
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterable, Iterator, Optional, Union
 
 from dataclasses import dataclass
 
-from spec_merger.aligner_utils import Content
+from spec_merger.aligner_utils import Content, make_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 T = TypeVar('T', bound='Content', covariant=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OrderedSeq(Generic[T], Content):
     sequence: list[T]
 
@@ -16,25 +16,39 @@ class OrderedSeq(Generic[T], Content):
         if isinstance(item, slice):
             return self.sequence[item]
 
+    def compute_digest(self) -> bytes:
+        return make_digest(b"S", *(element.digest() for element in self.sequence))
+
     def __eq__(self, other):
-        return isinstance(other, OrderedSeq) and self.sequence == other.sequence
+        return isinstance(other, OrderedSeq) and self.digest() == other.digest()
 
     def __hash__(self):
-        return hash(self.sequence)
+        return hash(self.digest())
 
-    def count_errors(self) -> ErrorWarningCount:
-        return sum([element.count_errors() for element in self.sequence],
-                   start=ErrorWarningCount(0, 0))
+    def child_nodes(self) -> Iterable[Content]:
+        return self.sequence
 
     def to_text(self, indenting: int = 0) -> str:
-        if self.count_errors() == ErrorWarningCount(0,0):
-            return f"{'  '*indenting}ORDERED SEQ: OK\n"
-        return f"{'  '*indenting}ORDERED SEQ: OK\n{''.join(x.to_text(indenting+1) for x in self.sequence)}"
+        return ''.join(self.text_chunks(indenting))
+
+    def text_parts(self, indenting: int) -> Iterator[Union[str, tuple[Content, int, int]]]:
+        yield f"{'  '*indenting}ORDERED SEQ: OK\n"
+        if self.count_errors() != ErrorWarningCount(0,0):
+            for x in self.sequence:
+                yield x, indenting+1, 0
 
     def to_html(self, is_in_error: bool) -> str:
+        return ''.join(self.html_chunks(is_in_error))
+
+    def html_header(self, is_in_error: bool) -> Optional[str]:
         error_count = self.count_errors()
-        items = ''.join(f'<li>{item.to_html(is_in_error)}</li>' for item in self.sequence)
-        return (
-            f'<div class="toggle">OrderedSeq {error_count.to_html(is_in_error)}'
-            f'{self.render_positions_html()}</div>'
-            f'<div class="content"><ol>{items}</ol></div>')
+        return (f'<div class="toggle">OrderedSeq {error_count.to_html(is_in_error)}'
+                f'{self.render_positions_html()}</div>')
+
+    def html_content_parts(self, is_in_error: bool) -> Iterator[Union[str, tuple[Content, bool]]]:
+        yield '<ol>'
+        for item in self.sequence:
+            yield '<li>'
+            yield item, is_in_error
+            yield '</li>'
+        yield '</ol>'
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+from spec_merger.aligner_utils import Content, make_digest
+from spec_merger.error_warning_count import ErrorWarningCount
+
+
+@dataclass(frozen=True, slots=True)
+class SkippedSubtree(Content):
+    """
+    Stands for a pair of subtrees of an alignment result that an alignment rule told not to align, of which only the
+    positions are kept. Skipped subtrees count neither as errors nor as warnings.
+    """
+
+    def to_text(self, indenting: int = 0) -> str:
+        return f"{'  '*indenting}SKIPPED\n"
+
+    def to_html(self, is_in_error: bool) -> str:
+        return f'<div class="no-error">SKIPPED{self.render_positions_html()}</div>'
+
+    def compute_errors(self) -> ErrorWarningCount:
+        return ErrorWarningCount(0, 0)
+
+    def compute_digest(self) -> bytes:
+        return make_digest(b"X")
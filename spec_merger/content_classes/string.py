@@ -1,22 +1,53 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from html import escape
-from spec_merger.aligner_utils import Content
+from spec_merger.aligner_utils import Content, make_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 
-@dataclass(frozen=True)
+@lru_cache(maxsize=None)
+def removal_table(chars_useless: str) -> dict[int, None]:
+    """
+    Returns the str.translate table removing the given characters, shared by all the strings using them.
+    """
+    return str.maketrans("", "", chars_useless)
+
+
+# Strings never hold errors, so they all share the same count
+NO_ERRORS = ErrorWarningCount(0, 0)
+
+
+@dataclass(frozen=True, slots=True)
 class String(Content):
     value: str
     chars_useless: str = " \xa0"
+    # The value without its useless characters, computed once as it is what comparisons use
+    normalized: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        normalized = self.value.translate(removal_table(self.chars_useless))
+        # Most values have nothing to remove, they then share the same string object
+        object.__setattr__(self, "normalized", self.value if normalized == self.value else normalized)
+
+    def moved(self, position) -> "String":
+        """
+        Returns the same string at another position, without normalizing its value again.
+        """
+        moved = object.__new__(String)
+        object.__setattr__(moved, "position", position)
+        object.__setattr__(moved, "value", self.value)
+        object.__setattr__(moved, "chars_useless", self.chars_useless)
+        object.__setattr__(moved, "normalized", self.normalized)
+        return moved
 
     def real_string(self):
-        s = self.value
-        for c in self.chars_useless:
-            s = s.replace(c, "")
-        return s
+        return self.normalized
+
+    def compute_errors(self) -> ErrorWarningCount:
+        return NO_ERRORS
 
     def count_errors(self) -> ErrorWarningCount:
-        return ErrorWarningCount(0, 0)
+        return NO_ERRORS
 
     def to_text(self, indenting: int = 0) -> str:
         return "  "*indenting + "STRING: OK\n"
@@ -24,11 +55,14 @@ class String(Content):
     def to_html(self, is_in_error: bool) -> str:
         return f'<div>\"{escape(self.value)}\"{self.render_positions_html()}</div>'
 
+    def compute_digest(self) -> bytes:
+        return make_digest(b"T", self.normalized.encode("utf-8", "surrogatepass"))
+
     def __eq__(self, other):
-        return isinstance(other, String) and self.real_string() == other.real_string()
+        return isinstance(other, String) and self.normalized == other.normalized
 
     def __hash__(self):
-        return hash(self.real_string())
+        return hash(self.normalized)
 
     def __len__(self):
         return len(self.value)
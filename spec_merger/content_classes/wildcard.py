@@ -1,13 +1,13 @@
 from dataclasses import dataclass
 from typing import TypeVar, Generic
 
-from spec_merger.aligner_utils import Content
+from spec_merger.aligner_utils import Content, make_digest
 from spec_merger.error_warning_count import ErrorWarningCount
 
 T = TypeVar('T', bound='Content', covariant=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WildCard(Generic[T], Content):
     def to_text(self, indenting: int = 0) -> str:
         return "  " * indenting + "WildCard\n"
@@ -15,9 +15,12 @@ class WildCard(Generic[T], Content):
     def to_html(self, is_in_error: bool) -> str:
         return f'<div class="wildcard">Wildcard{self.render_positions_html()}</div>'
 
-    def count_errors(self) -> ErrorWarningCount:
+    def compute_errors(self) -> ErrorWarningCount:
         return ErrorWarningCount(0, 1)
 
+    def compute_digest(self) -> bytes:
+        return make_digest(b"W")
+
     def __eq__(self, other):
         return isinstance(other, WildCard)
 
@@ -0,0 +1,68 @@
+import os
+from typing import Optional
+
+
+class DiskCache:
+    """
+    Directory of files named by their key, of which the least recently used ones are evicted once the directory
+    exceeds its size limit.
+    """
+
+    def __init__(self, directory: str, size_limit: int = 1 << 30, suffix: str = ".pickle"):
+        """
+        :param directory: The directory where the files are stored, created if needed
+        :param size_limit: Maximal size of the files of the directory, in bytes
+        :param suffix: Suffix of the files of the cache, the other files of the directory being left alone
+        """
+        self.__directory = directory
+        self.__size_limit = size_limit
+        self.__suffix = suffix
+        os.makedirs(directory, exist_ok=True)
+        self.__size = sum(entry.stat().st_size for entry in os.scandir(directory)
+                          if entry.is_file() and entry.name.endswith(suffix))
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.__directory, key + self.__suffix)
+
+    def read(self, key: str) -> Optional[bytes]:
+        """
+        Returns the content of the file of the key, or None if there is none.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # The access time is kept as modification time, which is what eviction sorts by
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def write(self, key: str, data: bytes):
+        """
+        Writes the file of the key, then evicts the least recently used files if the cache got too big.
+        """
+        path = self.path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+        self.__size += len(data)
+        if self.__size > self.__size_limit:
+            self.__evict()
+
+    def __evict(self):
+        entries = sorted((entry for entry in os.scandir(self.__directory)
+                          if entry.is_file() and entry.name.endswith(self.__suffix)),
+                         key=lambda entry: entry.stat().st_mtime)
+        self.__size = sum(entry.stat().st_size for entry in entries)
+        # Evicts down to a fraction of the limit, so that eviction does not run again on every write
+        for entry in entries:
+            if self.__size <= self.__size_limit * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self.__size -= size
+            except OSError:
+                pass
@@ -2,6 +2,7 @@ class ErrorWarningCount:
     """
     Class to represent the number of warnings and errors encountered during comparison
     """
+    __slots__ = ("error_count", "warning_count")
 
     def __init__(self, error_count: int = 0, warning_count: int = 0):
         assert isinstance(error_count, int)
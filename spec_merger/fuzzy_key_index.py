@@ -0,0 +1,95 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from math import ceil
+from typing import Iterable, Optional
+
+
+def bigrams(key: str) -> Counter:
+    return Counter(key[i:i + 2] for i in range(len(key) - 1))
+
+
+class FuzzyKeyIndex:
+    """
+    Index over a set of keys that finds the closest one to a given key, with the same result as
+    difflib.get_close_matches(key, keys, n=1, cutoff=cutoff) but without computing the similarity to every key.
+    """
+
+    def __init__(self, keys: Iterable[str], cutoff: float = 0.88):
+        assert 0 <= cutoff < 1
+        self.__cutoff = cutoff
+        self.__keys: list[str] = []
+        self.__removed: list[bool] = []
+        self.__ids: dict[str, int] = {}
+        # Inverted index from a bigram to the ids of the keys containing it, with its number of occurrences
+        self.__postings: dict[str, list[tuple[int, int]]] = {}
+        # Ids of the keys of each length, used when a key is too short for bigrams to discard anything
+        self.__by_length: dict[int, list[int]] = {}
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str):
+        if key in self.__ids:
+            self.__removed[self.__ids[key]] = False
+            return
+        key_id = len(self.__keys)
+        self.__keys.append(key)
+        self.__removed.append(False)
+        self.__ids[key] = key_id
+        for bigram, count in bigrams(key).items():
+            self.__postings.setdefault(bigram, []).append((key_id, count))
+        self.__by_length.setdefault(len(key), []).append(key_id)
+
+    def remove(self, key: str):
+        """
+        Removes a key from the index, so that it is not returned anymore.
+        """
+        key_id = self.__ids.get(key)
+        if key_id is not None:
+            self.__removed[key_id] = True
+
+    def __min_shared_bigrams(self, length: int, other_length: int) -> int:
+        # The matching blocks found by SequenceMatcher hold M >= cutoff * (length + other_length) / 2 characters.
+        # Consecutive blocks are separated by at least one unmatched character, so there are at most
+        # length + other_length - 2M + 1 of them, and a block of k characters holds k - 1 common bigrams.
+        return ceil((1.5 * self.__cutoff - 1) * (length + other_length) - 1 - 1e-9)
+
+    def __candidates(self, key: str) -> Iterable[int]:
+        length = len(key)
+        # ratio = 2M / (length + other_length) with M <= min(length, other_length) bounds the possible lengths
+        min_length = ceil(self.__cutoff * length / (2 - self.__cutoff) - 1e-9)
+        max_length = int(length * (2 - self.__cutoff) / self.__cutoff + 1e-9) if self.__cutoff > 0 else None
+        if max_length is None or self.__min_shared_bigrams(length, min_length) <= 0:
+            # Bigrams cannot rule out anything, every key of a possible length is a candidate
+            for other_length, key_ids in self.__by_length.items():
+                if other_length >= min_length and (max_length is None or other_length <= max_length):
+                    yield from key_ids
+            return
+        shared: dict[int, int] = {}
+        for bigram, count in bigrams(key).items():
+            for key_id, other_count in self.__postings.get(bigram, ()):
+                shared[key_id] = shared.get(key_id, 0) + min(count, other_count)
+        for key_id, shared_count in shared.items():
+            other_length = len(self.__keys[key_id])
+            if (min_length <= other_length <= max_length and
+                    shared_count >= self.__min_shared_bigrams(length, other_length)):
+                yield key_id
+
+    def closest_key(self, key: str) -> Optional[str]:
+        """
+        Returns the indexed key closest to the given one if its similarity ratio is at least the cutoff, else None.
+        Ties are broken like get_close_matches does, in favor of the greatest key.
+        """
+        matcher = SequenceMatcher()
+        matcher.set_seq2(key)
+        best: Optional[tuple[float, str]] = None
+        for key_id in self.__candidates(key):
+            if self.__removed[key_id]:
+                continue
+            candidate = self.__keys[key_id]
+            matcher.set_seq1(candidate)
+            if (matcher.real_quick_ratio() >= self.__cutoff and
+                    matcher.quick_ratio() >= self.__cutoff):
+                score = matcher.ratio()
+                if score >= self.__cutoff and (best is None or (score, candidate) > best):
+                    best = (score, candidate)
+        return best[1] if best is not None else None
@@ -1,9 +1,80 @@
+import json
 import os.path
+from collections import deque
+from functools import lru_cache
+from itertools import count
+from string import Formatter
+from typing import Iterator, Optional, TextIO, Union
 
 from .aligner_utils import Content
 from .error_warning_count import ErrorWarningCount
 
 
+def load_template(path_to_template: str = "") -> tuple[str, str]:
+    """
+    Returns the html template split around its content placeholder. The template is in the format of str.format, whose
+    doubled braces stand for literal ones. It is only read and split again once it is modified, so that edits to it are
+    seen by long-running processes.
+    :return: The part of the document before the content and the part after it
+    """
+    file_name = os.path.join(path_to_template, "generic_template.html")
+    return split_template(os.path.abspath(file_name), os.stat(file_name).st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def split_template(file_name: str, modification_time: int) -> tuple[str, str]:
+    """
+    Reads a template and splits it around its content placeholder, see load_template.
+    :param modification_time: The modification time of the file, only there to key the cache of the function
+    """
+    with open(file_name, "r") as f:
+        html = f.read()
+    parts = [[], []]
+    side = 0
+    for literal, field_name, _, _ in Formatter().parse(html):
+        parts[side].append(literal)
+        if field_name is None:
+            continue
+        if field_name != "content" or side == 1:
+            raise ValueError(f"The template must only have one {{content}} field, found {{{field_name}}}")
+        side = 1
+    if side == 0:
+        raise ValueError("The template has no {content} field")
+    return "".join(parts[0]), "".join(parts[1])
+
+
+def script_json(value) -> str:
+    """
+    Encodes a value as JSON that can be embedded in a script element.
+    """
+    return json.dumps(value, separators=(",", ":")).replace("</", "<\\/").replace("<!--", "\\u003c!--")
+
+
+def collapsed_html_chunks(parts: Iterator[Union[str, tuple[Content, bool]]],
+                          collapsed: deque[tuple[Content, bool, int]], ids: Iterator[int]) -> Iterator[str]:
+    """
+    Expands HTML parts like Content.html_chunks, except that the collapsible contents of the nodes met are left empty,
+    with an id in their data-chunk attribute, and appended to collapsed with that id to be rendered later.
+    :param ids: The ids given to the collapsed contents, in order
+    """
+    stack = [parts]
+    while stack:
+        for part in stack[-1]:
+            if isinstance(part, str):
+                yield part
+                continue
+            child, child_in_error = part
+            header = child.html_header(child_in_error)
+            if header is None:
+                stack.append(child.html_parts(child_in_error))
+                break
+            chunk_id = next(ids)
+            collapsed.append((child, child_in_error, chunk_id))
+            yield f'{header}<div class="content" data-chunk="{chunk_id}"></div>'
+        else:
+            stack.pop()
+
+
 class HTMLRenderer:
     def __init__(self, parsed_page: Content):
         """
@@ -19,9 +90,80 @@ class HTMLRenderer:
         Renders the parsed page from the html template
         :return: An HTML document representing the final report
         """
-        with open(os.path.join(path_to_template,"generic_template.html"), "r") as f:
-            html = f.read()
-        return html.format(content=self.__parsed_page.to_html(False))
+        return "".join(self.render_chunks(path_to_template))
+
+    def render_chunks(self, path_to_template: str = "") -> Iterator[str]:
+        """
+        Renders the parsed page from the html template, one chunk at a time
+        :return: The successive parts of the HTML document representing the final report
+        """
+        before, after = load_template(path_to_template)
+        yield before
+        yield from self.__parsed_page.html_chunks(False)
+        yield after
+
+    def render_to(self, fp: TextIO, path_to_template: str = "") -> None:
+        """
+        Renders the parsed page from the html template directly into a file object, without building the whole
+        report in memory
+        :param fp: The text file object the report is written to
+        """
+        for chunk in self.render_chunks(path_to_template):
+            fp.write(chunk)
+
+    def render_lazy_to(self, fp: TextIO, path_to_template: str = "", shard_directory: Optional[str] = None,
+                       shard_url: Optional[str] = None, shard_size: int = 1 << 20) -> None:
+        """
+        Renders a report that only holds the toggles of the top level of the parsed page with their error counts. The
+        content under every other toggle is stored as a JSON chunk of HTML, only added to the document by the template
+        script when the toggle is first opened, so that the report opens as fast whatever the size of the tree.
+        :param fp: The text file object the report is written to
+        :param shard_directory: Directory where the chunks are written, in script files of about shard_size
+        characters. If None, they are embedded in the report after the top level.
+        :param shard_url: URL of the shard directory from the report, by default its name, for a shard directory
+        next to the report
+        :param shard_size: Number of characters of HTML after which a shard is closed
+        """
+        before, after = load_template(path_to_template)
+        fp.write(before)
+        collapsed: deque[tuple[Content, bool, int]] = deque()
+        ids = count()
+        # The root is shown as usual, with the contents of the toggles in it collapsed
+        for chunk in collapsed_html_chunks(self.__parsed_page.html_parts(False), collapsed, ids):
+            fp.write(chunk)
+        if shard_directory is not None:
+            os.makedirs(shard_directory, exist_ok=True)
+        # Chunks are rendered in the order of their ids, which is breadth first, and shards hold consecutive ids
+        shard_starts = []
+        shard: list[str] = []
+        shard_length = 0
+        while collapsed or shard:
+            if collapsed:
+                node, is_in_error, chunk_id = collapsed.popleft()
+                if not shard:
+                    shard_starts.append(chunk_id)
+                html = "".join(collapsed_html_chunks(node.html_content_parts(is_in_error), collapsed, ids))
+                shard.append(html)
+                shard_length += len(html)
+            if shard and (shard_length >= shard_size or not collapsed):
+                self.__write_shard(fp, shard_directory, len(shard_starts) - 1, shard)
+                shard = []
+                shard_length = 0
+        if shard_directory is not None and shard_url is None:
+            shard_url = os.path.basename(os.path.normpath(shard_directory))
+        fp.write(f'<script type="application/json" id="spec-merger-shards">'
+                 f'{script_json({"starts": shard_starts, "url": shard_url if shard_directory is not None else None})}'
+                 f'</script>')
+        fp.write(after)
+
+    @staticmethod
+    def __write_shard(fp: TextIO, shard_directory: Optional[str], index: int, chunks: list[str]):
+        if shard_directory is None:
+            fp.write(f'<script type="application/json" id="spec-merger-shard-{index}">{script_json(chunks)}</script>')
+            return
+        # Shards are scripts rather than JSON files, as browsers do not let pages opened from disk fetch files
+        with open(os.path.join(shard_directory, f"{index}.js"), "w") as f:
+            f.write(f"specMergerShard({index}, {json.dumps(chunks, separators=(',', ':'))});\n")
 
     def get_errors(self) -> ErrorWarningCount:
         """
@@ -0,0 +1,301 @@
+import dataclasses
+import json
+from typing import Iterable, Iterator, Optional, TextIO, Union
+
+from .aligner_utils import Content, Position, ReportErrorType
+from .content_classes.alignment_issue import AlignmentIssue
+from .content_classes.bag import Bag
+from .content_classes.dictionary import Dictionary
+from .content_classes.misalignment import Misalignment
+from .content_classes.ok_summary import OKSummary
+from .content_classes.ordered_dictionary import OrderedDictionnary
+from .content_classes.ordered_seq import OrderedSeq
+from .content_classes.skipped_subtree import SkippedSubtree
+from .content_classes.string import String
+from .content_classes.wildcard import WildCard
+from .error_warning_count import ErrorWarningCount
+from .position_table import LinePosition
+from .tree_utils import children
+
+TREE_FORMAT = "spec-merger-tree"
+TREE_FORMAT_VERSION = 1
+
+
+def class_name(position_class: type) -> str:
+    return f"{position_class.__module__}:{position_class.__qualname__}"
+
+
+def position_classes_by_name(position_classes: Iterable[type]) -> dict[str, type[Position]]:
+    """
+    Returns the position classes that position_from_json may build, by the name position_to_json gives them: the
+    given ones and LinePosition.
+    """
+    by_name = {}
+    for position_class in (LinePosition, *position_classes):
+        if not (isinstance(position_class, type) and issubclass(position_class, Position)):
+            raise TypeError(f"{position_class!r} is not a Position class")
+        by_name[class_name(position_class)] = position_class
+    return by_name
+
+
+def position_to_json(position: Union[None, Position, tuple[Optional[Position], Optional[Position]]]):
+    """
+    Encodes a position, or a pair of positions, as JSON. Positions are dataclasses or LinePositions, encoded by their
+    fields and the import path of their class, so that they can be decoded by position_from_json.
+    """
+    if position is None:
+        return None
+    if isinstance(position, tuple):
+        return [position_to_json(side) for side in position]
+    encoded = {"class": class_name(type(position))}
+    names = position.fields if isinstance(position, LinePosition) else [field.name for field in
+                                                                         dataclasses.fields(position)]
+    for name in names:
+        encoded[name] = getattr(position, name)
+    return encoded
+
+
+def position_from_json(encoded, position_classes: dict[str, type[Position]]) \
+        -> Union[None, Position, tuple[Optional[Position], Optional[Position]]]:
+    """
+    Decodes a position encoded by position_to_json. Its class must be one of the allowed position classes, which is
+    built from the fields of the position, the lists in them being turned back into tuples, as positions are expected
+    to be hashable. Nothing is imported, but the fields are given to the constructor as they are, so the classes
+    allowed should not act on them beyond storing them unless the stream is trusted.
+    :param position_classes: The position classes allowed, by name, see position_classes_by_name
+    """
+    if encoded is None:
+        return None
+    if isinstance(encoded, list):
+        return tuple(position_from_json(side, position_classes) for side in encoded)
+    position_class = position_classes.get(encoded["class"])
+    if position_class is None:
+        raise ValueError(f"Position class {encoded['class']} is not among the allowed position classes")
+    return position_class(**{name: to_tuples(value) for name, value in encoded.items() if name != "class"})
+
+
+def to_tuples(value):
+    if isinstance(value, list):
+        return tuple(to_tuples(element) for element in value)
+    return value
+
+
+def excerpt(node: Content, length: int = 80) -> str:
+    """
+    Returns a compact text rendering of a subtree, cut after about length characters.
+    """
+    pieces = []
+    size = 0
+    # The stack holds the nodes still to render, and the strings to write between them
+    stack: list[Union[str, Content]] = [node]
+    while stack and size <= length:
+        current = stack.pop()
+        match current:
+            case str():
+                piece = current
+            case String():
+                piece = json.dumps(current.value, ensure_ascii=False)
+            case WildCard():
+                piece = "*"
+            case OKSummary():
+                piece = f"OK ({current.node_count} nodes)"
+            case SkippedSubtree():
+                piece = "SKIPPED"
+            case OrderedDictionnary() | Dictionary():
+                piece = "{"
+                stack.append("}")
+                keys = current.entries_list if isinstance(current, OrderedDictionnary) else list(current.entries)
+                for index, key in reversed(list(enumerate(keys))):
+                    stack.append(current.entries[key])
+                    stack.append(("" if index == 0 else ", ") + json.dumps(key, ensure_ascii=False) + ": ")
+            case OrderedSeq() | Bag():
+                piece = "[" if isinstance(current, OrderedSeq) else "bag["
+                stack.append("]")
+                elements = current.sequence if isinstance(current, OrderedSeq) else current.bag
+                for index, element in reversed(list(enumerate(elements))):
+                    stack.append(element)
+                    if index > 0:
+                        stack.append(", ")
+            case _:
+                piece = type(current).__name__
+        pieces.append(piece)
+        size += len(piece)
+    text = "".join(pieces)
+    if stack or len(text) > length:
+        return text[:length] + "..."
+    return text
+
+
+def finding(path: list[Union[str, int]], node: Union[Misalignment, AlignmentIssue], excerpt_length: int) -> dict:
+    def side(position: Optional[Position], value: Optional[Content]) -> Optional[dict]:
+        if position is None and value is None:
+            return None
+        return {"position": position_to_json(position),
+                "excerpt": excerpt(value, excerpt_length) if value is not None else None}
+
+    if isinstance(node, Misalignment):
+        error = node.error
+        left = side(node.left.position if node.left is not None else None, node.left)
+        right = side(node.right.position if node.right is not None else None, node.right)
+    else:
+        error = node.warning
+        positions = node.value.position if isinstance(node.value.position, tuple) else (node.value.position, None)
+        left = side(positions[0], None)
+        right = side(positions[1], None)
+    return {"path": path,
+            "error": error.name,
+            "severity": "error" if error.is_error() else "warning",
+            "left": left,
+            "right": right}
+
+
+def iter_findings(result: Content, excerpt_length: int = 80) -> Iterator[dict]:
+    """
+    Yields one JSON-serializable finding per misalignment and alignment issue of an alignment result, in the order of
+    the reports, with its path in the result: the keys of the dictionaries and the indices in the sequences and bags
+    leading to it. The subtrees without errors or warnings are skipped.
+    """
+    stack: list[tuple[Content, list[Union[str, int]]]] = [(result, [])]
+    while stack:
+        node, path = stack.pop()
+        if node.count_errors() == ErrorWarningCount(0, 0):
+            continue
+        if isinstance(node, (Misalignment, AlignmentIssue)):
+            yield finding(path, node, excerpt_length)
+            if isinstance(node, Misalignment):
+                continue
+        node_children = list(children(node))
+        if isinstance(node, Dictionary):
+            # Dictionaries are reported by sorted keys
+            node_children.sort(key=lambda item: item[0])
+        for index, (key, child) in reversed(list(enumerate(node_children))):
+            if isinstance(node, AlignmentIssue):
+                stack.append((child, path))
+            else:
+                stack.append((child, path + [key if key is not None else index]))
+
+
+def write_findings(result: Content, fp: TextIO, excerpt_length: int = 80) -> None:
+    """
+    Writes the findings of an alignment result as JSON Lines, one finding per line, see iter_findings.
+    """
+    for item in iter_findings(result, excerpt_length):
+        fp.write(json.dumps(item, ensure_ascii=False))
+        fp.write("\n")
+
+
+def node_to_json(node: Content) -> dict:
+    encoded = {"type": type(node).__name__, "position": position_to_json(node.position)}
+    match node:
+        case String():
+            encoded["value"] = node.value
+            if node.chars_useless != String.__dataclass_fields__["chars_useless"].default:
+                encoded["chars_useless"] = node.chars_useless
+        case OrderedDictionnary():
+            encoded["keys"] = node.entries_list
+        case Dictionary():
+            encoded["keys"] = list(node.entries)
+        case OrderedSeq():
+            encoded["length"] = len(node.sequence)
+        case Bag():
+            encoded["length"] = len(node.bag)
+        case Misalignment():
+            encoded["error"] = node.error.name
+            encoded["sides"] = [node.left is not None, node.right is not None]
+        case AlignmentIssue():
+            encoded["warning"] = node.warning.name
+        case OKSummary():
+            encoded["node_count"] = node.node_count
+        case WildCard() | SkippedSubtree():
+            pass
+        case _:
+            raise ValueError(f"Cannot encode nodes of type {type(node).__name__}")
+    return encoded
+
+
+def write_tree(node: Content, fp: TextIO) -> None:
+    """
+    Writes a tree, such as a parsed page or an alignment result, as JSON Lines: a header line, then one line per node
+    in preorder, each one followed by its children. The tree can be read back with read_tree.
+    """
+    fp.write(json.dumps({"format": TREE_FORMAT, "version": TREE_FORMAT_VERSION}))
+    fp.write("\n")
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        fp.write(json.dumps(node_to_json(current), ensure_ascii=False))
+        fp.write("\n")
+        stack.extend(reversed([child for _, child in children(current)]))
+
+
+def child_count(encoded: dict) -> int:
+    match encoded["type"]:
+        case "Dictionary" | "OrderedDictionnary":
+            return len(encoded["keys"])
+        case "OrderedSeq" | "Bag":
+            return encoded["length"]
+        case "Misalignment":
+            return sum(encoded["sides"])
+        case "AlignmentIssue":
+            return 1
+        case _:
+            return 0
+
+
+def node_from_json(encoded: dict, node_children: list[Content], position_classes: dict[str, type[Position]]) -> Content:
+    position = position_from_json(encoded["position"], position_classes)
+    match encoded["type"]:
+        case "String":
+            if "chars_useless" in encoded:
+                return String(position, encoded["value"], encoded["chars_useless"])
+            return String(position, encoded["value"])
+        case "WildCard":
+            return WildCard(position)
+        case "Dictionary":
+            return Dictionary(position, dict(zip(encoded["keys"], node_children)))
+        case "OrderedDictionnary":
+            return OrderedDictionnary(position, dict(zip(encoded["keys"], node_children)), encoded["keys"])
+        case "OrderedSeq":
+            return OrderedSeq(position, node_children)
+        case "Bag":
+            return Bag(position, node_children)
+        case "Misalignment":
+            sides = iter(node_children)
+            left = next(sides) if encoded["sides"][0] else None
+            right = next(sides) if encoded["sides"][1] else None
+            return Misalignment(position, left, right, ReportErrorType[encoded["error"]])
+        case "AlignmentIssue":
+            return AlignmentIssue(position, node_children[0], ReportErrorType[encoded["warning"]])
+        case "OKSummary":
+            return OKSummary(position, encoded["node_count"])
+        case "SkippedSubtree":
+            return SkippedSubtree(position)
+        case unknown:
+            raise ValueError(f"Unknown node type {unknown}")
+
+
+def read_tree(fp: TextIO, position_classes: Iterable[type[Position]] = ()) -> Content:
+    """
+    Reads a tree written by write_tree.
+    :param position_classes: The Position subclasses the positions of the tree may have besides LinePosition. Positions
+    of any other class are rejected, as the stream cannot be trusted to name the classes to build.
+    """
+    position_classes = position_classes_by_name(position_classes)
+    header = json.loads(fp.readline())
+    if header.get("format") != TREE_FORMAT or header.get("version") != TREE_FORMAT_VERSION:
+        raise ValueError(f"Not a version {TREE_FORMAT_VERSION} {TREE_FORMAT} stream")
+    # Each frame holds a node whose children are being read, with the number of children it still waits for
+    stack: list[tuple[dict, list[Content], int]] = []
+    for line in fp:
+        encoded = json.loads(line)
+        node_children: list[Content] = []
+        remaining = child_count(encoded)
+        while remaining == 0:
+            node = node_from_json(encoded, node_children, position_classes)
+            if not stack:
+                return node
+            encoded, node_children, remaining = stack.pop()
+            node_children.append(node)
+            remaining -= 1
+        stack.append((encoded, node_children, remaining))
+    raise ValueError("Truncated tree stream")
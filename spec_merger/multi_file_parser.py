@@ -0,0 +1,122 @@
+import fnmatch
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from html import escape
+from itertools import repeat
+from typing import Callable, Iterable, Optional
+
+from .aligner_utils import Content, Position
+from .content_classes.dictionary import Dictionary
+from .tree_utils import children
+from .utils import ParsedPage, Parser, Path
+
+
+@dataclass(frozen=True, slots=True)
+class PathPosition(Position):
+    uri: str
+
+    def html_str(self) -> str:
+        return f"<b>{escape(self.uri)}</b>"
+
+
+def find_source_files(path: Path, pattern: str = "*") -> list[str]:
+    """
+    Returns the file of the path, or, for a directory, the files of its tree whose name matches the pattern, sorted so
+    that the parsed page does not depend on the order of the directory entries. Hidden files and directories are
+    skipped.
+    """
+    if not path.is_dir:
+        return [path.uri]
+    files = []
+    for directory, directories, file_names in os.walk(path.uri):
+        directories[:] = [name for name in directories if not name.startswith(".")]
+        files.extend(os.path.join(directory, name) for name in file_names
+                     if not name.startswith(".") and fnmatch.fnmatch(name, pattern))
+    return sorted(files)
+
+
+def parse_file(parser_factory: Callable[[str], Parser], file_name: str) -> ParsedPage:
+    return parser_factory(file_name).get_parsed_page()
+
+
+class MultiFileParser(Parser):
+    """
+    Parser of a file or a directory tree, which parses each source file with its own parser and merges the sections of
+    their pages into a single page. Sections are kept in the order of the sorted file names, and a section title found
+    in several files keeps the section of the first one, the files of each duplicate being listed in
+    duplicate_sections.
+    """
+
+    def __init__(self, path: Path, parser_factory: Callable[[str], Parser], pattern: str = "*", jobs: int = 1,
+                 name: Optional[str] = None):
+        """
+        :param path: The file or directory to parse
+        :param parser_factory: Function returning the parser of a file from its name, such as a Parser class. With more
+        than one job, it is sent to the worker processes, so it must be picklable unless processes are started with
+        fork.
+        :param pattern: Shell-style pattern of the names of the files to parse in a directory, such as "*.py"
+        :param jobs: Number of processes parsing the files
+        :param name: Name of the parsed page, the name of the parser of the first file by default
+        """
+        assert jobs >= 1
+        self.path = path
+        self.parser_factory = parser_factory
+        self.pattern = pattern
+        self.jobs = jobs
+        self.name = name or getattr(parser_factory, "__name__", "MultiFileParser")
+        self.parsed_page: Optional[ParsedPage] = None
+        # Page of each source file, kept so that update only parses the changed files again
+        self.file_pages: dict[str, ParsedPage] = {}
+        self.duplicate_sections: dict[str, list[str]] = {}
+
+    def parse_files(self, file_names: list[str]) -> list[ParsedPage]:
+        if self.jobs == 1 or len(file_names) <= 1:
+            return [parse_file(self.parser_factory, file_name) for file_name in file_names]
+        with ProcessPoolExecutor(min(self.jobs, len(file_names))) as pool:
+            chunksize = max(1, len(file_names) // (4 * self.jobs))
+            return list(pool.map(parse_file, repeat(self.parser_factory), file_names, chunksize=chunksize))
+
+    def get_parsed_page(self) -> ParsedPage:
+        if self.parsed_page is not None:
+            return self.parsed_page
+        file_names = self.source_files()
+        self.file_pages = dict(zip(file_names, self.parse_files(file_names)))
+        return self.__merge()
+
+    def update(self, changed_files: Iterable[str]) -> ParsedPage:
+        """
+        Returns the page after some source files changed: the changed files and the files added since are parsed again,
+        the removed ones are dropped, and the sections of the other files are kept as they are, as the same objects.
+        """
+        changed_files = set(changed_files)
+        file_names = self.source_files()
+        to_parse = [file_name for file_name in file_names
+                    if file_name in changed_files or file_name not in self.file_pages]
+        parsed = dict(zip(to_parse, self.parse_files(to_parse)))
+        self.file_pages = {file_name: parsed[file_name] if file_name in parsed else self.file_pages[file_name]
+                           for file_name in file_names}
+        return self.__merge()
+
+    def __merge(self) -> ParsedPage:
+        sections: dict[str, Content] = {}
+        section_files: dict[str, str] = {}
+        self.duplicate_sections = {}
+        for file_name, page in self.file_pages.items():
+            for title, section in children(page.entries):
+                if title in sections:
+                    self.duplicate_sections.setdefault(title, [section_files[title]]).append(file_name)
+                else:
+                    sections[title] = section
+                    section_files[title] = file_name
+        self.parsed_page = ParsedPage(self.name, Dictionary(PathPosition(self.path.uri), sections))
+        return self.parsed_page
+
+    def source_files(self) -> list[str]:
+        return find_source_files(self.path, self.pattern)
+
+    def cache_parameters(self) -> tuple:
+        factory = self.parser_factory
+        return (self.path.uri, self.pattern, self.name,
+                f"{getattr(factory, '__module__', '')}.{getattr(factory, '__qualname__', repr(factory))}",
+                getattr(factory, "version", None))
@@ -0,0 +1,110 @@
+import inspect
+import pickle
+from hashlib import blake2b
+from typing import Optional
+
+from .alignment_cache import code_fingerprint
+from .disk_cache import DiskCache
+from .utils import ParsedPage, Parser
+
+# Must be increased whenever the node classes change, so that older pages are not reused
+CACHE_VERSION = 2
+
+
+def parser_fingerprint(parser: Parser) -> bytes:
+    """
+    Fingerprints a parser by its class, its version, its cache parameters and the bytecode of the methods of its
+    classes, so that pages parsed by another parser, or another version of it, are not reused.
+    """
+    hasher = blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    parser_class = type(parser)
+    hasher.update(f"{parser_class.__module__}.{parser_class.__qualname__}:{parser_class.version}".encode())
+    hasher.update(repr(parser.cache_parameters()).encode())
+    for cls in parser_class.__mro__:
+        if cls is Parser:
+            break
+        for name, function in sorted(vars(cls).items()):
+            code = getattr(inspect.unwrap(getattr(function, "__func__", function)), "__code__", None)
+            if code is not None:
+                hasher.update(name.encode())
+                hasher.update(code_fingerprint(code))
+    return hasher.digest()
+
+
+class ParsedPageCache:
+    """
+    On-disk cache of parsed pages, keyed by the content of the source files of their parser and a fingerprint of the
+    parser. The least recently used pages are evicted once the cache exceeds its size limit.
+    """
+
+    def __init__(self, directory: str, size_limit: int = 1 << 30):
+        """
+        :param directory: The directory where the pages are stored, created if needed
+        :param size_limit: Maximal size of the cache directory, in bytes
+        """
+        self.__files = DiskCache(directory, size_limit)
+
+    @staticmethod
+    def key(parser: Parser) -> Optional[str]:
+        """
+        Returns the key of the page of a parser, or None if it has no source files to key it by.
+        """
+        source_files = parser.source_files()
+        if not source_files:
+            return None
+        hasher = blake2b(parser_fingerprint(parser), digest_size=20)
+        for source_file in source_files:
+            # The names of the files are part of the key, as the positions of the parsed page usually refer to them
+            hasher.update(source_file.encode())
+            with open(source_file, "rb") as f:
+                hasher.update(blake2b(f.read(), digest_size=20).digest())
+        return hasher.hexdigest()
+
+    def load(self, key: str) -> Optional[ParsedPage]:
+        data = self.__files.read(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def store(self, key: str, page: ParsedPage):
+        self.__files.write(key, pickle.dumps(page, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def get_parsed_page(self, parser: Parser) -> ParsedPage:
+        """
+        Returns the page of the parser from the cache, or parses it and stores it if it is not there yet.
+        """
+        key = self.key(parser)
+        if key is None:
+            return parser.get_parsed_page()
+        page = self.load(key)
+        if page is None:
+            page = parser.get_parsed_page()
+            self.store(key, page)
+        return page
+
+
+class CachedParser(Parser):
+    """
+    Parser returning the page of another parser from a ParsedPageCache, so that the page is only parsed again when the
+    source files or the parser change.
+    """
+
+    def __init__(self, parser: Parser, cache: ParsedPageCache):
+        self.parser = parser
+        self.cache = cache
+        self.name = parser.name
+        self.parsed_page: Optional[ParsedPage] = None
+
+    def get_parsed_page(self) -> ParsedPage:
+        if self.parsed_page is None:
+            self.parsed_page = self.cache.get_parsed_page(self.parser)
+        return self.parsed_page
+
+    def source_files(self) -> list[str]:
+        return self.parser.source_files()
+
+    def cache_parameters(self) -> tuple:
+        return self.parser.cache_parameters()
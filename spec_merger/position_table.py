@@ -0,0 +1,222 @@
+import os
+from array import array
+from html import escape
+from typing import Iterable, Optional
+
+from .aligner_utils import Content, Position
+from .tree_utils import preorder
+
+# File id of the rows freed by PositionTable.retain, which no range matches
+FREED = 0xFFFFFFFF
+# Handles hold their row in their low bits, and the generation of the row in the others
+ROW_BITS = 32
+ROW_MASK = (1 << ROW_BITS) - 1
+
+
+class PositionTable:
+    """
+    Table of the line ranges of the positions of parsed pages, kept in arrays instead of one object per range. File
+    names are interned to ids, and each row holds the id of a file and the first and last lines of a range, which
+    takes 12 bytes. Each range has a single row, found through a hash index kept in an array as well, so that parsing
+    or unpickling the same documents again adds no row. Rows no longer used are only freed by retain.
+    Freed rows are reused by the next ranges, but the generation of a row is increased whenever it is freed, and
+    handles hold the generation of their row, so that the handles of freed rows raise a ValueError instead of standing
+    for the new ranges of their rows. The handles of rows never freed are the rows themselves.
+    """
+
+    def __init__(self):
+        self.file_names: list[str] = []
+        self.__file_ids: dict[str, int] = {}
+        # Start of the HTML of the positions of each file, rendered once
+        self.__file_html: list[Optional[str]] = []
+        self.__files = array("I")
+        self.__first_lines = array("I")
+        self.__last_lines = array("I")
+        self.__generations = array("I")
+        # Open addressing hash index of the rows by range, holding the handle of a row plus one, or 0 in empty slots
+        self.__index = array("I", bytes(4 * 8))
+        # Rows freed by retain, reused by the next ranges added
+        self.__free_rows: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.__files) - len(self.__free_rows)
+
+    def file_id(self, file_name: str) -> int:
+        file_id = self.__file_ids.get(file_name)
+        if file_id is None:
+            file_id = self.__file_ids[file_name] = len(self.file_names)
+            self.file_names.append(file_name)
+            self.__file_html.append(None)
+        return file_id
+
+    def add(self, file_name: str, first_line: int, last_line: int) -> int:
+        """
+        Adds a range of lines of a file to the table, unless it is already in it.
+        :return: The handle of the range, its row in the table along with the generation of the row
+        """
+        file_id = self.__file_ids.get(file_name)
+        if file_id is None:
+            file_id = self.file_id(file_name)
+        files, first_lines, last_lines, index = self.__files, self.__first_lines, self.__last_lines, self.__index
+        mask = len(index) - 1
+        slot = hash((file_id, first_line, last_line)) & mask
+        entry = index[slot]
+        while entry:
+            row = entry - 1
+            if files[row] == file_id and first_lines[row] == first_line and last_lines[row] == last_line:
+                return row | self.__generations[row] << ROW_BITS
+            slot = (slot + 1) & mask
+            entry = index[slot]
+        if self.__free_rows:
+            row = self.__free_rows.pop()
+            files[row] = file_id
+            first_lines[row] = first_line
+            last_lines[row] = last_line
+        else:
+            row = len(files)
+            files.append(file_id)
+            first_lines.append(first_line)
+            last_lines.append(last_line)
+            self.__generations.append(0)
+        index[slot] = row + 1
+        # The index is kept at most half full, so that probes stay short
+        if 2 * len(self) > len(index):
+            self.__rebuild_index(2 * len(index))
+        return row | self.__generations[row] << ROW_BITS
+
+    def __row(self, handle: int) -> int:
+        row = handle & ROW_MASK
+        # Freeing a row increases its generation, so that it is never the one of a handle of a freed row
+        if handle >> ROW_BITS != self.__generations[row]:
+            raise ValueError(f"Handle {int(handle)} of the position table was freed by retain, and no longer stands "
+                             "for a range")
+        return row
+
+    def row(self, handle: int) -> tuple[str, int, int]:
+        """
+        Returns the file name and the first and last lines of a range.
+        """
+        row = self.__row(handle)
+        return self.file_names[self.__files[row]], self.__first_lines[row], self.__last_lines[row]
+
+    def retain(self, handles: Iterable[int]) -> int:
+        """
+        Frees every row of the table but the ones of the given handles, so that the next ranges added reuse them.
+        The handles of the freed rows then raise a ValueError when used.
+        :return: The number of rows freed
+        """
+        kept = {handle & ROW_MASK for handle in handles if handle >> ROW_BITS == self.__generations[handle & ROW_MASK]}
+        freed = 0
+        for row, file_id in enumerate(self.__files):
+            if file_id != FREED and row not in kept:
+                self.__files[row] = FREED
+                self.__generations[row] = (self.__generations[row] + 1) & 0xFFFFFFFF
+                self.__free_rows.append(row)
+                freed += 1
+        if freed:
+            size = len(self.__index)
+            while size > 8 and 4 * len(self) <= size // 2:
+                size //= 2
+            self.__rebuild_index(size)
+        return freed
+
+    def __rebuild_index(self, size: int):
+        index = array("I", bytes(4 * size))
+        mask = size - 1
+        for row, file_id in enumerate(self.__files):
+            if file_id == FREED:
+                continue
+            slot = hash((file_id, self.__first_lines[row], self.__last_lines[row])) & mask
+            while index[slot]:
+                slot = (slot + 1) & mask
+            index[slot] = row + 1
+        self.__index = index
+
+    def html_str(self, handle: int) -> str:
+        row = self.__row(handle)
+        file_id = self.__files[row]
+        start = self.__file_html[file_id]
+        if start is None:
+            file_name = self.file_names[file_id]
+            start = self.__file_html[file_id] = (f"<a download href='file://{escape(os.path.abspath(file_name))}'>"
+                                                 f"<b>{escape(os.path.basename(file_name))}</b>: ")
+        return f"{start}{self.__first_lines[row]}-{self.__last_lines[row]}</a>"
+
+
+# Table of the positions of the current process
+POSITION_TABLE = PositionTable()
+
+
+class LinePosition(int, Position):
+    """
+    Position of a range of lines in a file, such as the lines of a parsed element of a source file. The range is kept
+    in the position table of the process, and the position is only its handle, a small integer. Positions are pickled
+    as their file name and lines, and added again to the table of the process unpickling them.
+    Positions are equal when their ranges are, but never equal to plain integers. Positions whose row was freed by
+    retain_positions raise a ValueError when their range is used.
+    """
+    __slots__ = ()
+    # Arguments of the constructor, which json_lines writes in place of dataclass fields
+    fields = ("file_name", "first_line", "last_line")
+
+    def __new__(cls, file_name: str, first_line: int, last_line: int):
+        return super().__new__(cls, POSITION_TABLE.add(file_name, first_line, last_line))
+
+    def __init__(self, file_name: str, first_line: int, last_line: int):
+        # The range is added by __new__, as integers are immutable
+        super().__init__()
+
+    @property
+    def file_name(self) -> str:
+        return POSITION_TABLE.row(self)[0]
+
+    @property
+    def first_line(self) -> int:
+        return POSITION_TABLE.row(self)[1]
+
+    @property
+    def last_line(self) -> int:
+        return POSITION_TABLE.row(self)[2]
+
+    def html_str(self) -> str:
+        return POSITION_TABLE.html_str(self)
+
+    def __eq__(self, other) -> bool:
+        # The table gives each range a single handle, so that comparing the handles compares the ranges. Plain
+        # integers are not positions, so the comparison is not left to them.
+        return isinstance(other, LinePosition) and int(self) == int(other)
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    def __hash__(self) -> int:
+        return int.__hash__(self)
+
+    def __bool__(self) -> bool:
+        # Unlike the integer, the first handle of the table is a position like any other
+        return True
+
+    def __repr__(self) -> str:
+        try:
+            file_name, first_line, last_line = POSITION_TABLE.row(self)
+        except ValueError:
+            # Kept readable, as it may be shown in the report of the error
+            return f"LinePosition(<freed handle {int(self)}>)"
+        return f"LinePosition({file_name!r}, {first_line}, {last_line})"
+
+    def __reduce__(self):
+        return LinePosition, POSITION_TABLE.row(self)
+
+
+def retain_positions(trees: Iterable[Content]) -> int:
+    """
+    Frees the rows of the position table of the process that no LinePosition of the given trees uses. The positions
+    of any other tree then raise a ValueError when their range is used.
+    :return: The number of rows freed
+    """
+    handles = set()
+    for tree in trees:
+        for node in preorder(tree):
+            positions = node.position if isinstance(node.position, tuple) else (node.position,)
+            handles.update(int(position) for position in positions if isinstance(position, LinePosition))
+    return POSITION_TABLE.retain(handles)
@@ -0,0 +1,102 @@
+from typing import Hashable, Optional, Sequence
+
+
+def shortest_edit_matches(left: Sequence[Hashable], right: Sequence[Hashable],
+                          max_edits: int) -> Optional[list[tuple[int, int]]]:
+    """
+    Computes a longest common subsequence of two sequences with Myers' O(ND) algorithm.
+    :param max_edits: The number of insertions and deletions after which the search is abandoned, which bounds the
+    time and memory used to O((N + M) * max_edits) and O(max_edits^2)
+    :return: The (left index, right index) pairs of matched elements in increasing order, or None if the sequences
+    need more than max_edits insertions and deletions
+    """
+    n, m = len(left), len(right)
+    offset = n + m + 1
+    frontier = [0] * (2 * offset + 1)
+    # trace[edits] holds the furthest x reached on each diagonal -edits..edits after that many edits
+    trace = []
+    for edits in range(min(n + m, max_edits) + 1):
+        for diagonal in range(-edits, edits + 1, 2):
+            if diagonal == -edits or (diagonal != edits and
+                                      frontier[offset + diagonal - 1] < frontier[offset + diagonal + 1]):
+                x = frontier[offset + diagonal + 1]
+            else:
+                x = frontier[offset + diagonal - 1] + 1
+            y = x - diagonal
+            while x < n and y < m and left[x] == right[y]:
+                x += 1
+                y += 1
+            frontier[offset + diagonal] = x
+            if x >= n and y >= m:
+                return backtrack_matches(trace, edits, n, m)
+        trace.append(frontier[offset - edits:offset + edits + 1])
+    return None
+
+
+def backtrack_matches(trace: list[list[int]], edits: int, x: int, y: int) -> list[tuple[int, int]]:
+    matches = []
+    for edits in range(edits, 0, -1):
+        previous = trace[edits - 1]
+        diagonal = x - y
+        if diagonal == -edits or (diagonal != edits and
+                                  previous[diagonal - 1 + edits - 1] < previous[diagonal + 1 + edits - 1]):
+            previous_diagonal = diagonal + 1
+        else:
+            previous_diagonal = diagonal - 1
+        previous_x = previous[previous_diagonal + edits - 1]
+        previous_y = previous_x - previous_diagonal
+        while x > previous_x and y > previous_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = previous_x, previous_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        matches.append((x, y))
+    matches.reverse()
+    return matches
+
+
+def diff_opcodes(left: Sequence[Hashable], right: Sequence[Hashable],
+                 max_edits: int = 2000) -> list[tuple[str, int, int, int, int]]:
+    """
+    Diffs two sequences of hashable elements, such as node digests.
+    :param max_edits: Bound on the insertions and deletions searched for, past which the differing middle of the
+    sequences is reported as a single replace
+    :return: Opcodes in the format of difflib.SequenceMatcher.get_opcodes: (tag, i1, i2, j1, j2) tuples where tag is one
+    of 'equal', 'delete', 'insert' or 'replace', covering both sequences in order
+    """
+    # Common prefix and suffix are trimmed first, as most sequences are nearly equal
+    prefix = 0
+    while prefix < len(left) and prefix < len(right) and left[prefix] == right[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < len(left) - prefix and suffix < len(right) - prefix and
+           left[len(left) - suffix - 1] == right[len(right) - suffix - 1]):
+        suffix += 1
+    left_end, right_end = len(left) - suffix, len(right) - suffix
+    middle = shortest_edit_matches(left[prefix:left_end], right[prefix:right_end], max_edits)
+    if middle is None:
+        middle = []
+    matches = [(i, i) for i in range(prefix)]
+    matches += [(i + prefix, j + prefix) for i, j in middle]
+    matches += [(left_end + i, right_end + i) for i in range(suffix)]
+
+    opcodes = []
+    i = j = 0
+    for match_i, match_j in matches + [(len(left), len(right))]:
+        if i < match_i and j < match_j:
+            opcodes.append(("replace", i, match_i, j, match_j))
+        elif i < match_i:
+            opcodes.append(("delete", i, match_i, j, j))
+        elif j < match_j:
+            opcodes.append(("insert", i, i, j, match_j))
+        if match_i < len(left):
+            if opcodes and opcodes[-1][0] == "equal":
+                tag, i1, _, j1, _ = opcodes.pop()
+                opcodes.append((tag, i1, match_i + 1, j1, match_j + 1))
+            else:
+                opcodes.append(("equal", match_i, match_i + 1, match_j, match_j + 1))
+        i, j = match_i + 1, match_j + 1
+    return opcodes
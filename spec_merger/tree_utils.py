@@ -0,0 +1,86 @@
+from typing import Iterable, Optional
+
+from .aligner_utils import Content
+from .error_warning_count import ErrorWarningCount
+from .content_classes.alignment_issue import AlignmentIssue
+from .content_classes.bag import Bag
+from .content_classes.dictionary import Dictionary
+from .content_classes.misalignment import Misalignment
+from .content_classes.ok_summary import OKSummary
+from .content_classes.ordered_dictionary import OrderedDictionnary
+from .content_classes.ordered_seq import OrderedSeq
+
+
+def children(node: Content) -> Iterable[tuple[Optional[str], Content]]:
+    """
+    Returns the direct children of a node, with their key for dictionaries, as given by its keyed_child_nodes.
+    """
+    return node.keyed_child_nodes()
+
+
+def preorder(node: Content) -> list[Content]:
+    nodes = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        nodes.append(current)
+        stack.extend(reversed([child for _, child in children(current)]))
+    return nodes
+
+
+def node_count(node: Content) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(current.child_nodes())
+    return count
+
+
+def with_children(node: Content, new_children: list[Content]) -> Content:
+    """
+    Returns a copy of a node with other children, given in the order of children(node).
+    """
+    match node:
+        case OrderedDictionnary():
+            return OrderedDictionnary(node.position, dict(zip(node.entries_list, new_children)),
+                                      list(node.entries_list))
+        case Dictionary():
+            return Dictionary(node.position, dict(zip(node.entries.keys(), new_children)))
+        case OrderedSeq():
+            return OrderedSeq(node.position, new_children)
+        case Bag():
+            return Bag(node.position, new_children)
+        case AlignmentIssue():
+            return AlignmentIssue(node.position, new_children[0], node.warning)
+        case _:
+            return node
+
+
+def prune_ok(node: Content) -> Content:
+    """
+    Returns an alignment result where every subtree without any error or warning is replaced by an OKSummary of its
+    size. The nodes with errors or warnings are rebuilt around their pruned children, while misalignments are kept
+    whole, as their sides are what the report shows of the mismatch. Leaves are kept as they are.
+    """
+    # Nodes are processed from the bottom up, with an explicit stack as results may be deep. Each node to rebuild is
+    # pushed with its number of children, which are then the last pruned nodes.
+    pruned: list[Content] = []
+    stack: list[tuple[Content, Optional[int]]] = [(node, None)]
+    while stack:
+        current, child_count = stack.pop()
+        if child_count is not None:
+            new_children = pruned[len(pruned) - child_count:]
+            del pruned[len(pruned) - child_count:]
+            pruned.append(with_children(current, new_children))
+            continue
+        current_children = [child for _, child in children(current)]
+        if isinstance(current, Misalignment) or not current_children:
+            pruned.append(current)
+        elif current.count_errors() == ErrorWarningCount(0, 0):
+            pruned.append(OKSummary(current.position, node_count(current)))
+        else:
+            stack.append((current, len(current_children)))
+            stack.extend((child, None) for child in reversed(current_children))
+    return pruned[0]
@@ -26,8 +26,23 @@ class ParsedPage:
 
 class Parser(ABC):
     name: str
+    # Must be increased whenever the pages produced by the parser change, so that cached ones are not reused
+    version: int = 1
 
     @abstractmethod
     def get_parsed_page(self) -> ParsedPage:
         pass
 
+    def source_files(self) -> list[str]:
+        """
+        Returns the files the page is parsed from, by whose content it can be cached, or an empty list if the page
+        cannot be cached.
+        """
+        return []
+
+    def cache_parameters(self) -> tuple:
+        """
+        Returns the parameters of the parser that affect the parsed page, other than the content of its source files.
+        """
+        return ()
+
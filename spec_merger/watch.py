@@ -0,0 +1,250 @@
+import json
+import os
+import time
+from typing import Callable, Iterator, Optional, TypeVar
+
+from .aligner import Aligner
+from .aligner_utils import Content
+from .content_classes.dictionary import Dictionary
+from .json_lines import iter_findings
+from .multi_file_parser import MultiFileParser
+from .position_table import POSITION_TABLE, retain_positions
+from .utils import ParsedPage, Parser
+
+T = TypeVar("T")
+
+
+def finding_line(finding: dict) -> str:
+    return json.dumps(finding, ensure_ascii=False) + "\n"
+
+
+def file_stamp(file_name: str) -> Optional[tuple[int, int]]:
+    """
+    Returns the modification time and the size of a file, which change when it is saved, or None if it is missing.
+    """
+    try:
+        stat = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchedDocument:
+    """
+    Parsed page of a document, kept in memory and parsed again when its source files change. A MultiFileParser only
+    parses the changed files again, any other parser is built anew by its factory and parses the whole document.
+    """
+
+    def __init__(self, parser_factory: Callable[[], Parser]):
+        self.parser_factory = parser_factory
+        self.parser = parser_factory()
+        self.stamps: dict[str, Optional[tuple[int, int]]] = {}
+        self.page: Optional[ParsedPage] = None
+        self.refresh(())
+
+    def changed_files(self) -> set[str]:
+        """
+        Returns the source files that changed, appeared or disappeared since the document was last parsed.
+        """
+        file_names = self.parser.source_files()
+        changed = {file_name for file_name in file_names if file_stamp(file_name) != self.stamps.get(file_name)}
+        return changed | (self.stamps.keys() - set(file_names))
+
+    def refresh(self, changed_files: set[str]):
+        # The files are stamped before being parsed, so that a save during the parse is seen by the next poll
+        file_names = self.parser.source_files()
+        if not file_names:
+            raise ValueError(f"{type(self.parser).__name__} has no source files to watch")
+        self.stamps = {file_name: file_stamp(file_name) for file_name in file_names}
+        if self.page is None:
+            self.page = self.parser.get_parsed_page()
+        elif isinstance(self.parser, MultiFileParser):
+            self.page = self.parser.update(changed_files)
+        else:
+            self.parser = self.parser_factory()
+            self.page = self.parser.get_parsed_page()
+
+
+class Watcher:
+    """
+    Keeps the parsed pages of two documents and their alignment in memory, and brings them up to date when the source
+    files of the documents change. The entries of the top-level dictionaries are sections: only the sections of which
+    a side was parsed again are aligned again, along with the entries found on one side only, and the other sections
+    keep their alignment.
+    The line positions of the files parsed again no longer used by the documents or the last alignment are freed from
+    the position table whenever it has doubled, so positions kept from earlier alignments may then stand for other
+    ranges.
+    """
+
+    def __init__(self, left: Callable[[], Parser], right: Callable[[], Parser], aligner: Aligner):
+        """
+        :param left: Function building the parser of the left document, such as a parser class taking no argument
+        :param right: Function building the parser of the right document
+        :param aligner: The aligner of the documents, which aligns them at once the first time, with its jobs, and
+        then one changed section at a time
+        """
+        self.aligner = aligner
+        self.documents = (WatchedDocument(left), WatchedDocument(right))
+        self.result: Optional[Content] = None
+        # The pair of entries of each common section, with their alignment
+        self.sections: dict[str, tuple[Content, Content, Content]] = {}
+        # Number of sections aligned by the last call to align
+        self.realigned = 0
+        # Number of rows of the position table after it was last cleared of the positions no longer used
+        self.__position_rows = len(POSITION_TABLE)
+
+    def __remember_sections(self):
+        left, right = (document.page.entries for document in self.documents)
+        self.sections = {}
+        if not (isinstance(self.result, Dictionary) and self.aligner.has_sections(left, right)):
+            return
+        for key, right_entry in right.entries.items():
+            if key in left.entries and key in self.result.entries:
+                self.sections[key] = (left.entries[key], right_entry, self.result.entries[key])
+
+    def poll(self) -> bool:
+        """
+        Parses again the documents whose source files changed.
+        :return: Whether any did
+        """
+        changed = [document.changed_files() for document in self.documents]
+        for document, changed_files in zip(self.documents, changed):
+            if changed_files:
+                document.refresh(changed_files)
+        return any(changed)
+
+    def align(self) -> Content:
+        """
+        Brings the alignment of the documents up to date and returns it. The documents are aligned at once the first
+        time, and afterwards only their changed sections are aligned again.
+        """
+        left, right = (document.page.entries for document in self.documents)
+        self.realigned = 0
+        if self.result is None or not self.aligner.has_sections(left, right) or left.digest() == right.digest():
+            # Equal documents are aligned at once, and so are documents without sections
+            self.result = self.aligner.align(left, right)
+            self.__remember_sections()
+            self.realigned = len(self.sections)
+            self.__release_positions()
+            return self.result
+        entries = {}
+        sections = {}
+        for key, right_entry in right.entries.items():
+            left_entry = left.entries.get(key)
+            if left_entry is None:
+                continue
+            previous = self.sections.get(key)
+            if previous is not None and previous[0] is left_entry and previous[1] is right_entry:
+                result = previous[2]
+            else:
+                result = self.aligner.align_section(left_entry, right_entry, key)
+                self.realigned += 1
+            sections[key] = (left_entry, right_entry, result)
+            entries[key] = result
+        # The entries found on one side only are aligned together, as a misspelled key may be looked up among any of
+        # them
+        remaining = (Dictionary(left.position, {key: entry for key, entry in left.entries.items()
+                                                if key not in right.entries}),
+                     Dictionary(right.position, {key: entry for key, entry in right.entries.items()
+                                                 if key not in left.entries}))
+        if remaining[0].entries or remaining[1].entries:
+            entries.update(self.aligner.align_section(*remaining, None).entries)
+        self.sections = sections
+        self.result = Dictionary((left.position, right.position), entries)
+        self.__release_positions()
+        return self.result
+
+    def __release_positions(self):
+        # Parsing files again adds the ranges of their new positions to the table, so the rows of the positions no
+        # longer used are freed once in a while, which keeps the table within twice the rows in use
+        if len(POSITION_TABLE) <= 2 * self.__position_rows:
+            return
+        trees = [self.result]
+        for document in self.documents:
+            trees.append(document.page.entries)
+            if isinstance(document.parser, MultiFileParser):
+                # The sections hidden by the ones of the same title in other files come back if these are removed
+                trees.extend(page.entries for page in document.parser.file_pages.values())
+        retain_positions(trees)
+        self.__position_rows = len(POSITION_TABLE)
+
+    def run(self, on_change: Callable[[Content], None], interval: float = 0.5):
+        """
+        Polls the source files forever, calling on_change with the updated alignment after every change, until
+        interrupted.
+        :param interval: Time between two polls, in seconds
+        """
+        while True:
+            time.sleep(interval)
+            if self.poll():
+                on_change(self.align())
+
+
+class SectionMemo:
+    """
+    Renders a report section by section, keeping the rendering of each alignment of a top-level section, so that the
+    report of an updated result only renders again the sections that were aligned again.
+    """
+
+    def __init__(self):
+        self.__rendered: dict[tuple[int, object], tuple[Content, object]] = {}
+        self.__used: dict[tuple[int, object], tuple[Content, object]] = {}
+
+    def get(self, node: Content, variant: object, render: Callable[[], T]) -> T:
+        key = (id(node), variant)
+        # The node is kept with its rendering, so that its id is not given to another node meanwhile
+        cached = self.__rendered.get(key)
+        if cached is None or cached[0] is not node:
+            cached = (node, render())
+        self.__used[key] = cached
+        return cached[1]
+
+    def forget_unused(self):
+        """
+        Drops the renderings of the sections that were not used since the previous call.
+        """
+        self.__rendered = self.__used
+        self.__used = {}
+
+    def html_chunks(self, result: Content) -> Iterator[str]:
+        """
+        Yields the HTML of a result like its html_chunks, the nodes right under the root being rendered once.
+        """
+        for part in result.html_parts(False):
+            if isinstance(part, str):
+                yield part
+            else:
+                child, is_in_error = part
+                yield self.get(child, is_in_error, lambda: "".join(child.html_chunks(is_in_error)))
+        self.forget_unused()
+
+    def text_chunks(self, result: Content) -> Iterator[str]:
+        """
+        Yields the text of a result like its text_chunks, the nodes right under the root being rendered once.
+        """
+        # Characters left to drop, as in Content.text_chunks
+        skipped = 0
+        for part in result.text_parts(0):
+            if not isinstance(part, str):
+                child, indenting, child_skipped = part
+                skipped += child_skipped
+                part = self.get(child, indenting, lambda: "".join(child.text_chunks(indenting)))
+            dropped = min(skipped, len(part))
+            skipped -= dropped
+            yield part[dropped:]
+        self.forget_unused()
+
+    def findings_chunks(self, result: Content) -> Iterator[str]:
+        """
+        Yields the findings of a result as JSON Lines like json_lines.write_findings, the findings of the sections under
+        a root dictionary being found once.
+        """
+        if not isinstance(result, Dictionary):
+            yield "".join(map(finding_line, iter_findings(result)))
+            return
+        # iter_findings reports the entries of dictionaries by sorted keys
+        for key in sorted(result.entries):
+            section = result.entries[key]
+            yield self.get(section, key, lambda: "".join(finding_line(dict(finding, path=[key] + finding["path"]))
+                                                         for finding in iter_findings(section)))
+        self.forget_unused()
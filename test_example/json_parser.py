@@ -1,5 +1,6 @@
-import json
-from typing import Optional
+import re
+from json.decoder import JSONDecodeError, scanstring
+from typing import Any, Iterator, Optional, TextIO
 
 from dataclasses import dataclass
 
@@ -13,7 +14,7 @@ from spec_merger.content_classes.wildcard import WildCard
 from spec_merger.utils import Parser, ParsedPage
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class JSONPosition(Position):
     position: str
 
@@ -21,10 +22,149 @@ class JSONPosition(Position):
         return self.position
 
 
+NUMBER = re.compile(r"(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?")
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+SCALAR = re.compile(r"[^,:\[\]{}\"\s]*")
+LITERALS = {"true": True, "false": False, "null": None}
+# Tokens allowed after the previous one, in a dictionary, in a list, or outside of any container: "k" stands for a key,
+# and "v" for a string, a scalar, or, as the previous token, a whole value. Nothing may follow the whole document.
+NEXT_TOKENS = {
+    (True, "{"): "k}", (True, "k"): ":", (True, ":"): "{[v", (True, "v"): ",}", (True, ","): "k",
+    (False, "["): "{[v]", (False, "v"): ",]", (False, ","): "{[v",
+    (None, None): "{[v", (None, "v"): "",
+}
+
+
+def decode_scalar(text: str):
+    if text in LITERALS:
+        return LITERALS[text]
+    match = NUMBER.fullmatch(text)
+    if match is None:
+        raise JSONDecodeError("Expecting value", text, 0)
+    integer, fraction, exponent = match.groups()
+    if fraction or exponent:
+        return float(integer + (fraction or "") + (exponent or ""))
+    return int(integer)
+
+
+def decode_error(message: str, file: TextIO, offset: Optional[int]) -> JSONDecodeError:
+    """
+    Returns the error of a document read by json_tokens at a character offset, or at its end if the offset is None.
+    Only the offset is known while streaming, so the document is read again up to it to find its line and column,
+    unless the file cannot be read again.
+    """
+    document = ""
+    if file.seekable():
+        file.seek(0)
+        document = file.read(offset if offset is not None else -1)
+    return JSONDecodeError(message, document, offset if offset is not None else len(document))
+
+
+def json_tokens(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[tuple[str, Any, int]]:
+    """
+    Yields the tokens of a JSON document read from a file by chunks, with the character offset where they start: its
+    punctuation as (character, None, offset), its strings as ("string", value, offset) and its numbers, booleans and
+    nulls as ("scalar", value, offset).
+    """
+    buffer = ""
+    index = 0
+    # Number of characters of the document before the buffer
+    consumed = 0
+    while True:
+        index = WHITESPACE.match(buffer, index).end()
+        if index == len(buffer):
+            consumed += len(buffer)
+            buffer = file.read(chunk_size)
+            index = 0
+            if not buffer:
+                return
+            continue
+        char = buffer[index]
+        if char in "{}[]:,":
+            index += 1
+            yield char, None, consumed + index - 1
+            continue
+        # A string or scalar may be cut by the end of the buffer, in which case more of the file is read before it is
+        # decoded again. Reads grow with the buffer, so that a long value is not scanned again for every chunk.
+        try:
+            while True:
+                if char == '"':
+                    try:
+                        value, end = scanstring(buffer, index + 1)
+                        kind = "string"
+                        break
+                    except JSONDecodeError:
+                        pass
+                else:
+                    end = SCALAR.match(buffer, index).end()
+                    if end < len(buffer):
+                        value = decode_scalar(buffer[index:end])
+                        kind = "scalar"
+                        break
+                chunk = file.read(max(chunk_size, len(buffer) - index))
+                buffer = buffer[index:] + chunk
+                consumed += index
+                index = 0
+                if not chunk:
+                    if char == '"':
+                        value, end = scanstring(buffer, 1)
+                        kind = "string"
+                    else:
+                        end = len(buffer)
+                        value = decode_scalar(buffer)
+                        kind = "scalar"
+                    break
+        except JSONDecodeError as error:
+            # Errors of strings are found at their offset in the buffer, and the ones of scalars at their start
+            raise decode_error(error.msg, file, consumed + (error.pos if char == '"' else index)) from None
+        yield kind, value, consumed + index
+        index = end
+
+
+class Frame:
+    """
+    Container being read by JSONParser.parse_stream: a dictionary or a list of the tree, or, when raw, a plain Python
+    value such as the keys of an "order" entry.
+    """
+    __slots__ = ("is_dict", "raw", "children", "key", "order", "wildcards", "is_ordered", "has_flag")
+
+    def __init__(self, is_dict: bool, raw: bool):
+        self.is_dict = is_dict
+        self.raw = raw
+        self.children = {} if is_dict else []
+        self.key: Optional[str] = None
+        self.order = None
+        self.wildcards = []
+        self.is_ordered = None
+        self.has_flag = False
+
+    def reads_raw(self) -> bool:
+        """
+        Returns whether the next value of the container is a plain Python value instead of a node.
+        """
+        if self.is_dict:
+            return self.raw or self.key in ("order", "wildcards")
+        return self.raw or not self.has_flag
+
+    def add(self, value):
+        if self.is_dict:
+            if self.raw or self.key not in ("order", "wildcards"):
+                self.children[self.key] = value
+            elif self.key == "order":
+                self.order = value
+            else:
+                self.wildcards = value
+            self.key = None
+        elif self.raw or self.has_flag:
+            self.children.append(value)
+        else:
+            self.is_ordered = value
+            self.has_flag = True
+
+
 class JSONParser(Parser):
     def __init__(self, file_name: str, parser_num: str):
-        with open(file_name, "r") as file:
-            self.content = json.load(file)
+        self.file_name = file_name
         self.parsed_page: Optional[ParsedPage] = None
         self.name = "JSONParser"
         self.parser_num = parser_num
@@ -32,44 +172,78 @@ class JSONParser(Parser):
     def new_pos(self):
         return JSONPosition(self.parser_num)
 
-    def parse(self,content) -> Content:
-        match content:
-            case dict(dictionnary):
-                keys = None
-                if dictionnary.get("order", False):
-                    keys = dictionnary["order"]
-                entries = {}
-                wildcards = dictionnary.get("wildcards", [])
-                for key in dictionnary.keys():
-                    if key == "wildcards" or key == "order":
-                        pass
-                    elif key in wildcards:
-                        entries[key] = WildCard(self.new_pos())
-                    else:
-                        entries[key] = self.parse(dictionnary[key])
-                if keys is not None:
-                    return OrderedDictionnary(self.new_pos(), entries, keys)
-                return Dictionary(self.new_pos(), entries)
-            case list(values):
-                is_ordered = values[0]
-                parsed_list_values = map(self.parse, values[1:])
-                if is_ordered:
-                    return OrderedSeq(self.new_pos(), list(parsed_list_values))
-                else:
-                    return Bag(self.new_pos(), list(parsed_list_values))
-            case str(value) | int(value) | float(value) | bool(value):
-                return String(self.new_pos(), str(value))
-            case _:
-                raise Exception("Type can't be parsed for the moment")
+    def close(self, frame: Frame) -> Content:
+        if frame.is_dict:
+            entries = frame.children
+            for key in entries:
+                if key in frame.wildcards:
+                    entries[key] = WildCard(self.new_pos())
+            if frame.order:
+                return OrderedDictionnary(self.new_pos(), entries, frame.order)
+            return Dictionary(self.new_pos(), entries)
+        if not frame.has_flag:
+            raise Exception("Lists must start with a boolean telling whether they are ordered")
+        if frame.is_ordered:
+            return OrderedSeq(self.new_pos(), frame.children)
+        return Bag(self.new_pos(), frame.children)
+
+    def parse_stream(self, file: TextIO) -> Content:
+        """
+        Parses a JSON document from its tokens as they are read from the file, so that only the resulting tree is kept
+        in memory instead of the decoded document as well. Lists start with whether they are ordered, and the keys of
+        dictionaries listed in their "wildcards" entry are wildcards, while an "order" entry makes them ordered.
+        """
+        stack: list[Frame] = []
+        # Keys are shared between the dictionaries using them, as json.load does
+        keys: dict[str, str] = {}
+        previous = None
+        root: Optional[Content] = None
+        for kind, value, offset in json_tokens(file):
+            allowed = NEXT_TOKENS[stack[-1].is_dict if stack else None, previous]
+            token = kind if len(kind) == 1 else "k" if kind == "string" and "k" in allowed else "v"
+            if token not in allowed:
+                raise decode_error("Extra data" if root is not None else f"Unexpected {kind} token", file, offset)
+            previous = "v" if token in "}]" else token
+            match kind:
+                case "{" | "[":
+                    stack.append(Frame(kind == "{", bool(stack) and stack[-1].reads_raw()))
+                    continue
+                case "," | ":":
+                    continue
+                case "string" if stack and stack[-1].is_dict and stack[-1].key is None:
+                    stack[-1].key = keys.setdefault(value, value)
+                    continue
+                case "}" | "]":
+                    frame = stack.pop()
+                    value = frame.children if frame.raw else self.close(frame)
+                case "string" | "scalar" if not stack or not stack[-1].reads_raw():
+                    if value is None:
+                        raise Exception("Type can't be parsed for the moment")
+                    value = String(self.new_pos(), str(value))
+            if not stack:
+                # The rest of the document is still read, as anything but whitespace after the value is an error
+                root = value
+                continue
+            stack[-1].add(value)
+        if root is None:
+            raise decode_error("Unexpected end of document", file, None)
+        return root
 
     def get_parsed_page(self) -> ParsedPage:
         if self.parsed_page is not None:
             return self.parsed_page
         self.parsed_page = ParsedPage(self.name, Dictionary(self.new_pos(), {}))
-        result = self.parse(self.content)
+        with open(self.file_name, "r") as file:
+            result = self.parse_stream(file)
         match result:
             case Dictionary(_, ):
                 self.parsed_page.entries = result
             case _:
                 self.parsed_page.entries = Dictionary(self.new_pos(), {"content": result})
         return self.parsed_page
+
+    def source_files(self) -> list[str]:
+        return [self.file_name]
+
+    def cache_parameters(self) -> tuple:
+        return (self.parser_num,)
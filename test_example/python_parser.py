@@ -1,26 +1,15 @@
 import re
 from typing import Optional
-from dataclasses import dataclass
-import os
 
-from spec_merger.aligner_utils import Position
 from spec_merger.content_classes.bag import Bag
 from spec_merger.content_classes.dictionary import Dictionary
 from spec_merger.content_classes.ordered_dictionary import OrderedDictionnary
 from spec_merger.content_classes.string import String
 from spec_merger.content_classes.wildcard import WildCard
+from spec_merger.position_table import LinePosition
 from spec_merger.utils import Parser, ParsedPage
 
 
-@dataclass(frozen=True)
-class PythonPosition(Position):
-    lines_num: tuple[int, int]
-    file_name: str
-
-    def html_str(self) -> str:
-        return f"<a download href='file://{os.path.abspath(self.file_name)}'><b>{self.file_name.split('/')[-1]}</b>: {self.lines_num[0]}-{self.lines_num[1]}</a>"
-
-
 def is_special_comment(comment: str):
     r = re.compile(r"# << .*? >>( TITLE| WILDCARD| INPUTS|)")
     return r.match(comment)
@@ -59,7 +48,7 @@ class PythonParser(Parser):
                 continue
             comment, speciality = strip_special_comment(real_line)
             if speciality == "TITLE":
-                pos = PythonPosition((line_start, i), self.file_name)
+                pos = LinePosition(self.file_name, line_start, i)
                 if current_section_title == "":
                     current_section_title = comment
                     continue
@@ -70,7 +59,7 @@ class PythonParser(Parser):
                 if current_enum != []:
                     first_line = min(current_enum, key=lambda s: s[1])[1]
                     strings = list(map(lambda x: x[0], current_enum))
-                    current_section["bulletpoints"] = Bag(PythonPosition((first_line, i), self.file_name), strings)
+                    current_section["bulletpoints"] = Bag(LinePosition(self.file_name, first_line, i), strings)
                     current_enum = []
                 line_start = i
                 sections[current_section_title] = Dictionary(pos, current_section)
@@ -78,33 +67,33 @@ class PythonParser(Parser):
                 current_section = {}
             # There are only wildcards in the instructions
             elif speciality == "WILDCARD":
-                pos = PythonPosition((line_start, i), self.file_name)
+                pos = LinePosition(self.file_name, line_start, i)
                 is_a_match = self.regex_algorithm.match(comment)
                 instruction_orders.append(is_a_match.group(1))
                 instructions[is_a_match.group(1)] = WildCard(None)
             elif speciality == "INPUTS":
                 inputs = dict(map(lambda x: (x.split(":")[0], String(None, x.split(":")[1])), comment.split(", ")))
-                current_section["inputs"] = Dictionary(PythonPosition((i, i), self.file_name), inputs)
+                current_section["inputs"] = Dictionary(LinePosition(self.file_name, i, i), inputs)
             else:
                 if comment.startswith("-"):
-                    s = String(PythonPosition((i, i), self.file_name), comment[2:])
+                    s = String(LinePosition(self.file_name, i, i), comment[2:])
                     current_enum.append((s, i))
                     continue
                 is_a_match = self.regex_algorithm.match(comment)
                 if not is_a_match:
-                    current_section["description"] = String(PythonPosition((i, i), self.file_name), comment)
+                    current_section["description"] = String(LinePosition(self.file_name, i, i), comment)
                     continue
                 else:
                     instr_title = is_a_match.group(1)
                     instruction_orders.append(instr_title)
                     instructions[instr_title] = String(None, is_a_match.group(2))
-        pos = PythonPosition((line_start, len(lines)), self.file_name)
+        pos = LinePosition(self.file_name, line_start, len(lines))
         if instructions != {}:
             current_section["algorithm"] = OrderedDictionnary(None, instructions, instruction_orders)
         if current_enum != []:
             first_line = min(current_enum, key=lambda s: s[1])[1]
             strings = list(map(lambda x: x[0], current_enum))
-            current_section["bulletpoints"] = Bag(PythonPosition((first_line, i), self.file_name), strings)
+            current_section["bulletpoints"] = Bag(LinePosition(self.file_name, first_line, i), strings)
         sections[current_section_title] = Dictionary(pos, current_section)
         return ParsedPage(self.name, Dictionary(None, sections))
 
@@ -112,3 +101,6 @@ class PythonParser(Parser):
         if self.parsed_page is None:
             self.parsed_page = self.parse()
         return self.parsed_page
+
+    def source_files(self) -> list[str]:
+        return [self.file_name]
@@ -0,0 +1,33 @@
+import random
+from typing import Optional
+
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.content_classes.wildcard import WildCard
+from spec_merger.position_table import LinePosition
+
+
+def random_tree(rng: random.Random, file_name: str, depth: int, noise: Optional[random.Random] = None):
+    """
+    Returns a random tree, of which some subtrees are replaced by other random ones if noise is given. The same seed
+    gives the same tree, but for the replaced subtrees.
+    """
+    position = LinePosition(file_name, rng.randrange(100), rng.randrange(100))
+    match rng.randrange(6 if depth else 2):
+        case 0:
+            tree = String(position, rng.choice(["x", "y", "x y", "z"]))
+        case 1:
+            tree = WildCard(position) if rng.random() < 0.2 else String(position, "x")
+        case 2 | 3:
+            tree = Dictionary(position, {rng.choice("abcd"): random_tree(rng, file_name, depth - 1, noise)
+                                         for _ in range(rng.randint(0, 4))})
+        case 4:
+            tree = OrderedSeq(position, [random_tree(rng, file_name, depth - 1, noise)
+                                         for _ in range(rng.randint(0, 4))])
+        case _:
+            tree = Bag(position, [random_tree(rng, file_name, depth - 1, noise) for _ in range(rng.randint(0, 4))])
+    if noise is not None and noise.random() < 0.05:
+        return random_tree(noise, file_name, depth)
+    return tree
@@ -0,0 +1,61 @@
+from spec_merger.aligner import Aligner
+from spec_merger.alignment_cache import AlignmentCache, SubtreeReferences
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.position_table import LinePosition
+
+
+def tree(file_name: str, shift: int, values: list[str]) -> Dictionary:
+    def position(line: int) -> LinePosition:
+        return LinePosition(file_name, line + shift, line + shift)
+
+    return Dictionary(position(0), {
+        "steps": OrderedSeq(position(1), [String(position(2 + index), value) for index, value in enumerate(values)]),
+        "cases": Bag(position(20), [String(position(21), "x"), String(position(22), "y")]),
+    })
+
+
+def test_alignment_cache_rebuilds_results_on_moved_subtrees(tmp_path):
+    cache = AlignmentCache(str(tmp_path), b"fingerprint")
+    left, right = tree("left.py", 0, ["a", "b", "c"]), tree("right.py", 0, ["a", "c", "d"])
+    cache.store(SubtreeReferences(left, right), Aligner().align(left, right))
+    # Same content at other lines
+    moved_left, moved_right = tree("left.py", 5, ["a", "b", "c"]), tree("right.py", 7, ["a", "c", "d"])
+    loaded = cache.load(SubtreeReferences(moved_left, moved_right))
+    expected = Aligner().align(moved_left, moved_right)
+    assert loaded is not None
+    assert loaded.to_text() == expected.to_text()
+    assert loaded.to_html(False) == expected.to_html(False)
+    assert loaded.count_errors() == expected.count_errors()
+
+
+def test_alignment_cache_misses_on_other_content(tmp_path):
+    cache = AlignmentCache(str(tmp_path), b"fingerprint")
+    left, right = tree("left.py", 0, ["a b", "c"]), tree("right.py", 0, ["a b", "c"])
+    cache.store(SubtreeReferences(left, right), Aligner().align(left, right))
+    assert cache.load(SubtreeReferences(tree("left.py", 0, ["a b", "d"]), right)) is None
+    # Strings equal but for their spaces have the same digest, but are shown as they are
+    assert cache.load(SubtreeReferences(tree("left.py", 0, ["ab", "c"]), right)) is None
+    assert cache.load(SubtreeReferences(left, right), scope=(1,)) is None
+    assert AlignmentCache(str(tmp_path), b"other").load(SubtreeReferences(left, right)) is None
+
+
+def test_alignment_cache_ignores_corrupted_entries(tmp_path):
+    cache = AlignmentCache(str(tmp_path), b"fingerprint")
+    left, right = tree("left.py", 0, ["a"]), tree("right.py", 0, ["b"])
+    cache.store(SubtreeReferences(left, right), Aligner().align(left, right))
+    for path in tmp_path.rglob("*.pickle"):
+        path.write_bytes(b"not a pickle")
+    assert cache.load(SubtreeReferences(left, right)) is None
+
+
+def test_aligner_cache_gives_the_same_result(tmp_path):
+    left, right = (Dictionary(None, {"A": tree("left.py", 0, ["a", "b"]), "B": tree("left.py", 30, ["c"])}),
+                   Dictionary(None, {"A": tree("right.py", 0, ["a", "c"]), "B": tree("right.py", 30, ["c"])}))
+    expected = Aligner().align(left, right)
+    for _ in range(2):
+        result = Aligner(cache_dir=str(tmp_path)).align(left, right)
+        assert result.to_html(False) == expected.to_html(False)
+    assert any(tmp_path.rglob("*.pickle"))
@@ -0,0 +1,93 @@
+import io
+import json
+import random
+
+import pytest
+from random_trees import random_tree
+
+from spec_merger.aligner import Aligner
+from spec_merger.alignment_profiler import AlignmentObserver, AlignmentProfiler
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.string import String
+
+
+class Recorder(AlignmentObserver):
+    def __init__(self):
+        self.stack = []
+        self.entered = 0
+        self.events = {}
+
+    def enter(self, left, right):
+        self.stack.append((left, right))
+        self.entered += 1
+
+    def exit(self, left, right):
+        # Alignments are exited in the reverse order they were entered
+        assert self.stack.pop() == (left, right)
+
+    def count(self, event: str):
+        self.events[event] = self.events.get(event, 0) + 1
+
+
+def random_pairs():
+    rng = random.Random(0)
+    for _ in range(50):
+        tree_seed = rng.random()
+        yield (Dictionary(None, {"section": random_tree(random.Random(tree_seed), "left.py", 4)}),
+               Dictionary(None, {"sectionx" if rng.random() < 0.2 else "section":
+                                 random_tree(random.Random(tree_seed), "right.py", 4, rng)}))
+
+
+def test_observers_see_nested_alignments_without_changing_them():
+    for left, right in random_pairs():
+        recorder, profiler = Recorder(), AlignmentProfiler()
+        expected = Aligner().align(left, right).to_html(False)
+        assert Aligner(observer=recorder).align(left, right).to_html(False) == expected
+        assert Aligner(observer=profiler).align(left, right).to_html(False) == expected
+        assert not recorder.stack and recorder.entered >= 1
+        assert sum(statistics.calls for statistics in profiler.pairs.values()) == recorder.entered
+        assert profiler.events == recorder.events
+
+
+def failing(left, right):
+    raise RuntimeError("failing alignment function")
+
+
+@pytest.mark.parametrize("observer_class", [Recorder, AlignmentProfiler])
+def test_observers_are_exited_when_an_alignment_raises(observer_class):
+    left = Dictionary(None, {"a": Dictionary(None, {"b": String(None, "x")}), "c": String(None, "y")})
+    right = Dictionary(None, {"a": Dictionary(None, {"b": Bag(None, [])}), "c": String(None, "z")})
+    observer = observer_class()
+    with pytest.raises(RuntimeError):
+        Aligner({(String, Bag): failing}, observer=observer).align(left, right)
+    # Another alignment starts from the top again
+    Aligner(observer=observer).align(left, left)
+    if isinstance(observer, Recorder):
+        assert not observer.stack
+    else:
+        assert all(statistics.active == 0 for statistics in observer.pairs.values())
+
+
+def test_profile_exports():
+    profiler = AlignmentProfiler(path_depth=1)
+    left = Dictionary(None, {"steps": Dictionary(None, {"a": String(None, "x"), "b": String(None, "y")}),
+                             "other": String(None, "z")})
+    right = Dictionary(None, {"stepsx": Dictionary(None, {"a": String(None, "x"), "b": String(None, "w")}),
+                              "other": String(None, "q")})
+    Aligner(observer=profiler).align(left, right)
+    stream = io.StringIO()
+    profiler.write_json(stream)
+    profile = json.loads(stream.getvalue())
+    assert profile["pairs"]["Dictionary/Dictionary"]["calls"] == 2
+    assert profile["pairs"]["Dictionary/Dictionary"]["max_depth"] == 1
+    assert profile["pairs"]["String/String"]["calls"] == 3
+    assert profile["events"] == {"fuzzy_key_lookup": 1}
+    assert {tuple(path["path"]) for path in profile["slowest_paths"]} == {("steps",), ("other",)}
+    stream = io.StringIO()
+    profiler.write_collapsed_stacks(stream)
+    stacks = dict(line.rsplit(" ", 1) for line in stream.getvalue().splitlines())
+    root = "Dictionary/Dictionary"
+    assert set(stacks) == {root, f"{root};Dictionary/Dictionary", f"{root};String/String",
+                           f"{root};Dictionary/Dictionary;String/String"}
+    assert all(int(elapsed) >= 0 for elapsed in stacks.values())
@@ -0,0 +1,105 @@
+import random
+import re
+from fnmatch import fnmatchcase
+
+import pytest
+
+from spec_merger.aligner import Aligner
+from spec_merger.aligner_utils import ReportErrorType
+from spec_merger.alignment_rules import AlignmentRule, AlignmentRules
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.misalignment import Misalignment
+from spec_merger.content_classes.skipped_subtree import SkippedSubtree
+from spec_merger.content_classes.string import String
+from spec_merger.tree_utils import children
+
+KEYS = ["a", "b", "ab", "Annex 1", "a/b"]
+KEY_PATTERNS = ["a", "b", "*", "a*", "?b", "**", "Annex *", "[ab]"]
+
+
+def key_matches(key_pattern: str, key: str, regex: bool) -> bool:
+    return re.fullmatch(key_pattern, key, re.DOTALL) is not None if regex else fnmatchcase(key, key_pattern)
+
+
+def path_matches(key_patterns: tuple[str, ...], path: tuple[str, ...], regex: bool) -> bool:
+    # Backtracking reference matcher
+    if not key_patterns:
+        return not path
+    if key_patterns[0] == "**":
+        return any(path_matches(key_patterns[1:], path[index:], regex) for index in range(len(path) + 1))
+    return bool(path) and key_matches(key_patterns[0], path[0], regex) and path_matches(key_patterns[1:], path[1:],
+                                                                                        regex)
+
+
+def reference(rules: list[AlignmentRule], path: tuple[str, ...]):
+    """
+    Returns whether the subtree at the path is skipped, and its comparator, from the rules matching the path, or a
+    prefix of it max_depth + 1 keys above.
+    """
+    skip = False
+    comparator = None
+    for rule in rules:
+        key_patterns = rule.key_patterns()
+        if path_matches(key_patterns, path, rule.regex):
+            skip |= rule.skip
+            if comparator is None:
+                comparator = rule.comparator
+        if rule.max_depth is not None and len(path) > rule.max_depth:
+            skip |= path_matches(key_patterns, path[:len(path) - rule.max_depth - 1], rule.regex)
+    return skip, comparator
+
+
+def random_rule(rng: random.Random, comparators) -> AlignmentRule:
+    if rng.random() < 0.2:
+        return AlignmentRule(rng.choice(["a|b", "A.*", "[^x]*b"]) + "/" + rng.choice(["a", ".*"]), regex=True,
+                             skip=rng.random() < 0.5)
+    key_patterns = tuple(rng.choice(KEY_PATTERNS) for _ in range(rng.randint(0, 3)))
+    match rng.randrange(3):
+        case 0:
+            return AlignmentRule(key_patterns, skip=True)
+        case 1:
+            return AlignmentRule(key_patterns, comparator=rng.choice(comparators))
+        case _:
+            return AlignmentRule(key_patterns, max_depth=rng.randint(0, 2))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_states_follow_the_matching_rules(seed):
+    rng = random.Random(seed)
+    comparators = [lambda left, right: left, lambda left, right: right]
+    for _ in range(50):
+        rules = [random_rule(rng, comparators) for _ in range(rng.randint(1, 4))]
+        compiled = AlignmentRules(rules)
+        for _ in range(30):
+            path = tuple(rng.choice(KEYS) for _ in range(rng.randint(0, 4)))
+            state = compiled.state(path)
+            # A path without state is out of the reach of every rule
+            expected = (state.skip, state.comparator) if state is not None else (False, None)
+            assert expected == reference(rules, path), (rules, path)
+
+
+def test_aligner_applies_the_rules():
+    def tree(value: str) -> Dictionary:
+        return Dictionary(None, {
+            "Annex A": Dictionary(None, {"text": String(None, value)}),
+            "1 Intro": Dictionary(None, {"algorithm": String(None, value),
+                                         "details": Dictionary(None, {"deep": String(None, value)})}),
+        })
+
+    def always_wrong(left, right):
+        return Misalignment((left.position, right.position), left, right, ReportErrorType.UNKNOWN_ERROR)
+
+    rules = [AlignmentRule("Annex */**", skip=True), AlignmentRule("**/algorithm", comparator=always_wrong),
+             AlignmentRule("1 *", max_depth=1)]
+    result = Aligner(rules=rules).align(tree("x"), tree("y"))
+    annex = dict(children(result))["Annex A"]
+    assert all(isinstance(child, SkippedSubtree) for _, child in children(annex))
+    intro = dict(children(result))["1 Intro"]
+    assert isinstance(dict(children(intro))["algorithm"], Misalignment)
+    # The keys of the dictionaries within the section are skipped
+    details = dict(children(intro))["details"]
+    assert isinstance(details, Dictionary) and isinstance(dict(children(details))["deep"], SkippedSubtree)
+    # Equal trees still go through the comparator, in align and in check
+    assert Aligner(rules=rules).align(tree("x"), tree("x")).count_errors().error_count == 1
+    check = Aligner(rules=rules).check(tree("x"), tree("x"))
+    assert check.count.error_count == 1 and check.failing_sections == ["1 Intro"]
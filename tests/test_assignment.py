@@ -0,0 +1,34 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from spec_merger.assignment import solve_assignment
+
+
+def brute_force_cost(costs: list[list[float]]) -> float:
+    row_count, column_count = len(costs), len(costs[0])
+    if row_count <= column_count:
+        return min(sum(costs[row][column] for row, column in enumerate(columns))
+                   for columns in permutations(range(column_count), row_count))
+    return min(sum(costs[row][column] for column, row in enumerate(rows))
+               for rows in permutations(range(row_count), column_count))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_minimal_total_cost(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        row_count, column_count = rng.randint(1, 6), rng.randint(1, 6)
+        costs = [[rng.choice([rng.random(), float(rng.randint(0, 3))]) for _ in range(column_count)]
+                 for _ in range(row_count)]
+        pairs = solve_assignment(costs)
+        assert len(pairs) == min(row_count, column_count)
+        assert pairs == sorted(pairs)
+        assert len({row for row, _ in pairs}) == len(pairs) == len({column for _, column in pairs})
+        assert sum(costs[row][column] for row, column in pairs) == pytest.approx(brute_force_cost(costs))
+
+
+def test_empty_matrices():
+    assert solve_assignment([]) == []
+    assert solve_assignment([[]]) == []
@@ -0,0 +1,60 @@
+import random
+from collections import Counter
+
+import pytest
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.misalignment import Misalignment
+from spec_merger.content_classes.string import String
+from spec_merger.position_table import LinePosition
+
+
+def bag(file_name: str, values: list[str]) -> Bag:
+    return Bag(LinePosition(file_name, 0, 0),
+               [String(LinePosition(file_name, line, line), value) for line, value in enumerate(values, 1)])
+
+
+def sides(result: Bag) -> tuple[list[str], list[str], int]:
+    """
+    Returns the files of the elements found on each side of an aligned bag, and the number of equal pairs.
+    """
+    left, right, equal_pairs = [], [], 0
+    for element in result.bag:
+        match element:
+            case String(position=(left_position, right_position)):
+                left.append(left_position.file_name)
+                right.append(right_position.file_name)
+                equal_pairs += 1
+            case Misalignment(left=left_element, right=right_element):
+                if left_element is not None:
+                    left.append(left_element.position.file_name)
+                if right_element is not None:
+                    right.append(right_element.position.file_name)
+    return left, right, equal_pairs
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bags_are_matched_as_multisets(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        left_values = [rng.choice(["a", "a b", "b", "cc", "zzzz"]) for _ in range(rng.randint(0, 6))]
+        right_values = [rng.choice(["a", "b", "cc", "qqqq"]) for _ in range(rng.randint(0, 6))]
+        result = Aligner().align(bag("left.py", left_values), bag("right.py", right_values))
+        left, right, equal_pairs = sides(result)
+        # Every element is on its own side exactly once, whatever is left unmatched
+        assert left == ["left.py"] * len(left_values)
+        assert right == ["right.py"] * len(right_values)
+        common = Counter(value.replace(" ", "") for value in left_values) & Counter(right_values)
+        assert equal_pairs == sum(common.values())
+        assert (result.count_errors().error_count == 0) == (len(left_values) == len(right_values) == equal_pairs)
+
+
+def test_leftovers_keep_their_side():
+    result = Aligner().align(bag("left.py", ["a", "a", "b"]), bag("right.py", ["a", "b", "b"]))
+    assert result.count_errors().error_count == 1
+    [misalignment] = [element for element in result.bag if isinstance(element, Misalignment)]
+    assert (misalignment.left.value, misalignment.right.value) == ("a", "b")
+    result = Aligner().align(bag("left.py", ["a", "zzzz", "yyyy"]), bag("right.py", ["a"]))
+    missing = [element for element in result.bag if isinstance(element, Misalignment)]
+    assert [(element.left.value, element.right) for element in missing] == [("zzzz", None), ("yyyy", None)]
@@ -0,0 +1,71 @@
+import random
+from pathlib import Path
+
+import pytest
+from json_parser import JSONParser
+from python_parser import PythonParser
+from random_trees import random_tree
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.error_warning_count import ErrorWarningCount
+from spec_merger.tree_utils import children
+
+DOCUMENTS = Path(__file__).parent.parent / "test_example" / "documents"
+
+
+def random_sections(rng: random.Random) -> tuple[Dictionary, Dictionary]:
+    left, right = {}, {}
+    for index in range(rng.randint(0, 8)):
+        tree_seed = rng.random()
+        key = f"section {index}"
+        match rng.randrange(6):
+            case 0:
+                left[key] = random_tree(random.Random(tree_seed), "left.py", 3)
+            case 1:
+                right[key + "x" * rng.randint(0, 1)] = random_tree(random.Random(tree_seed), "right.py", 3)
+            case 2 | 3:
+                left[key] = random_tree(random.Random(tree_seed), "left.py", 3)
+                right[key] = random_tree(random.Random(tree_seed), "right.py", 3)
+            case _:
+                left[key] = random_tree(random.Random(tree_seed), "left.py", 3)
+                right[key] = random_tree(random.Random(tree_seed), "right.py", 3, rng)
+    return Dictionary(None, left), Dictionary(None, right)
+
+
+def failing_sections(result) -> set[str]:
+    return {key for key, child in children(result) if child.count_errors() != ErrorWarningCount(0, 0)}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_check_counts_the_errors_of_align(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        left, right = random_sections(rng)
+        full = Aligner().align(left, right)
+        expected = full.count_errors()
+        result = Aligner().check(left, right, max_errors=10 ** 9)
+        assert (result.count, result.exceeded, result.complete) == (expected, False, True)
+        assert set(result.failing_sections) == failing_sections(full)
+        for max_errors in range(expected.error_count + 1):
+            result = Aligner().check(left, right, max_errors=max_errors)
+            assert result.exceeded == (expected.error_count > max_errors)
+            if result.exceeded:
+                assert max_errors < result.count.error_count <= expected.error_count
+                assert result.count.warning_count <= expected.warning_count
+                assert set(result.failing_sections) <= failing_sections(full)
+            else:
+                assert result.count == expected
+        result = Aligner().check(left, right, max_errors=10 ** 9, max_warnings=0)
+        assert result.exceeded == (expected.warning_count > 0)
+
+
+def test_check_of_the_example():
+    left = JSONParser(str(DOCUMENTS / "spec.json"), "Specification").get_parsed_page().entries
+    right = PythonParser(str(DOCUMENTS / "implem.py")).get_parsed_page().entries
+    expected = Aligner().align(left, right).count_errors()
+    assert expected.error_count > 0
+    result = Aligner().check(left, right, max_errors=10 ** 9, max_warnings=10 ** 9)
+    assert (result.count, result.exceeded, result.complete) == (expected, False, True)
+    result = Aligner().check(left, right, hints=result.failing_sections[-1:])
+    assert result.exceeded and result.count.error_count <= expected.error_count
@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import pytest
+from json_parser import JSONParser
+from python_parser import PythonParser
+
+from spec_merger.aligner import Aligner
+from spec_merger.cli import OVER_BUDGET, WITHIN_BUDGET, load_parser_class, main
+
+DOCUMENTS = Path(__file__).parent.parent / "test_example" / "documents"
+SPEC, IMPLEMENTATION = str(DOCUMENTS / "spec.json"), str(DOCUMENTS / "implem.py")
+COMMAND = [SPEC, IMPLEMENTATION, "--left-parser", "json_parser:JSONParser", "--left-arg", "Specification",
+           "--right-parser", "python_parser.PythonParser", "--quiet"]
+
+
+@pytest.fixture(scope="module")
+def result():
+    return Aligner().align(JSONParser(SPEC, "Specification").get_parsed_page().entries,
+                           PythonParser(IMPLEMENTATION).get_parsed_page().entries)
+
+
+def run(tmp_path, *options: str) -> tuple[int, str]:
+    output = tmp_path / "report"
+    code = main(COMMAND + ["--output", str(output), *options])
+    return code, output.read_text()
+
+
+def test_text_report(tmp_path, result):
+    code, report = run(tmp_path, "--format", "text", "--max-errors", "1000")
+    assert code == WITHIN_BUDGET
+    assert report == "".join(result.text_chunks(0))
+
+
+def test_exit_code_follows_the_budget(tmp_path, result):
+    count = result.count_errors()
+    assert count.error_count > 0
+    for options, expected in [((), OVER_BUDGET),
+                              (("--max-errors", str(count.error_count)), WITHIN_BUDGET),
+                              (("--max-errors", str(count.error_count - 1)), OVER_BUDGET),
+                              (("--max-errors", str(count.error_count), "--max-warnings",
+                                str(count.warning_count)), WITHIN_BUDGET)]:
+        assert run(tmp_path, "--format", "findings", *options)[0] == expected
+
+
+def test_findings(tmp_path):
+    _, report = run(tmp_path, "--format", "findings")
+    findings = [json.loads(line) for line in report.splitlines()]
+    assert findings and all(isinstance(finding, dict) for finding in findings)
+
+
+@pytest.mark.parametrize("output_format", ["html", "text", "tree"])
+def test_jobs_and_cache_give_the_same_report(tmp_path, output_format):
+    _, expected = run(tmp_path, "--format", output_format)
+    assert run(tmp_path, "--format", output_format, "--jobs", "2")[1] == expected
+    for _ in range(2):
+        assert run(tmp_path, "--format", output_format, "--cache-dir", str(tmp_path / "cache"))[1] == expected
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(SystemExit) as raised:
+        run(tmp_path, "--jobs", "0")
+    assert raised.value.code == 2
+    # The report is not left half written
+    assert not list(tmp_path.iterdir())
+
+
+def test_load_parser_class():
+    assert load_parser_class("json_parser:JSONParser") is JSONParser
+    assert load_parser_class("python_parser.PythonParser") is PythonParser
+    assert load_parser_class("spec_merger.cli:main") is main
+    with pytest.raises(ValueError):
+        load_parser_class("JSONParser")
@@ -0,0 +1,56 @@
+import io
+import sys
+
+import pytest
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.error_warning_count import ErrorWarningCount
+from spec_merger.html_renderer import HTMLRenderer
+from spec_merger.json_lines import read_tree, write_findings, write_tree
+from spec_merger.tree_utils import node_count, prune_ok
+
+DEPTH = 3 * sys.getrecursionlimit()
+
+
+def chain(container: type, leaf: str):
+    tree = String(None, leaf)
+    for depth in range(DEPTH):
+        match container.__name__:
+            case "Dictionary":
+                tree = Dictionary(None, {"a": tree, "b": String(None, str(depth))})
+            case "OrderedSeq":
+                tree = OrderedSeq(None, [String(None, str(depth)), tree])
+            case _:
+                tree = Bag(None, [tree])
+    return tree
+
+
+@pytest.mark.parametrize("container", [Dictionary, OrderedSeq, Bag])
+def test_trees_deeper_than_the_recursion_limit(container):
+    left, right = chain(container, "x"), chain(container, "y")
+    assert left.digest() != right.digest() and chain(container, "x").digest() == left.digest()
+    result = Aligner().align(left, right)
+    assert result.count_errors() == ErrorWarningCount(1, 0)
+    assert result.to_text().count("\n") >= DEPTH
+    assert "!MISALIGNMENT!" in result.to_text()
+    report = io.StringIO()
+    HTMLRenderer(result).render_to(report, "spec_merger")
+    assert report.getvalue().count("Not Same String") == 1
+    pruned = prune_ok(result)
+    assert node_count(pruned) <= node_count(result)
+    assert Aligner(errors_only=True).align(left, right).to_text() == pruned.to_text()
+    assert Aligner().check(left, right).exceeded
+    stream = io.StringIO()
+    write_tree(result, stream)
+    stream.seek(0)
+    assert read_tree(stream).digest() == result.digest()
+    findings = io.StringIO()
+    write_findings(result, findings)
+    # Lone elements of bags are aligned as misspellings of each other, down to the differing strings
+    assert '"NOT_SAME_STRING"' in findings.getvalue().splitlines()[-1]
+    # Equal deep trees are paired up as well
+    assert Aligner().align(left, chain(container, "x")).count_errors() == ErrorWarningCount(0, 0)
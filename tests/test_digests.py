@@ -0,0 +1,83 @@
+import random
+from collections import Counter
+
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.content_classes.wildcard import WildCard
+from spec_merger.position_table import LinePosition
+
+
+def spaced(rng: random.Random, value: str) -> str:
+    # The same value with spaces and non-breaking spaces inserted, which strings ignore by default
+    return "".join(rng.choice(["", "", " ", "\xa0"]) + character for character in value) + rng.choice(["", " "])
+
+
+def bare(value: str) -> str:
+    return value.replace(" ", "").replace("\xa0", "")
+
+
+def check_consistent(a, b):
+    equal = a == b
+    assert equal == (b == a)
+    assert equal == (a.digest() == b.digest())
+    if equal:
+        assert hash(a) == hash(b)
+
+
+def test_strings_agree_across_normalization():
+    rng = random.Random(0)
+    strings = [String(LinePosition("a.py", line, line), spaced(rng, rng.choice(["ab", "a b", "ba", "abc", ""])))
+               for line in range(200)]
+    for a, b in zip(strings, strings[1:] + strings[:1]):
+        check_consistent(a, b)
+        assert (a == b) == (bare(a.value) == bare(b.value))
+    assert String(None, "a b") == String(None, "a\xa0b") == String(None, "ab")
+    assert String(None, "a-b", "-") == String(None, "ab")
+    assert String(None, "ab") != String(None, "ba")
+
+
+def test_bags_are_multisets():
+    rng = random.Random(1)
+    for _ in range(300):
+        left = [rng.choice("aab") for _ in range(rng.randint(0, 5))]
+        right = rng.sample(left, len(left)) if rng.random() < 0.5 else [rng.choice("ab") for _ in left]
+        a = Bag(None, [String(None, spaced(rng, value)) for value in left])
+        b = Bag(LinePosition("b.py", 1, 2), [String(None, value) for value in right])
+        check_consistent(a, b)
+        assert (a == b) == (Counter(left) == Counter(right))
+    assert Bag(None, [String(None, "a"), String(None, "a"), String(None, "b")]) != \
+        Bag(None, [String(None, "a"), String(None, "b"), String(None, "b")])
+    assert Bag(None, [String(None, "a")]) != Bag(None, [String(None, "a"), String(None, "a")])
+
+
+def test_nested_nodes():
+    rng, spacing_rng = random.Random(), random.Random(2)
+
+    def random_tree(depth: int, spacing: bool):
+        kind = rng.randrange(4 if depth else 2)
+        match kind:
+            case 0:
+                value = rng.choice(["x", "x y", "z"])
+                return String(None, spaced(spacing_rng, value) if spacing else value)
+            case 1:
+                return WildCard(None)
+            case 2:
+                return OrderedSeq(None, [random_tree(depth - 1, spacing) for _ in range(rng.randint(0, 3))])
+            case _:
+                return Dictionary(None, {rng.choice("kl"): random_tree(depth - 1, spacing) for _ in range(2)})
+
+    for seed in range(500):
+        rng.seed(seed)
+        a = random_tree(3, False)
+        rng.seed(seed)
+        # The same tree, but for the spaces of its strings
+        b = random_tree(3, True)
+        check_consistent(a, b)
+        assert a == b
+        check_consistent(a, random_tree(3, False))
+    assert OrderedSeq(None, [String(None, "a"), String(None, "b")]) != \
+        OrderedSeq(None, [String(None, "b"), String(None, "a")])
+    assert OrderedSeq(None, [String(None, "a")]) != Bag(None, [String(None, "a")])
+    assert Dictionary(None, {"a": String(None, "b")}) != Dictionary(None, {"b": String(None, "a")})
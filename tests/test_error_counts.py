@@ -0,0 +1,49 @@
+import random
+
+import pytest
+from random_trees import random_tree
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.alignment_issue import AlignmentIssue
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.misalignment import Misalignment
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.wildcard import WildCard
+from spec_merger.tree_utils import children
+
+
+def reference_count(node) -> tuple[int, int]:
+    # Counts the errors and warnings of a tree recursively, without the counts cached on its nodes
+    match node:
+        case Misalignment(error=issue) | AlignmentIssue(warning=issue):
+            return (1, 0) if issue.is_error() else (0, 1)
+        case WildCard():
+            return 0, 1
+        case _:
+            counts = [reference_count(child) for _, child in children(node)]
+            return sum(count[0] for count in counts), sum(count[1] for count in counts)
+
+
+def as_tuple(count) -> tuple[int, int]:
+    return count.error_count, count.warning_count
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_cached_counts_are_the_recursive_ones(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        tree_seed = rng.random()
+        left = random_tree(random.Random(tree_seed), "left.py", 4)
+        right = random_tree(random.Random(tree_seed), "right.py", 4, rng)
+        result = Aligner().align(left, right)
+        assert as_tuple(result.count_errors()) == reference_count(result)
+        # Counted once, then kept on the nodes
+        assert result.count_errors() is result.count_errors()
+        for _, child in children(result):
+            assert as_tuple(child.count_errors()) == reference_count(child)
+
+
+def test_shared_subtrees_are_counted_once_per_parent():
+    shared = OrderedSeq(None, [WildCard(None), WildCard(None)])
+    tree = Dictionary(None, {"a": shared, "b": OrderedSeq(None, [shared, shared])})
+    assert as_tuple(tree.count_errors()) == (0, 6)
@@ -0,0 +1,21 @@
+import random
+
+import pytest
+from random_trees import random_tree
+
+from spec_merger.aligner import Aligner
+from spec_merger.tree_utils import prune_ok
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_errors_only_is_the_pruned_full_result(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        tree_seed = rng.random()
+        left = random_tree(random.Random(tree_seed), "left.py", 4)
+        right = random_tree(random.Random(tree_seed), "right.py", 4, rng if rng.random() < 0.7 else None)
+        pruned = prune_ok(Aligner().align(left, right))
+        errors_only = Aligner(errors_only=True).align(left, right)
+        assert errors_only.count_errors() == pruned.count_errors()
+        assert errors_only.to_text() == pruned.to_text()
+        assert errors_only.to_html(False) == pruned.to_html(False)
@@ -0,0 +1,58 @@
+import random
+from difflib import get_close_matches
+
+import pytest
+
+from spec_merger.fuzzy_key_index import FuzzyKeyIndex
+
+
+def reference(key: str, keys: list[str], cutoff: float):
+    matches = get_close_matches(key, keys, n=1, cutoff=cutoff)
+    return matches[0] if matches else None
+
+
+def random_key(rng: random.Random) -> str:
+    return "".join(rng.choice("abcde. ") for _ in range(rng.randint(0, 14)))
+
+
+def misspelled(rng: random.Random, key: str) -> str:
+    characters = list(key)
+    for _ in range(rng.randint(0, 3)):
+        position = rng.randint(0, len(characters))
+        match rng.randrange(3):
+            case 0:
+                characters.insert(position, rng.choice("abcde. "))
+            case 1 if characters:
+                del characters[min(position, len(characters) - 1)]
+            case _ if characters:
+                characters[min(position, len(characters) - 1)] = rng.choice("abcde. ")
+    return "".join(characters)
+
+
+@pytest.mark.parametrize("cutoff", [0.0, 0.5, 0.75, 0.88, 0.95])
+def test_same_key_as_get_close_matches(cutoff):
+    rng = random.Random(int(cutoff * 100))
+    for _ in range(20):
+        keys = list({random_key(rng) for _ in range(rng.randint(0, 40))})
+        index = FuzzyKeyIndex(keys, cutoff)
+        for _ in range(30):
+            query = misspelled(rng, rng.choice(keys)) if keys and rng.random() < 0.8 else random_key(rng)
+            assert index.closest_key(query) == reference(query, keys, cutoff), query
+
+
+def test_removed_and_added_keys():
+    rng = random.Random(0)
+    keys = list({random_key(rng) for _ in range(60)})
+    index = FuzzyKeyIndex(keys)
+    removed = set(rng.sample(keys, 20))
+    for key in removed:
+        index.remove(key)
+    remaining = [key for key in keys if key not in removed]
+    for key in keys:
+        query = misspelled(rng, key)
+        assert index.closest_key(query) == reference(query, remaining, 0.88), query
+    for key in removed:
+        index.add(key)
+    for key in keys:
+        query = misspelled(rng, key)
+        assert index.closest_key(query) == reference(query, keys, 0.88), query
@@ -0,0 +1,54 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.string import String
+from spec_merger.html_renderer import HTMLRenderer, load_template, split_template
+
+TEMPLATE = Path(__file__).parent.parent / "spec_merger" / "generic_template.html"
+
+
+def write_template(directory: Path, html: str, modification_time: int):
+    path = directory / "generic_template.html"
+    path.write_text(html)
+    # Saves within the resolution of the file system would otherwise have the same modification time
+    os.utime(path, ns=(modification_time, modification_time))
+
+
+def test_template_is_split_like_str_format():
+    before, after = load_template(str(TEMPLATE.parent))
+    html = TEMPLATE.read_text()
+    assert before + "<p>report</p>" + after == html.format(content="<p>report</p>")
+
+
+def test_template_is_split_again_only_once_modified(tmp_path):
+    write_template(tmp_path, "<style>a {{ b: c }}</style>{content}{{{{", 10 ** 9)
+    first = load_template(str(tmp_path))
+    assert first == ("<style>a { b: c }</style>", "{{")
+    assert load_template(str(tmp_path)) is first
+    misses = split_template.cache_info().misses
+    page = Dictionary(None, {"a": String(None, "b")})
+    for _ in range(3):
+        HTMLRenderer(page).render_to(io.StringIO(), str(tmp_path))
+    assert split_template.cache_info().misses == misses
+    write_template(tmp_path, "<main>{content}</main>", 2 * 10 ** 9)
+    assert load_template(str(tmp_path)) == ("<main>", "</main>")
+    assert HTMLRenderer(page).render(str(tmp_path)) == "<main>" + page.to_html(False) + "</main>"
+
+
+@pytest.mark.parametrize("html", ["no placeholder", "{content}{content}", "{content} {other}"])
+def test_invalid_templates(tmp_path, html):
+    write_template(tmp_path, html, 10 ** 9)
+    with pytest.raises(ValueError):
+        load_template(str(tmp_path))
+
+
+def test_templates_of_other_directories(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        write_template(tmp_path / name, f"<{name}>{{content}}</{name}>", 10 ** 9)
+    assert load_template(str(tmp_path / "a")) == ("<a>", "</a>")
+    assert load_template(str(tmp_path / "b")) == ("<b>", "</b>")
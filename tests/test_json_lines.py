@@ -0,0 +1,92 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from json_parser import JSONParser, JSONPosition
+from python_parser import PythonParser
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.alignment_issue import AlignmentIssue
+from spec_merger.content_classes.misalignment import Misalignment
+from spec_merger.json_lines import iter_findings, read_tree, write_findings, write_tree
+from spec_merger.tree_utils import preorder
+
+DOCUMENTS = Path(__file__).parent.parent / "test_example" / "documents"
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return (JSONParser(str(DOCUMENTS / "spec.json"), "Specification").get_parsed_page(),
+            PythonParser(str(DOCUMENTS / "implem.py")).get_parsed_page())
+
+
+def round_trip(tree, position_classes=()):
+    stream = io.StringIO()
+    write_tree(tree, stream)
+    stream.seek(0)
+    return read_tree(stream, position_classes)
+
+
+def test_tree_round_trip(pages):
+    left, right = pages
+    for tree in (left.entries, right.entries, Aligner().align(left.entries, right.entries)):
+        read = round_trip(tree, [JSONPosition])
+        assert read.digest() == tree.digest()
+        assert read.to_text() == tree.to_text()
+        assert read.to_html(False) == tree.to_html(False)
+        assert [node.position for node in preorder(read)] == [node.position for node in preorder(tree)]
+        # Writing the tree read gives the same stream
+        first, second = io.StringIO(), io.StringIO()
+        write_tree(tree, first)
+        write_tree(read, second)
+        assert first.getvalue() == second.getvalue()
+
+
+def test_positions_of_other_classes_are_rejected(pages):
+    with pytest.raises(ValueError):
+        round_trip(pages[0].entries)
+    with pytest.raises(TypeError):
+        round_trip(pages[0].entries, [dict])
+    stream = io.StringIO('{"format": "spec-merger-tree", "version": 1}\n'
+                         '{"type": "WildCard", "position": {"class": "os:system", "command": "true"}}\n')
+    with pytest.raises(ValueError):
+        read_tree(stream)
+
+
+def test_truncated_stream(pages):
+    stream = io.StringIO()
+    write_tree(pages[1].entries, stream)
+    lines = stream.getvalue().splitlines(keepends=True)
+    with pytest.raises(ValueError):
+        read_tree(io.StringIO("".join(lines[:len(lines) // 2])))
+
+
+def resolve(node, path):
+    # Alignment issues wrap a node without adding to the path
+    chain = [node]
+    for step in path:
+        while isinstance(node, AlignmentIssue):
+            node = node.value
+        node = node.entries[step] if isinstance(step, str) else list(node.child_nodes())[step]
+        chain = [node]
+    while isinstance(node, AlignmentIssue):
+        node = node.value
+        chain.append(node)
+    return chain
+
+
+def test_findings(pages):
+    left, right = pages
+    result = Aligner().align(left.entries, right.entries)
+    stream = io.StringIO()
+    write_findings(result, stream)
+    findings = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert findings == list(iter_findings(result))
+    assert any(finding["severity"] == "error" for finding in findings) == (result.count_errors().error_count > 0)
+    for finding in findings:
+        # Each path leads to the finding through the keys of the dictionaries and the indices of the sequences
+        errors = [node.error.name if isinstance(node, Misalignment) else node.warning.name
+                  for node in resolve(result, finding["path"]) if isinstance(node, (Misalignment, AlignmentIssue))]
+        assert finding["error"] in errors
+    assert list(iter_findings(Aligner().align(left.entries, left.entries))) == []
@@ -0,0 +1,166 @@
+import io
+import json
+import random
+from pathlib import Path
+
+import pytest
+from json_parser import JSONParser, JSONPosition, json_tokens
+
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.ordered_dictionary import OrderedDictionnary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.content_classes.wildcard import WildCard
+from spec_merger.json_lines import write_tree
+
+SPEC = Path(__file__).parent.parent / "test_example" / "documents" / "spec.json"
+
+
+def value_from_tokens(tokens):
+    # Reference builder of the Python value of a document from its tokens
+    kind, value, _ = next(tokens)
+    if kind == "{":
+        result = {}
+        kind, value, _ = next(tokens)
+        while kind != "}":
+            assert kind == "string" and next(tokens)[:2] == (":", None)
+            result[value] = value_from_tokens(tokens)
+            kind, _, _ = next(tokens)
+            if kind == ",":
+                kind, value, _ = next(tokens)
+        return result
+    if kind == "[":
+        result = []
+        while True:
+            try:
+                result.append(value_from_tokens(tokens))
+            except ValueError:
+                return result
+            kind, _, _ = next(tokens)
+            if kind == "]":
+                return result
+    if kind == "]":
+        raise ValueError("empty list")
+    return value
+
+
+def tree_of(value):
+    # Reference builder of the tree of a document decoded by json.loads
+    position = JSONPosition("Specification")
+    match value:
+        case dict():
+            wildcards = value.get("wildcards", [])
+            entries = {key: WildCard(position) if key in wildcards else tree_of(entry)
+                       for key, entry in value.items() if key not in ("order", "wildcards")}
+            if value.get("order"):
+                return OrderedDictionnary(position, entries, value["order"])
+            return Dictionary(position, entries)
+        case list():
+            return (OrderedSeq if value[0] else Bag)(position, [tree_of(element) for element in value[1:]])
+        case _:
+            return String(position, str(value))
+
+
+def random_scalar(rng: random.Random):
+    match rng.randrange(5):
+        case 0:
+            return rng.randint(-10 ** 6, 10 ** 6)
+        case 1:
+            return rng.choice([0.5, -1e-7, 3.25e10, 1.0, rng.random()])
+        case 2:
+            return "".join(rng.choice('ab "\\\n\té€😀') for _ in range(rng.randint(0, 8)))
+        case 3:
+            return rng.choice([True, False])
+        case _:
+            return "x" * rng.randint(0, 70)
+
+
+def random_document(rng: random.Random, depth: int = 0):
+    """
+    Returns a random document in the format of the JSON parser: lists start with whether they are ordered, and
+    dictionaries may have an "order" and "wildcards" entry.
+    """
+    if depth > 3 or rng.random() < 0.3:
+        return random_scalar(rng)
+    if rng.random() < 0.5:
+        return [rng.choice([True, False])] + [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    entries = {f"key {index}": random_document(rng, depth + 1) for index in range(rng.randint(0, 4))}
+    if entries and rng.random() < 0.3:
+        entries["order"] = list(reversed(entries))
+    if entries and rng.random() < 0.3:
+        entries["wildcards"] = [next(iter(entries))]
+    return entries
+
+
+def documents():
+    rng = random.Random(0)
+    yield SPEC.read_text()
+    for _ in range(100):
+        yield json.dumps(random_document(rng), indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_tokens_give_the_value_of_json_loads(chunk_size):
+    for document in documents():
+        tokens = json_tokens(io.StringIO(document), chunk_size)
+        assert value_from_tokens(tokens) == json.loads(document)
+        assert next(tokens, None) is None
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_tokens_give_their_offset(chunk_size):
+    for document in documents():
+        for kind, value, offset in json_tokens(io.StringIO(document), chunk_size):
+            if kind in ("string", "scalar"):
+                assert json.JSONDecoder().raw_decode(document, offset)[0] == value
+            else:
+                assert document[offset] == kind
+
+
+def tree_stream(tree) -> str:
+    stream = io.StringIO()
+    write_tree(tree, stream)
+    return stream.getvalue()
+
+
+def test_parse_stream_gives_the_tree_of_parse():
+    for document in documents():
+        parser = JSONParser("document.json", "Specification")
+        expected = tree_of(json.loads(document))
+        assert tree_stream(parser.parse_stream(io.StringIO(document))) == tree_stream(expected)
+
+
+def test_parsed_page_of_the_example():
+    page = JSONParser(str(SPEC), "Specification").get_parsed_page()
+    with open(SPEC) as file:
+        expected = tree_of(json.load(file))
+    assert tree_stream(page.entries) == tree_stream(expected)
+
+
+def test_invalid_documents():
+    for document in ('{"a" "b"}', '{"a": 1 "b": 2}', '[true 1]', '[true, 1,]', '[true, 1}', '{"a": 1]', '{,}',
+                     '[true, null]', '{"a": 1', "01", '{"a"}', '{1: 2}'):
+        with pytest.raises(Exception):
+            JSONParser("document.json", "Specification").parse_stream(io.StringIO(document))
+
+
+@pytest.mark.parametrize("document, message, offset", [
+    ('{"a": "b"} true', "Extra data", 11),
+    ('{"a": "b"}{"c": 1}', "Extra data", 10),
+    ('[true, "a"] ]', "Extra data", 12),
+    ('{"a": "b"}\n\n  [', "Extra data", 14),
+    ('{"a": "b"} garbage', "Expecting value", 11),
+    ('{\n  "a": 1\n  "b": 2\n}', "Unexpected string token", 13),
+    ('{"a": [true, 01]}', "Expecting value", 13),
+    ('{"a": "b\\x"}', "Invalid \\escape", 8),
+    ('{"a": ["b"', "Unexpected end of document", 10),
+])
+def test_errors_give_their_position(document, message, offset):
+    with pytest.raises(json.JSONDecodeError) as error:
+        JSONParser("document.json", "Specification").parse_stream(io.StringIO(document))
+    assert (error.value.msg, error.value.pos) == (message, offset)
+    assert (error.value.lineno, error.value.colno) == (document.count("\n", 0, offset) + 1,
+                                                        offset - document.rfind("\n", 0, offset))
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(document)
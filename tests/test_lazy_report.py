@@ -0,0 +1,79 @@
+import io
+import json
+import random
+import re
+from pathlib import Path
+
+import pytest
+from random_trees import random_tree
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.html_renderer import HTMLRenderer
+
+TEMPLATE = str(Path(__file__).parent.parent / "spec_merger")
+SHARDS = re.compile(r'<script type="application/json" id="spec-merger-shards">(.*?)</script>')
+EMBEDDED_SHARD = re.compile(r'<script type="application/json" id="spec-merger-shard-(\d+)">(.*?)</script>')
+SHARD_FILE = re.compile(r"specMergerShard\((\d+), (.*)\);\n")
+COLLAPSED = re.compile(r'<div class="content" data-chunk="(\d+)"></div>')
+
+
+def expanded(report: str, shard_directory: Path = None) -> str:
+    """
+    Expands a lazy report as its script does when every toggle is opened, removing the scripts of its chunks.
+    """
+    index = json.loads(SHARDS.search(report).group(1))
+    shards = {}
+    if shard_directory is None:
+        for shard, chunks in EMBEDDED_SHARD.findall(report):
+            shards[int(shard)] = json.loads(chunks)
+        assert index["url"] is None
+    else:
+        assert index["url"] == shard_directory.name
+        for path in shard_directory.iterdir():
+            shard, chunks = SHARD_FILE.fullmatch(path.read_text()).groups()
+            shards[int(shard)] = json.loads(chunks)
+    chunks = {}
+    for shard, start in enumerate(index["starts"]):
+        chunks.update((start + offset, html) for offset, html in enumerate(shards[shard]))
+    assert sorted(chunks) == list(range(len(chunks)))
+    report = EMBEDDED_SHARD.sub("", SHARDS.sub("", report))
+    while COLLAPSED.search(report):
+        report = COLLAPSED.sub(lambda match: f'<div class="content">{chunks.pop(int(match.group(1)))}</div>', report)
+    assert not chunks
+    return report
+
+
+def results():
+    rng = random.Random(0)
+    for _ in range(20):
+        left, right = {}, {}
+        for section in range(5):
+            tree_seed = rng.random()
+            left[f"section {section}"] = random_tree(random.Random(tree_seed), "left.py", 5)
+            right[f"section {section}"] = random_tree(random.Random(tree_seed), "right.py", 5, rng)
+        yield Aligner().align(Dictionary(None, left), Dictionary(None, right))
+
+
+@pytest.mark.parametrize("shard_size", [1, 200, 1 << 20])
+def test_lazy_report_expands_to_the_full_report(tmp_path, shard_size):
+    for index, result in enumerate(results()):
+        full = io.StringIO()
+        HTMLRenderer(result).render_to(full, TEMPLATE)
+        lazy = io.StringIO()
+        HTMLRenderer(result).render_lazy_to(lazy, TEMPLATE, shard_size=shard_size)
+        assert expanded(lazy.getvalue()) == full.getvalue()
+        shard_directory = tmp_path / f"shards{index}"
+        lazy = io.StringIO()
+        HTMLRenderer(result).render_lazy_to(lazy, TEMPLATE, shard_directory=str(shard_directory),
+                                            shard_size=shard_size)
+        assert expanded(lazy.getvalue(), shard_directory) == full.getvalue()
+
+
+def test_chunks_cannot_close_their_script():
+    result = Aligner().align(random_tree(random.Random(0), "</script><!--.py", 3),
+                             random_tree(random.Random(0), "</script><!--.py", 3))
+    lazy = io.StringIO()
+    HTMLRenderer(result).render_lazy_to(lazy, TEMPLATE)
+    for _, chunks in EMBEDDED_SHARD.findall(lazy.getvalue()):
+        assert "</" not in chunks and "<!--" not in chunks
@@ -0,0 +1,79 @@
+import io
+import re
+from pathlib import Path
+
+import pytest
+from python_parser import PythonParser
+
+from spec_merger.json_lines import write_tree
+from spec_merger.multi_file_parser import MultiFileParser
+from spec_merger.utils import Path as DocumentPath
+
+IMPLEMENTATION = Path(__file__).parent.parent / "test_example" / "documents" / "implem.py"
+
+
+@pytest.fixture
+def directory(tmp_path) -> Path:
+    """
+    Returns a directory tree holding the sections of the example implementation, one file each, along with files that
+    are not parsed.
+    """
+    sections = [section for section in re.split(r"(?m)^(?=# << [\d.]+ .* >> TITLE)", IMPLEMENTATION.read_text())
+                if section]
+    for index, section in enumerate(sections):
+        path = tmp_path / f"group{index % 3}" / f"part{index:02}.py"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(section)
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / ".hidden" / "part99.py").write_text("# << 9.9 Hidden >> TITLE\n")
+    (tmp_path / "notes.txt").write_text("# << 9.9 Notes >> TITLE\n")
+    return tmp_path
+
+
+def tree_stream(tree) -> str:
+    stream = io.StringIO()
+    write_tree(tree, stream)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_directory_gives_the_sections_of_the_whole_file(directory, jobs):
+    page = MultiFileParser(DocumentPath(str(directory), True), PythonParser, "*.py", jobs=jobs).get_parsed_page()
+    whole = PythonParser(str(IMPLEMENTATION)).get_parsed_page()
+    assert page.entries.digest() == whole.entries.digest()
+    assert sorted(page.entries.entries) == sorted(whole.entries.entries)
+
+
+def test_jobs_give_the_same_page(directory):
+    pages = [MultiFileParser(DocumentPath(str(directory), True), PythonParser, "*.py", jobs=jobs).get_parsed_page()
+             for jobs in (1, 2, 4)]
+    assert tree_stream(pages[0].entries) == tree_stream(pages[1].entries) == tree_stream(pages[2].entries)
+
+
+def test_duplicates_and_updates(directory):
+    first = directory / "group0" / "part00.py"
+    duplicate = directory / "group9" / "copy.py"
+    duplicate.parent.mkdir()
+    duplicate.write_text(first.read_text())
+    parser = MultiFileParser(DocumentPath(str(directory), True), PythonParser, "*.py")
+    page = parser.get_parsed_page()
+    [title] = parser.duplicate_sections
+    assert parser.duplicate_sections[title] == [str(first), str(duplicate)]
+    kept = dict(parser.file_pages)
+    first.write_text(first.read_text().replace("purely invented", "totally invented"))
+    updated = parser.update([str(first)])
+    assert updated.entries.digest() != page.entries.digest()
+    assert all(parser.file_pages[name] is kept[name] for name in kept if name != str(first))
+    assert parser.file_pages[str(first)] is not kept[str(first)]
+    assert parser.duplicate_sections == {title: [str(first), str(duplicate)]}
+    first.unlink()
+    parser.update([])
+    assert parser.duplicate_sections == {}
+    assert tree_stream(parser.parsed_page.entries[title]) == tree_stream(PythonParser(str(duplicate))
+                                                                         .get_parsed_page().entries[title])
+
+
+def test_single_file(directory):
+    part = directory / "group1" / "part01.py"
+    page = MultiFileParser(DocumentPath(str(part), False), PythonParser).get_parsed_page()
+    assert page.entries.digest() == PythonParser(str(part)).get_parsed_page().entries.digest()
@@ -0,0 +1,37 @@
+import random
+from pathlib import Path
+
+from json_parser import JSONParser
+from python_parser import PythonParser
+from random_trees import random_tree
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.dictionary import Dictionary
+
+DOCUMENTS = Path(__file__).parent.parent / "test_example" / "documents"
+
+
+def test_jobs_give_the_sequential_result():
+    rng = random.Random(0)
+    left, right = {}, {}
+    for index in range(40):
+        tree_seed = rng.random()
+        left[f"section {index}"] = random_tree(random.Random(tree_seed), "left.py", 4)
+        # Every other section is replaced, and a few are renamed
+        right_seed = tree_seed if index % 2 else rng.random()
+        right[f"section {index}" + "x" * (index % 10 == 0)] = random_tree(random.Random(right_seed), "right.py", 4)
+    left, right = Dictionary(None, left), Dictionary(None, right)
+    expected = Aligner().align(left, right)
+    result = Aligner(jobs=3).align(left, right)
+    assert result.count_errors() == expected.count_errors()
+    assert result.to_text() == expected.to_text()
+    assert result.to_html(False) == expected.to_html(False)
+
+
+def test_jobs_on_the_example():
+    # The positions of the Python parser are handles into the position table of each process
+    left = JSONParser(str(DOCUMENTS / "spec.json"), "Specification").get_parsed_page().entries
+    right = PythonParser(str(DOCUMENTS / "implem.py")).get_parsed_page().entries
+    expected = Aligner().align(left, right)
+    result = Aligner(jobs=2).align(left, right)
+    assert result.to_html(False) == expected.to_html(False)
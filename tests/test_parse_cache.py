@@ -0,0 +1,35 @@
+import shutil
+from pathlib import Path
+
+from json_parser import JSONParser
+
+from spec_merger.parse_cache import CachedParser, ParsedPageCache
+
+SPEC = str(Path(__file__).parent.parent / "test_example" / "documents" / "spec.json")
+
+
+def test_parsed_page_cache(tmp_path):
+    spec = tmp_path / "spec.json"
+    shutil.copy(SPEC, spec)
+    cache = ParsedPageCache(str(tmp_path / "pages"))
+    parsed = JSONParser(str(spec), "Specification").get_parsed_page()
+    cached = CachedParser(JSONParser(str(spec), "Specification"), cache).get_parsed_page()
+    assert cached.entries.digest() == parsed.entries.digest()
+    assert cache.load(ParsedPageCache.key(JSONParser(str(spec), "Specification"))) is not None
+    # Another setting of the parser is another page
+    assert cache.load(ParsedPageCache.key(JSONParser(str(spec), "Other"))) is None
+    spec.write_text(spec.read_text().replace("purely invented", "totally invented"))
+    changed = CachedParser(JSONParser(str(spec), "Specification"), cache).get_parsed_page()
+    assert changed.entries.digest() != parsed.entries.digest()
+    assert changed.entries.digest() == JSONParser(str(spec), "Specification").get_parsed_page().entries.digest()
+
+
+def test_parsed_page_cache_ignores_corrupted_entries(tmp_path):
+    cache = ParsedPageCache(str(tmp_path))
+    parser = JSONParser(SPEC, "Specification")
+    key = ParsedPageCache.key(parser)
+    cache.store(key, parser.get_parsed_page())
+    for path in tmp_path.rglob("*.pickle"):
+        path.write_bytes(b"\x80\x05garbage")
+    assert cache.load(key) is None
+    assert cache.get_parsed_page(parser).entries.digest() == parser.get_parsed_page().entries.digest()
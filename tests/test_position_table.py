@@ -0,0 +1,78 @@
+import pickle
+import random
+
+import pytest
+
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.string import String
+from spec_merger.position_table import POSITION_TABLE, ROW_MASK, LinePosition, PositionTable, retain_positions
+
+
+def test_each_range_has_one_row():
+    table = PositionTable()
+    rng = random.Random(0)
+    handles = {}
+    for _ in range(5000):
+        line_range = (f"file{rng.randrange(20)}.py", rng.randrange(100), rng.randrange(100))
+        handle = table.add(*line_range)
+        assert handles.setdefault(line_range, handle) == handle
+        assert table.row(handle) == line_range
+    assert len(table) == len(handles)
+
+
+def test_retain_frees_the_other_rows():
+    table = PositionTable()
+    handles = {(f"file{index % 7}.py", index, index + 1): table.add(f"file{index % 7}.py", index, index + 1)
+               for index in range(1000)}
+    kept = dict(list(handles.items())[::10])
+    assert table.retain(kept.values()) == len(handles) - len(kept)
+    assert len(table) == len(kept)
+    for line_range, handle in kept.items():
+        assert table.add(*line_range) == handle and table.row(handle) == line_range
+    freed = set(handles.values()) - set(kept.values())
+    for handle in freed:
+        with pytest.raises(ValueError):
+            table.row(handle)
+    # New ranges reuse the freed rows, with handles of their own
+    new_handles = {table.add("new.py", line, line) for line in range(len(freed))}
+    assert {handle & ROW_MASK for handle in new_handles} == freed and not new_handles & freed
+    for handle in freed:
+        with pytest.raises(ValueError):
+            table.html_str(handle)
+    # Freed handles keep nothing
+    assert table.retain(freed | set(kept.values())) == len(new_handles)
+
+
+def test_positions_compare_their_ranges():
+    position = LinePosition("a.py", 1, 3)
+    assert position == LinePosition("a.py", 1, 3) and hash(position) == hash(LinePosition("a.py", 1, 3))
+    assert position != LinePosition("b.py", 1, 3) and position != LinePosition("a.py", 1, 4)
+    assert position != int(position) and int(position) != position and not position == int(position)
+    rows = len(POSITION_TABLE)
+    assert pickle.loads(pickle.dumps(position)) == position
+    assert len(POSITION_TABLE) == rows
+    assert repr(position) == "LinePosition('a.py', 1, 3)" and (position.first_line, position.last_line) == (1, 3)
+
+
+def test_retain_positions_keeps_the_positions_of_the_trees():
+    tree = OrderedSeq(LinePosition("kept.py", 1, 9), [String((LinePosition("kept.py", 2, 2), None), "a")])
+    for line in range(100):
+        LinePosition("dropped.py", line, line)
+    retain_positions([tree])
+    assert len(POSITION_TABLE) == 2
+    assert repr(tree.position) == "LinePosition('kept.py', 1, 9)"
+    assert repr(tree.sequence[0].position[0]) == "LinePosition('kept.py', 2, 2)"
+
+
+def test_freed_positions_fail_loudly():
+    kept = OrderedSeq(LinePosition("kept.py", 1, 9), [])
+    escaped = LinePosition("escaped.py", 3, 4)
+    retain_positions([kept])
+    reusing = LinePosition("other.py", 5, 6)
+    assert int(reusing) & ROW_MASK == int(escaped) & ROW_MASK
+    for use in (lambda: escaped.html_str(), lambda: escaped.file_name, lambda: pickle.dumps(escaped)):
+        with pytest.raises(ValueError):
+            use()
+    assert escaped != reusing and escaped != LinePosition("escaped.py", 3, 4)
+    assert repr(escaped).startswith("LinePosition(<freed")
+    assert repr(reusing) == "LinePosition('other.py', 5, 6)"
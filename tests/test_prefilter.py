@@ -0,0 +1,86 @@
+import json
+import random
+from hashlib import blake2b
+from pathlib import Path
+
+import pytest
+
+from spec_merger.aligner import Aligner
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.string import String
+from spec_merger.content_classes.wildcard import WildCard
+
+# Errors, warnings and digests of the text and HTML reports of the alignments of random_pair, as given by the aligner
+# before the prefilter was added
+BASELINE = Path(__file__).parent / "data" / "baseline_alignments.json"
+KEYS = ["sec1", "sec2", "sec3", "steps", "algorithm", "note"]
+
+
+def random_tree(rng: random.Random, depth: int):
+    draw = rng.random()
+    if depth == 0 or draw < 0.3:
+        return String(None, rng.choice(["a", "b", "a b", "c d e", "x", "let x be y"]))
+    if draw < 0.38:
+        return WildCard(None)
+    return Dictionary(None, {rng.choice(KEYS): random_tree(rng, depth - 1) for _ in range(rng.randint(1, 5))})
+
+
+def mutated(rng: random.Random, tree):
+    match tree:
+        case Dictionary():
+            entries = {}
+            for key, value in tree.entries.items():
+                draw = rng.random()
+                if draw < 0.1:
+                    continue
+                entries[key + "x" if draw < 0.3 else key] = mutated(rng, value)
+            if rng.random() < 0.2:
+                entries[rng.choice(KEYS)] = random_tree(rng, 2)
+            return Dictionary(None, entries)
+        case String() if rng.random() < 0.2:
+            return String(None, rng.choice(["a", "b", "a  b", "y"]))
+        case _:
+            return tree
+
+
+def random_pair(seed: int) -> tuple[Dictionary, Dictionary]:
+    rng = random.Random(seed)
+    left = Dictionary(None, {key: random_tree(rng, 3) for key in KEYS[:rng.randint(1, len(KEYS))]})
+    return left, mutated(rng, left)
+
+
+def summary(result) -> list:
+    count = result.count_errors()
+    return [count.error_count, count.warning_count,
+            blake2b(result.to_text().encode(), digest_size=8).hexdigest(),
+            blake2b(result.to_html(False).encode(), digest_size=8).hexdigest()]
+
+
+def test_default_alignment_is_the_baseline_one():
+    baseline = json.loads(BASELINE.read_text())
+    for seed, expected in enumerate(baseline):
+        assert summary(Aligner().align(*random_pair(seed))) == expected, seed
+
+
+def test_prefilter_only_reports_unrelated_misspelled_entries_as_missing():
+    related = Dictionary(None, {"a": String(None, "let x be y"), "b": String(None, "return x")})
+    unrelated = Dictionary(None, {"c": String(None, "throw"), "d": String(None, "exit")})
+    left = Dictionary(None, {"steps": related, "notes": unrelated})
+    right = Dictionary(None, {"stepss": Dictionary(None, {"a": String(None, "let x be z"),
+                                                          "b": String(None, "return x")}),
+                              "notess": related})
+    assert "Misspelled Entry" in Aligner().align(left, right).to_text()
+    filtered = Aligner(prefilter_threshold=0.5).align(left, right)
+    text = filtered.to_text()
+    # The related entries are still aligned as a misspelling, but not the unrelated ones
+    assert text.count("Misspelled Entry") == 1 and text.count("Missing Entries") == 2
+
+
+@pytest.mark.parametrize("threshold", [0.1, 0.5, 1.0])
+def test_prefilter_never_finds_more_misspellings(threshold):
+    for seed in range(100):
+        left, right = random_pair(seed)
+        full, filtered = Aligner().align(left, right), Aligner(prefilter_threshold=threshold).align(left, right)
+        assert filtered.to_text().count("Misspelled Entry") <= full.to_text().count("Misspelled Entry")
+        if filtered.to_text().count("Misspelled Entry") == full.to_text().count("Misspelled Entry"):
+            assert summary(filtered) == summary(full)
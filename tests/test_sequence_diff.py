@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from spec_merger.sequence_diff import diff_opcodes
+
+
+def lcs_length(left, right) -> int:
+    # Quadratic dynamic programming reference
+    lengths = [[0] * (len(right) + 1) for _ in range(len(left) + 1)]
+    for i, left_element in enumerate(left):
+        for j, right_element in enumerate(right):
+            lengths[i + 1][j + 1] = (lengths[i][j] + 1 if left_element == right_element else
+                                     max(lengths[i][j + 1], lengths[i + 1][j]))
+    return lengths[len(left)][len(right)]
+
+
+def check_opcodes(left, right, opcodes) -> int:
+    """
+    Checks that the opcodes cover both sequences in order, with equal elements in the equal ranges, and returns the
+    number of elements matched.
+    """
+    i = j = 0
+    matched = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        assert tag in ("equal", "delete", "insert", "replace")
+        if tag == "equal":
+            assert left[i1:i2] == right[j1:j2]
+            matched += i2 - i1
+        elif tag == "delete":
+            assert i2 > i1 and j2 == j1
+        elif tag == "insert":
+            assert j2 > j1 and i2 == i1
+        else:
+            assert i2 > i1 and j2 > j1
+        i, j = i2, j2
+    assert (i, j) == (len(left), len(right))
+    return matched
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_a_longest_common_subsequence(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        alphabet = "abcd"[:rng.randint(1, 4)]
+        left = [rng.choice(alphabet) for _ in range(rng.randint(0, 12))]
+        right = [rng.choice(alphabet) for _ in range(rng.randint(0, 12))]
+        assert check_opcodes(left, right, diff_opcodes(left, right)) == lcs_length(left, right)
+
+
+def test_nearly_equal_sequences():
+    rng = random.Random(0)
+    left = [rng.randrange(1000) for _ in range(500)]
+    right = list(left)
+    del right[100:103]
+    right.insert(300, -1)
+    right[450] = -2
+    assert check_opcodes(left, right, diff_opcodes(left, right)) == lcs_length(left, right)
+
+
+def test_edit_bound_reports_a_replace():
+    left = list(range(20))
+    right = list(range(100, 120))
+    opcodes = diff_opcodes(left, right, max_edits=3)
+    assert opcodes == [("replace", 0, 20, 0, 20)]
+    # Past the bound, the common prefix and suffix are still matched
+    left = ["x"] + list(range(20)) + ["y"]
+    right = ["x"] + list(range(100, 120)) + ["y"]
+    assert check_opcodes(left, right, diff_opcodes(left, right, max_edits=3)) == 2
@@ -0,0 +1,54 @@
+import dataclasses
+import pickle
+
+import pytest
+from json_parser import JSONPosition
+
+from spec_merger.aligner_utils import ReportErrorType
+from spec_merger.content_classes.alignment_issue import AlignmentIssue
+from spec_merger.content_classes.bag import Bag
+from spec_merger.content_classes.dictionary import Dictionary
+from spec_merger.content_classes.misalignment import Misalignment
+from spec_merger.content_classes.ok_summary import OKSummary
+from spec_merger.content_classes.ordered_dictionary import OrderedDictionnary
+from spec_merger.content_classes.ordered_seq import OrderedSeq
+from spec_merger.content_classes.skipped_subtree import SkippedSubtree
+from spec_merger.content_classes.string import String
+from spec_merger.content_classes.wildcard import WildCard
+
+
+def nodes():
+    string = String(JSONPosition("a"), "x y")
+    return [string, WildCard(None), Dictionary(None, {"a": string}), OrderedDictionnary(None, {"a": string}, ["a"]),
+            OrderedSeq(None, [string]), Bag(None, [string]),
+            Misalignment((None, None), string, None, ReportErrorType.MISSING_IN_BAG),
+            AlignmentIssue((None, None), string, ReportErrorType.MISSPELLED_ENTRY), OKSummary(None, 3),
+            SkippedSubtree((None, None)), JSONPosition("a")]
+
+
+@pytest.mark.parametrize("node", nodes(), ids=lambda node: type(node).__name__)
+def test_nodes_are_slotted_and_frozen(node):
+    assert not hasattr(node, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        node.position = None
+    if isinstance(node, JSONPosition):
+        assert pickle.loads(pickle.dumps(node)) == node
+        return
+    digest, count = node.digest(), node.count_errors()
+    copy = pickle.loads(pickle.dumps(node))
+    assert copy == node
+    assert copy.digest() == digest and copy.count_errors() == count
+
+
+def test_strings_are_normalized_once():
+    value = "a b\xa0c"
+    string = String(None, value)
+    assert string.normalized == string.real_string() == "abc"
+    assert String(None, "a-b", "-").normalized == "ab"
+    # Values without useless characters are kept as they are
+    clean = "abc"
+    assert String(None, clean).normalized is clean
+    moved = string.moved(JSONPosition("b"))
+    assert moved.normalized is string.normalized and moved.value is string.value
+    assert moved == string and moved.position == JSONPosition("b")
+    assert "normalized" not in repr(string)
@@ -0,0 +1,113 @@
+import io
+import os
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+from json_parser import JSONParser
+from python_parser import PythonParser
+
+from spec_merger.aligner import Aligner
+from spec_merger.cli import write_result
+from spec_merger.multi_file_parser import MultiFileParser
+from spec_merger.utils import Path as DocumentPath
+from spec_merger.watch import SectionMemo, Watcher
+
+DOCUMENTS = Path(__file__).parent.parent / "test_example" / "documents"
+
+
+class Documents:
+    """
+    Copy of the example documents, the implementation being split into one file per section.
+    """
+
+    def __init__(self, directory: Path):
+        self.spec = directory / "spec.json"
+        shutil.copy(DOCUMENTS / "spec.json", self.spec)
+        self.implementation = directory / "implem"
+        self.implementation.mkdir()
+        sections = re.split(r"(?m)^(?=# << [\d.]+ .* >> TITLE)", (DOCUMENTS / "implem.py").read_text())
+        for index, section in enumerate(sections):
+            (self.implementation / f"part{index:02}.py").write_text(section)
+        self.saves = 0
+
+    def save(self, path: Path, text: str):
+        path.write_text(text)
+        # The modification times of quick saves may be equal, so each save gets its own
+        self.saves += 1
+        os.utime(path, ns=(self.saves * 10 ** 9, self.saves * 10 ** 9))
+
+    def edit(self, path: Path, old: str, new: str):
+        text = path.read_text()
+        assert old in text
+        self.save(path, text.replace(old, new))
+
+    def watcher(self) -> Watcher:
+        return Watcher(lambda: JSONParser(str(self.spec), "Specification"),
+                       lambda: MultiFileParser(DocumentPath(str(self.implementation), True), PythonParser, "*.py"),
+                       Aligner())
+
+
+@pytest.fixture
+def documents(tmp_path) -> Documents:
+    return Documents(tmp_path)
+
+
+def check_against_full_alignment(watcher: Watcher, memos: dict[str, SectionMemo]):
+    result = watcher.align()
+    left, right = (document.page.entries for document in watcher.documents)
+    expected = Aligner().align(left, right)
+    assert result.digest() == expected.digest()
+    assert result.count_errors() == expected.count_errors()
+    for report_format, memo in memos.items():
+        written, expected_written = io.StringIO(), io.StringIO()
+        write_result(result, report_format, written, None, memo)
+        write_result(expected, report_format, expected_written, None)
+        assert written.getvalue() == expected_written.getvalue()
+
+
+def test_watch_gives_the_full_alignment(documents):
+    watcher = documents.watcher()
+    memos = {report_format: SectionMemo() for report_format in ("html", "text", "findings")}
+    check_against_full_alignment(watcher, memos)
+    section_count = len(watcher.sections)
+    assert not watcher.poll()
+
+    part = documents.implementation / "part03.py"
+    documents.edit(part, "z = x + y", "z = y + x")
+    assert watcher.poll()
+    check_against_full_alignment(watcher, memos)
+    assert 0 < watcher.realigned < section_count
+
+    documents.edit(part, "# << 2. Let res", "# << 2. Let result")
+    documents.edit(documents.spec, "purely invented", "totally invented")
+    assert watcher.poll()
+    check_against_full_alignment(watcher, memos)
+
+    (documents.implementation / "part05.py").unlink()
+    assert watcher.poll()
+    check_against_full_alignment(watcher, memos)
+
+    documents.save(documents.implementation / "part99.py", "# << 9.9 extra >> TITLE\n")
+    assert watcher.poll()
+    check_against_full_alignment(watcher, memos)
+    assert not watcher.poll()
+
+
+def test_watch_frees_the_positions_no_longer_used(documents):
+    # A duplicate of a section, hidden by the first one until it is removed
+    documents.save(documents.implementation / "part98.py", (documents.implementation / "part01.py").read_text())
+    watcher = documents.watcher()
+    memos = {"html": SectionMemo()}
+    check_against_full_alignment(watcher, memos)
+    part = documents.implementation / "part02.py"
+    text = part.read_text()
+    for lines in range(1, 30):
+        # Every line added moves all the positions of the file
+        documents.save(part, "\n" * lines + text)
+        assert watcher.poll()
+        check_against_full_alignment(watcher, memos)
+    (documents.implementation / "part01.py").unlink()
+    assert watcher.poll()
+    check_against_full_alignment(watcher, memos)